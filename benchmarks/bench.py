@@ -0,0 +1,238 @@
+"""
+Benchmarks of the board engine hot paths.
+
+    python -m benchmarks.bench run -o current.json
+    python -m benchmarks.bench run -o baseline.json --compare previous.json
+    python -m benchmarks.bench compare baseline.json current.json
+
+Every benchmark runs on fixed positions (opening, midgame and a late game with a long
+history) built from seeded random games, so numbers are comparable between runs.
+"""
+import argparse
+import copy
+import json
+import platform
+import random
+import sys
+import time
+import numpy as np
+from tablut.board import WinException, LoseException, DrawException
+from tablut.game import Game, Player
+from tablut.player import RandomPlayer
+from tablut.selfplay import play_game
+from tablut.util import load_class, random_game
+
+
+def build_position(board_class, plies, seed):
+    """
+    Play plies seeded random moves, skipping the ones ending the game,
+    so that late positions come with a long history.
+    Returns the board and the player to move
+    """
+    board = random_game(board_class, seed, plies, avoid_end=True).boards[-1]
+    return board, board.turn
+
+
+def positions(board_class):
+    return {
+        "opening": build_position(board_class, 0, 0),
+        "midgame": build_position(board_class, 30, 1),
+        "lategame": build_position(board_class, 300, 2),
+    }
+
+
+def timed(function, number):
+    """
+    Return the seconds taken by number calls of function
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    return time.perf_counter() - start
+
+
+def timed_on_copies(board, function, number, prepare=None):
+    """
+    Time function(board_copy) over number fresh copies. Copying and
+    prepare(board_copy), when given, are not timed
+    """
+    copies = [copy.deepcopy(board) for _ in range(number)]
+    if prepare is not None:
+        for board_copy in copies:
+            prepare(board_copy)
+    start = time.perf_counter()
+    for board_copy in copies:
+        function(board_copy)
+    return time.perf_counter() - start
+
+
+def _first_capture(board, player):
+    """
+    A capturing move for player and its number of captures if there is one,
+    any legal move and 0 otherwise
+    """
+    moves = board.legal_moves(player)
+    for start, end in moves:
+        undo = board.make_move(player, start, end, check_legal=False)
+        board.unmake_move(undo)
+        if undo.captured:
+            return start, end, len(undo.captured)
+    return moves[0] + (0,)
+
+
+def benchmarks(board_class, number):
+    """
+    Yield (name, seconds, calls) for every benchmark
+    """
+    for label, (board, player) in positions(board_class).items():
+        size = board.TABLES.size
+        squares = [(i, j) for i in range(size) for j in range(size)]
+        rnd = random.Random(label)
+        candidates = [(rnd.choice(squares), rnd.choice(squares)) for _ in range(100)]
+        yield ("is_legal/%s" % label,
+               timed(lambda: [board.is_legal(player, s, e) for s, e in candidates], number),
+               number * len(candidates))
+
+        yield "legal_moves/%s" % label, timed(lambda: board.legal_moves(player), number), number
+
+        start, end, captures = _first_capture(board, player)
+
+        def step(b):
+            try:
+                b.step(player, start, end)
+            except (WinException, LoseException, DrawException):
+                pass
+        yield "step/%s" % label, timed_on_copies(board, step, number), number
+
+        def move_piece(b):
+            b._move_piece(start, end)
+        moved_board = copy.deepcopy(board)
+        move_piece(moved_board)
+        # the timed calls must do the captures, not look at an empty square
+        assert not captures or moved_board.apply_captures(end), label
+        yield ("apply_captures/%s" % label,
+               timed_on_copies(board, lambda b: b.apply_captures(end), number, move_piece), number)
+
+        undo = board.make_move(player, start, end)
+        moved = board.board.copy()
+        board.unmake_move(undo)
+        yield "infer_move/%s" % label, timed(lambda: board.infer_move(moved), number), number
+
+        grid = board.board
+        packed = board.pack(grid)
+        yield "pack/%s" % label, timed(lambda: board.pack(grid), number), number
+        yield "unpack/%s" % label, timed(lambda: board.unpack(packed), number), number
+        yield "draw_condition/%s" % label, timed(board.draw_condition, number), number
+
+        game = Game(board)
+        game.turn = player
+
+        def what_if():
+            with game.what_if(start, end):
+                pass
+        yield "what_if/%s" % label, timed(what_if, number), number
+
+    games = max(1, number // 50)
+
+    rnd = random.Random(0)
+
+    def random_game():
+        game = Game(board_class())
+        play_game(game, RandomPlayer(game, Player.WHITE, rnd), RandomPlayer(game, Player.BLACK, rnd), 500)
+    yield "random_game", timed(random_game, games), games
+
+
+def run(board, number, repeat):
+    """
+    Run all benchmarks repeat times keeping the best time of each.
+    Returns the results dict saved as JSON
+    """
+    board_class = load_class(board)
+    results = dict()
+    for _ in range(repeat):
+        for name, seconds, calls in benchmarks(board_class, number):
+            per_call = seconds / calls
+            if name not in results or per_call < results[name]["seconds_per_call"]:
+                results[name] = {"seconds_per_call": per_call, "calls": calls}
+    return {
+        "meta": {
+            "board": board,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "time": time.time(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Print the per benchmark ratio current / baseline.
+    Returns the names of the benchmarks slower than baseline by more than threshold
+    """
+    regressions = list()
+    for name in sorted(current["results"]):
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds_per_call"]
+        after = current["results"][name]["seconds_per_call"]
+        ratio = after / before
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        print("%-28s %12.2fus %12.2fus %7.2fx %s" % (name, before * 1e6, after * 1e6, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Board engine benchmarks")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-o", "--output", help="save the results as JSON here")
+    run_parser.add_argument("--board", default="tablut.rules.ashton:Board")
+    run_parser.add_argument("-n", "--number", type=int, default=200,
+                            help="calls per benchmark and repetition")
+    run_parser.add_argument("-r", "--repeat", type=int, default=3)
+    run_parser.add_argument("--compare", metavar="BASELINE",
+                            help="compare the results with a stored baseline")
+    run_parser.add_argument("--threshold", type=float, default=0.1,
+                            help="relative slowdown flagged as regression")
+
+    compare_parser = commands.add_parser("compare", help="compare two saved results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        current = run(args.board, args.number, args.repeat)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+        baseline_path = args.compare
+        if baseline_path is None:
+            for name, result in sorted(current["results"].items()):
+                print("%-28s %12.2fus" % (name, result["seconds_per_call"] * 1e6))
+            return 0
+    else:
+        baseline_path = args.baseline
+        with open(args.current) as f:
+            current = json.load(f)
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print("%d regressions: %s" % (len(regressions), ", ".join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,5 +3,14 @@ import setuptools
 setuptools.setup(
     name="tablutpy",
     version="0.0.1",
-    packages=setuptools.find_packages()
-)
\ No newline at end of file
+    packages=setuptools.find_packages(),
+    entry_points={
+        "console_scripts": [
+            "tablut-selfplay=tablut.selfplay:main",
+            "tablut-server=tablut.server:main",
+            "tablut-book=tablut.book:main",
+            "tablut-perft=tablut.perft:main",
+            "tablut-tournament=tablut.tournament:main",
+        ]
+    }
+)
@@ -1,5 +1,6 @@
 import copy
 import numpy as np
+from tablut.history import History
 
 
 class WinException(Exception):
@@ -23,17 +24,129 @@ class DrawException(Exception):
     pass
 
 
+class BoardView(np.ndarray):
+    """
+    Float grid handed out by BaseBoard.board.
+    It is a copy of the position, but writing one of its squares (also through
+    a row, e.g. view[i][j] = value) writes the new grid back into its board.
+    Writing a grid read before the board changed raises ValueError instead of
+    putting the old position back. Copies and results of operations on it are plain grids.
+    """
+
+    def __array_finalize__(self, obj):
+        self._owner = None
+        self._root = None
+
+    def __getitem__(self, key):
+        item = super().__getitem__(key)
+        if self._owner is not None and isinstance(item, BoardView) and item.base is not None:
+            # a view (e.g. a row): writes to it must reach the board as well
+            item._owner = self._owner
+            item._root = self if self._root is None else self._root
+        return item
+
+    def __setitem__(self, key, value):
+        owner = self._owner
+        root = self if self._root is None else self._root
+        if owner is not None and not np.array_equal(root, owner.TILE_VALUES[owner.TILES] + owner.pieces):
+            raise ValueError("The board changed since this grid was read, read board.board again")
+        super().__setitem__(key, value)
+        if owner is not None:
+            owner.board = root
+
+
 class BaseBoard(object):
     """
-    Base board implementation
+    Base board implementation.
+    The position is stored as small integers: a fixed int8 layer of tile codes
+    (TILES) and an int8 layer of pieces (pieces), where a piece is the integer part
+    of its TILE_PIECE_MAP value (e.g. 2 for a white soldier, -2 for a black one).
     """
 
     def __init__(self):
-        self.board_history = list()
+        # when a list, removed pieces are logged here as (position, piece)
+        self._captured = None
         self.board = self.unpack(self.BOARD_TEMPLATE)
         # Save initial state to board history
         # (needed as a winning condition is when the same board status appears twice)
-        self.board_history.append(self.pack(self.board))
+        self._reset_history()
+
+    @property
+    def board(self):
+        """
+        Float grid of the position, with the TILE_PIECE_MAP value of every square.
+        It is built on every access; writing its squares updates the board.
+        """
+        view = (self.TILE_VALUES[self.TILES] + self.pieces).view(BoardView)
+        view._owner = self
+        return view
+
+    @board.setter
+    def board(self, grid):
+        tiles = self.TILE_VALUES[self.TILES]
+        self.pieces = np.rint(np.asarray(grid, dtype=float) - tiles).astype(np.int8)
+        self.rehash()
+
+    def rehash(self):
+        """
+        Recompute any state derived from the pieces, called when the whole grid is replaced
+        """
+        pass
+
+    @property
+    def hash(self):
+        """
+        Hash of the position, side to move included
+        """
+        return hash(self._snapshot())
+
+    @property
+    def board_history(self):
+        """
+        Packed grids (see pack) of the positions recorded so far, oldest first
+        """
+        return [self.pack(self._snapshot_board(snapshot)) for snapshot in self.history.snapshots()]
+
+    def _snapshot(self):
+        """
+        Compact copy of the position (side to move included) stored in history
+        """
+        return (self.turn, self.pieces.tobytes())
+
+    def _snapshot_board(self, snapshot):
+        """
+        Float grid of a position stored by _snapshot
+        """
+        pieces = np.frombuffer(snapshot[1], dtype=np.int8).reshape(self.pieces.shape)
+        return self.TILE_VALUES[self.TILES] + pieces
+
+    def _piece_count(self):
+        """
+        Number of pieces on the board, positions can only repeat while it is the same
+        """
+        return int(np.count_nonzero(self.pieces))
+
+    def copy(self):
+        """
+        Independent board in the same position, sharing the history recorded so far
+        """
+        clone = copy.copy(self)
+        clone.pieces = self.pieces.copy()
+        return clone
+
+    @property
+    def TILES(self):
+        """
+        Fixed int8 grid of tile codes
+        """
+        raise NotImplementedError
+
+    @property
+    def TILE_VALUES(self):
+        """
+        Float value of each tile code in the float grid
+        """
+        raise NotImplementedError
 
     @property
     def TILE_PIECE_MAP(self):
@@ -59,9 +172,10 @@ class BaseBoard(object):
         instead of a matrix of objects
         """
         grid = copy.copy(self.BOARD_TEMPLATE)
+        values = np.asarray(board).tolist()
         for row_i, row in enumerate(grid):
             for col_i, column in enumerate(grid):
-                tile = board[row_i][col_i]
+                tile = values[row_i][col_i]
                 grid[row_i][col_i] = self.INVERSE_TILE_PIECE_MAP[tile]
         return grid
 
@@ -69,7 +183,7 @@ class BaseBoard(object):
         """
         Builds the board using the board template
         """
-        grid = np.empty((9, 9))
+        grid = np.empty((len(template), len(template[0])))
 
         for row_i, row in enumerate(grid):
             for col_i, column in enumerate(row):
@@ -97,16 +211,11 @@ class BaseBoard(object):
 
         if legal_move:
             # perform move
-            # This removes the tile: we just keep the int
-            piece = int(self.board[start[0]][start[1]])
-            # This removes the piece: we just keep the decimal part
-            self.board[start[0]][start[1]] = self.board[start[0]
-                                                        ][start[1]] - int(self.board[start[0]][start[1]])  # The modulo %1 doesn't work: Python always returns positives
-            self.board[end[0]][end[1]] = self.board[end[0]][end[1]
-                                                            ] + piece  # This adds the piece to the new tile
+            self._move_piece(start, end)
 
             # remove captured pieces
             captures = self.apply_captures(end)
+            self._pass_turn(player)
 
             # check for winning condition
             if self.winning_condition():
@@ -117,11 +226,72 @@ class BaseBoard(object):
                 raise DrawException
             else:
                 # store move in board history
-                self.board_history.append(self.pack(self.board))
+                self._record()
                 return captures
         else:
             raise ValueError(message)
 
+    def _move_piece(self, start, end):
+        """
+        Move the piece in start to end leaving the tiles untouched.
+        Returns the moved piece
+        """
+        piece = int(self.pieces[start[0], start[1]])
+        if piece:
+            self.pieces[start[0], start[1]] = 0
+            self.pieces[end[0], end[1]] = piece
+        return piece
+
+    def _remove_piece(self, position):
+        """
+        Remove the piece in position leaving the tile untouched.
+        Returns the removed piece (0 if the tile was empty)
+        """
+        piece = int(self.pieces[position[0], position[1]])
+        if piece:
+            self.pieces[position[0], position[1]] = 0
+            if self._captured is not None:
+                self._captured.append(((int(position[0]), int(position[1])), piece))
+        return piece
+
+    def _place_piece(self, position, piece):
+        """
+        Put piece on the (empty) tile in position
+        """
+        self.pieces[position[0], position[1]] = piece
+
+    def _pass_turn(self, player):
+        """
+        Hand the turn over to the opponent of player
+        """
+        self.turn = player.next()
+
+    def _record(self):
+        """
+        Store the current state in board history
+        """
+        self.history = self.history.push(self._snapshot(), self.hash, self._piece_count())
+
+    def _reset_history(self):
+        """
+        Start the board history over from the current state
+        """
+        self.history = History(self._snapshot(), self.hash, self._piece_count())
+
+    def _repeated(self):
+        """
+        Whether the current state was already recorded, besides as the last state
+        """
+        history = self.history
+        h, count = self.hash, self._piece_count()
+        if history.hash == h:
+            # the current state just recorded (or one sharing its hash, which is
+            # still not the current state): only the states before can match
+            history = history.parent
+        if history is None or not history.may_contain(h, count):
+            return False
+        return history.contains(self._snapshot(), h, count)
+
     def apply_captures(self, changed_position):
         """
         Apply captures on the board based on the changed position
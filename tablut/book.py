@@ -0,0 +1,177 @@
+"""
+Opening book: move statistics of recorded games keyed by position hash.
+
+    tablut-book games.tbr more-games.jsonl -o book.bin --plies 16
+    game = Game(ashton.Board(), book=OpeningBook("book.bin"))
+
+A book file starts with a 16 bytes header (MAGIC, number of entries as little endian
+uint64) followed by the entry columns: position hash (uint64, sorted), games, wins and
+draws (uint32) and move (uint16, see tablut.util.encode_move with the board size),
+all little endian.
+There is one entry per (position, move) pair; wins and draws are counted for the
+player making the move. Lookups are a binary search on the memory mapped hash column,
+so every process reading the same book shares its pages.
+"""
+from collections import namedtuple
+import argparse
+import json
+import random
+import struct
+import numpy as np
+from tablut.board import WinException, LoseException, DrawException
+from tablut.game import Player
+from tablut.util import encode_move, decode_move, load_class
+import tablut.record as record
+
+MAGIC = b"TBK1"
+HEADER = struct.Struct("<4s4xQ")
+# name, dtype of the columns in file order
+COLUMNS = [("hash", "<u8"), ("games", "<u4"), ("wins", "<u4"), ("draws", "<u4"), ("move", "<u2")]
+
+
+class BookEntry(namedtuple("BookEntry", ["move", "games", "wins", "draws"])):
+    """
+    A book move, with the number of games it was played in and their results
+    """
+    __slots__ = ()
+
+    @property
+    def score(self):
+        """
+        Average result of the move for the player making it, a draw is half a win
+        """
+        return (self.wins + 0.5 * self.draws) / self.games
+
+
+def read_games(path):
+    """
+    Yield the (moves, result) of the games in a record or self-play JSON lines file
+    """
+    if path.endswith(record.SUFFIX):
+        with record.RecordReader(path) as reader:
+            for game in reader:
+                yield game.moves, game.result
+    else:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    game = json.loads(line)
+                    yield [((m[0], m[1]), (m[2], m[3])) for m in game["moves"]], game["result"]
+
+
+def build_book(games, path, plies=20, min_games=1, board_class="tablut.rules.ashton:Board"):
+    """
+    Write the book of the first plies moves of games, an iterable of (moves, result)
+    with result "W", "B", "draw" or "unfinished" (counted as played, not as a draw).
+    Moves seen less than min_games times are left out. Returns the number of entries
+    """
+    board_class = load_class(board_class)
+    size = board_class.TABLES.size
+    counts = dict()
+    for moves, result in games:
+        board = board_class()
+        player = Player.WHITE
+        for move in moves[:plies]:
+            key = (board.hash, encode_move(move, size))
+            games_wins_draws = counts.setdefault(key, [0, 0, 0])
+            games_wins_draws[0] += 1
+            games_wins_draws[1] += result == player.value
+            games_wins_draws[2] += result == "draw"
+            try:
+                board.step(player, *move, check_legal=False)
+            except (WinException, LoseException, DrawException):
+                break
+            player = player.next()
+
+    keys = sorted(key for key, c in counts.items() if c[0] >= min_games)
+    columns = {
+        "hash": [h for h, _ in keys],
+        "move": [m for _, m in keys],
+        "games": [counts[key][0] for key in keys],
+        "wins": [counts[key][1] for key in keys],
+        "draws": [counts[key][2] for key in keys],
+    }
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        for name, dtype in COLUMNS:
+            f.write(np.array(columns[name], dtype=dtype).tobytes())
+    return len(keys)
+
+
+class OpeningBook(object):
+    """
+    Read only, memory mapped opening book. Pickling only sends the path, so a book
+    handed to worker processes is mapped again (and shared) by each of them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("Not an opening book: %s" % path)
+        self.columns = dict()
+        offset = HEADER.size
+        for name, dtype in COLUMNS:
+            if count:
+                self.columns[name] = np.memmap(path, dtype=dtype, mode="r",
+                                               offset=offset, shape=(count,))
+            else:
+                self.columns[name] = np.zeros(0, dtype=dtype)
+            offset += count * np.dtype(dtype).itemsize
+
+    def __len__(self):
+        return len(self.columns["hash"])
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def lookup(self, key, size=9):
+        """
+        BookEntry list of the moves played from the position with hash key,
+        on a size x size board
+        """
+        hashes = self.columns["hash"]
+        key = np.uint64(key)
+        lo = int(np.searchsorted(hashes, key, "left"))
+        hi = int(np.searchsorted(hashes, key, "right"))
+        return [BookEntry(decode_move(int(self.columns["move"][i]), size),
+                          int(self.columns["games"][i]),
+                          int(self.columns["wins"][i]), int(self.columns["draws"][i]))
+                for i in range(lo, hi)]
+
+    def move(self, board, player, min_games=1, weighted=False, rnd=random):
+        """
+        Book move for player on board: the best scoring move played at least
+        min_games times, or with weighted a random one picked proportionally to how
+        often it was played. None when the position is not in the book
+        """
+        entries = [entry for entry in self.lookup(board.hash, board.TABLES.size)
+                   if entry.games >= min_games and board.is_legal(player, *entry.move)[0]]
+        if not entries:
+            return None
+        if weighted:
+            return rnd.choices(entries, weights=[e.games for e in entries])[0].move
+        return max(entries, key=lambda e: (e.score, e.games)).move
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an opening book from recorded games")
+    parser.add_argument("games", nargs="+",
+                        help="game record (%s) or self-play JSON lines files" % record.SUFFIX)
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--plies", type=int, default=20, help="book depth in plies")
+    parser.add_argument("--min-games", type=int, default=1)
+    parser.add_argument("--board", default="tablut.rules.ashton:Board")
+    args = parser.parse_args(argv)
+
+    games = (game for path in args.games for game in read_games(path))
+    count = build_book(games, args.output, args.plies, args.min_games, args.board)
+    print("%d book entries written to %s" % (count, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Feature planes of positions for training evaluation models.
+
+A position is encoded as NUM_PLANES 9x9 planes, in PLANES order: white soldiers,
+black soldiers, king, camps, castle, escape tiles and side to move (all ones when
+black is to move). The planes are written straight into a caller provided
+(N, NUM_PLANES, 9, 9) buffer of any numeric dtype, so a training loop can keep
+refilling the same batch array.
+"""
+import numpy as np
+import tablut.rules.ashton as ashton
+from tablut.game import Player
+import tablut.record as record
+from tablut.util import load_class
+
+PLANES = ["white", "black", "king", "camp", "castle", "escape", "black_to_move"]
+NUM_PLANES = len(PLANES)
+
+CAMP_PLANE = ashton.TILES == ashton.CAMP
+CASTLE_PLANE = ashton.TILES == ashton.CASTLE
+ESCAPE_PLANE = np.zeros((9, 9), dtype=bool)
+ESCAPE_PLANE[tuple(np.array(ashton.ESCAPE_TILES).T)] = True
+
+# result of a record from white point of view
+RESULT_VALUES = {"W": 1.0, "B": -1.0, "draw": 0.0, "unfinished": 0.0}
+
+
+def empty(count, dtype=np.float32):
+    """
+    Buffer for the planes of count positions
+    """
+    return np.empty((count, NUM_PLANES, 9, 9), dtype=dtype)
+
+
+def planes(pieces, black_to_move, out=None):
+    """
+    Write the planes of a (N, 9, 9) stack of piece layers (see ashton.Board.pieces)
+    into out, a (N, NUM_PLANES, 9, 9) buffer allocated when None.
+    black_to_move is a bool or a (N,) bool array. Returns out
+    """
+    pieces = np.asarray(pieces)
+    if out is None:
+        out = empty(len(pieces))
+    np.equal(pieces, 2, out=out[:, 0])
+    np.equal(pieces, -2, out=out[:, 1])
+    np.equal(pieces, 1, out=out[:, 2])
+    out[:, 3] = CAMP_PLANE
+    out[:, 4] = CASTLE_PLANE
+    out[:, 5] = ESCAPE_PLANE
+    out[:, 6] = np.asarray(black_to_move).reshape(-1, 1, 1)
+    return out
+
+
+def board_planes(boards, out=None):
+    """
+    Planes of a sequence of boards (ashton or bitboard ones), with their own side to move
+    """
+    pieces = np.empty((len(boards), 9, 9), dtype=np.int8)
+    for k, board in enumerate(boards):
+        pieces[k] = board.pieces
+    return planes(pieces, [board.turn is Player.BLACK for board in boards], out)
+
+
+def record_planes(game, out=None, board_class=None):
+    """
+    Planes of the len(game) + 1 positions of a record (see tablut.record), from the
+    starting one to the one after the last move. Returns the filled part of out
+    """
+    if out is None:
+        out = empty(len(game) + 1)
+    pieces = np.empty((len(out), 9, 9), dtype=np.int8)
+    black_to_move = np.empty(len(out), dtype=bool)
+    count = 0
+    for board in _positions(game, board_class):
+        pieces[count] = board.pieces
+        black_to_move[count] = board.turn is Player.BLACK
+        count += 1
+    return planes(pieces[:count], black_to_move[:count], out=out[:count])
+
+
+def _positions(game, board_class):
+    """
+    Opening position of the record variant, then the board after every move
+    """
+    board = load_class(board_class or record.VARIANT_BOARDS[game.variant])()
+    if board.TABLES.size != 9:
+        raise ValueError("Feature planes are 9x9, not for %s records" % game.variant)
+    yield board
+    yield from record.replay(game, board_class)
+
+
+def iter_batches(paths, batch_size, out=None, values=None, board_class=None):
+    """
+    Stream the positions of record files as (planes, values) batches of up to
+    batch_size positions, values being the game result from white point of view.
+    The batches are views of the out and values buffers (allocated when None),
+    overwritten by the next batch.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    if out is None:
+        out = empty(batch_size)
+    if values is None:
+        values = np.empty(batch_size, dtype=out.dtype)
+    # the piece layers of a batch are gathered here and expanded in one go
+    pieces = np.empty((batch_size, 9, 9), dtype=np.int8)
+    black_to_move = np.empty(batch_size, dtype=bool)
+    count = 0
+    for path in paths:
+        with record.RecordReader(path) as reader:
+            for game in reader:
+                value = RESULT_VALUES[game.result]
+                for board in _positions(game, board_class):
+                    pieces[count] = board.pieces
+                    black_to_move[count] = board.turn is Player.BLACK
+                    values[count] = value
+                    count += 1
+                    if count == batch_size:
+                        yield planes(pieces, black_to_move, out=out), values
+                        count = 0
+    if count:
+        yield planes(pieces[:count], black_to_move[:count], out=out[:count]), values[:count]
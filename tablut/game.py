@@ -1,5 +1,5 @@
 from enum import Enum
-from copy import deepcopy
+from contextlib import contextmanager
 from tablut.board import WinException, DrawException, LoseException
 
 
@@ -23,9 +23,13 @@ class Game(object):
     Create a tablut board and lets the user play
     """
 
-    def __init__(self, board):
+    def __init__(self, board, book=None):
         self.board = board
         self.turn = Player.WHITE
+        # (start, end) of every move played so far
+        self.moves = list()
+        # opening book consulted by book_move (see tablut.book.OpeningBook)
+        self.book = book
 
     @property
     def ended(self):
@@ -40,14 +44,41 @@ class Game(object):
         else:
             return None
 
+    def copy(self):
+        """
+        Independent game in the same state, its board shares the history recorded so far
+        """
+        game = Game(self.board.copy(), self.book)
+        game.turn = self.turn
+        game.moves = list(self.moves)
+        return game
+
+    def book_move(self):
+        """
+        Book move for the player to move, None without a book or out of it
+        """
+        if self.book is None or self.ended:
+            return None
+        return self.book.move(self.board, self.turn)
+
+    def _step(self, player, start, end, check_legal):
+        """
+        Perform the move on the board and log it in moves, also when it ends the game
+        """
+        try:
+            self.board.step(player, start, end, check_legal=check_legal)
+        except (WinException, LoseException, DrawException):
+            self.moves.append((start, end))
+            raise
+        self.moves.append((start, end))
+
     def white_move(self, start, end, known_legal=False):
         """
         Make the white move
         """
         if self.turn == Player.WHITE and not self.ended:
             try:
-                self.board.step(Player.WHITE, start, end,
-                                check_legal=known_legal)
+                self._step(Player.WHITE, start, end, known_legal)
                 self.turn = Player.BLACK
             except WinException:
                 # white won
@@ -69,8 +100,7 @@ class Game(object):
         """
         if self.turn == Player.BLACK:
             try:
-                self.board.step(Player.BLACK, start, end,
-                                check_legal=known_legal)
+                self._step(Player.BLACK, start, end, known_legal)
                 self.turn = Player.WHITE
             except WinException:
                 # white won (shouldn't happen here...)
@@ -86,18 +116,28 @@ class Game(object):
         else:
             raise TurnException("Its white player turn")
 
+    @contextmanager
     def what_if(self, start, end, player=None):
         """
-        Return the game instance if a particular move is made but doesnt modify the actual instance. 
+        Context manager playing a move only for the duration of the with block:
+        inside the block the game is in the state following the move, on exit the move
+        is taken back. Nothing is copied.
         The right player is automatically used if not provided
+
+            with game.what_if(start, end) as g:
+                ...
         """
         if player is None:
             player = self.turn
 
-        cpy = deepcopy(self)
-        if cpy.turn is Player.WHITE:
-            cpy.white_move(start, end)
-        else:
-            cpy.black_move(start, end)
-
-        return cpy
+        turn = self.turn
+        undo = self.board.make_move(player, start, end)
+        self.moves.append((start, end))
+        if not self.ended:
+            self.turn = player.next()
+        try:
+            yield self
+        finally:
+            self.board.unmake_move(undo)
+            self.moves.pop()
+            self.turn = turn
@@ -0,0 +1,109 @@
+"""
+Persistent board history.
+
+A History is the latest entry of a linked list of positions: every entry points to
+the previous one and is never modified, so recording a ply only allocates one entry
+and copies of a board (and the boards of taken back moves) share the entries they
+have in common. Taking moves back is just going back to an older entry.
+
+Each entry stores a compact snapshot of the position (side to move included) and
+its hash. Captures can't be undone, so a position can only repeat among the entries
+recorded since the last capture: each entry also keeps where that run started and
+a small bit filter of the hashes in it, which rules out most repetitions without
+walking the list; candidates are confirmed comparing snapshots, so repetition
+detection is exact.
+"""
+
+FILTER_BITS = 256
+
+
+class History(object):
+    """
+    Entry of the history of a board, see the module doc
+    """
+    __slots__ = ("parent", "snapshot", "hash", "count", "length", "run_start", "filter")
+
+    def __init__(self, snapshot, hash, count, parent=None):
+        """
+        Entry for the position with the given snapshot, hash and number of pieces
+        on the board, following parent (None for the first position)
+        """
+        self.parent = parent
+        self.snapshot = snapshot
+        self.hash = hash
+        self.count = count
+        bit = 1 << (hash % FILTER_BITS)
+        if parent is None:
+            self.length = 1
+        else:
+            self.length = parent.length + 1
+        if parent is None or parent.count != count:
+            # first position after a capture: nothing before can repeat
+            self.run_start = self.length
+            self.filter = bit
+        else:
+            self.run_start = parent.run_start
+            self.filter = parent.filter | bit
+
+    def push(self, snapshot, hash, count):
+        """
+        New entry for the next position
+        """
+        return History(snapshot, hash, count, self)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        """
+        Entries from the first position to this one
+        """
+        entries = list()
+        entry = self
+        while entry is not None:
+            entries.append(entry)
+            entry = entry.parent
+        return reversed(entries)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # entries are never modified, copies can share them
+        return self
+
+    def __reduce__(self):
+        # flat, so that long histories don't hit the recursion limit
+        return _rebuild, ([(e.snapshot, e.hash, e.count) for e in self],)
+
+    def snapshots(self):
+        return [entry.snapshot for entry in self]
+
+    def hashes(self):
+        return [entry.hash for entry in self]
+
+    def may_contain(self, hash, count):
+        """
+        False when the position is surely not this entry nor one before it
+        """
+        return count == self.count and self.filter >> (hash % FILTER_BITS) & 1
+
+    def contains(self, snapshot, hash, count):
+        """
+        Whether the position is this entry or one of the entries before it
+        """
+        if not self.may_contain(hash, count):
+            return False
+        entry = self
+        while entry is not None and entry.length >= self.run_start:
+            if entry.hash == hash and entry.snapshot == snapshot:
+                return True
+            entry = entry.parent
+        return False
+
+
+def _rebuild(entries):
+    history = None
+    for snapshot, hash, count in entries:
+        history = History(snapshot, hash, count, history)
+    return history
@@ -0,0 +1,191 @@
+"""
+Opt-in instrumentation of the board and game hot paths.
+
+    import tablut.instrument as instrument
+    instrument.enable(snapshot="stats.json", interval=10)
+    ...
+    print(instrument.stats())
+    instrument.disable()
+
+enable() replaces the target methods with timing wrappers and disable() puts the
+originals back, so nothing is paid while instrumentation is off.
+For every method it counts calls and exceptions raised (e.g. WinException) and keeps a
+latency histogram with power of two nanoseconds buckets; is_legal rejections are
+counted by reason.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.game import Game
+
+DEFAULT_TARGETS = [
+    (ashton.Board, "is_legal"),
+    (ashton.Board, "step"),
+    (ashton.Board, "apply_captures"),
+    (ashton.Board, "draw_condition"),
+    (ashton_bitboard.Board, "is_legal"),
+    (ashton_bitboard.Board, "apply_captures"),
+    (Game, "white_move"),
+    (Game, "black_move"),
+]
+
+BUCKETS = 64
+
+# (class, name) -> the class own attribute replaced, None if it was inherited
+_originals = dict()
+_methods = dict()
+_rejections = dict()
+_started = None
+_snapshot_thread = None
+_stop = threading.Event()
+
+
+class MethodStats(object):
+    """
+    Counters of an instrumented method
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.nanoseconds = 0
+        self.histogram = [0] * BUCKETS
+        self.exceptions = dict()
+
+    def percentile(self, q):
+        """
+        Upper bound in microseconds of the histogram bucket holding the q quantile
+        """
+        target = q * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return (1 << bucket) / 1000.0
+        return 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "seconds": self.nanoseconds / 1e9,
+            "mean_us": self.nanoseconds / self.calls / 1000.0 if self.calls else 0.0,
+            "p50_us": self.percentile(0.5),
+            "p99_us": self.percentile(0.99),
+            # bucket upper bound in nanoseconds -> calls
+            "histogram": dict((str(1 << bucket), count)
+                              for bucket, count in enumerate(self.histogram) if count),
+            "exceptions": dict(self.exceptions),
+        }
+
+
+def _name(cls, name):
+    return "%s.%s.%s" % (cls.__module__, cls.__qualname__, name)
+
+
+def _wrap(method, stats, count_rejections):
+    clock = time.perf_counter_ns
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            result = method(*args, **kwargs)
+        except Exception as e:
+            kind = type(e).__name__
+            stats.exceptions[kind] = stats.exceptions.get(kind, 0) + 1
+            raise
+        finally:
+            elapsed = clock() - start
+            stats.calls += 1
+            stats.nanoseconds += elapsed
+            stats.histogram[min(elapsed.bit_length(), BUCKETS - 1)] += 1
+        if count_rejections and not result[0]:
+            # drop the details after ":" (e.g. the obstacle sum) to keep reasons few
+            reason = result[1].split(":")[0]
+            _rejections[reason] = _rejections.get(reason, 0) + 1
+        return result
+    return wrapper
+
+
+def enable(targets=None, snapshot=None, interval=60.0):
+    """
+    Instrument the (class, method name) targets (DEFAULT_TARGETS if None).
+    With snapshot, stats() is also written as JSON to that path every interval seconds.
+    """
+    global _started, _snapshot_thread
+    for cls, name in targets or DEFAULT_TARGETS:
+        if (cls, name) in _originals:
+            continue
+        method = getattr(cls, name)
+        stats = _methods.setdefault(_name(cls, name), MethodStats())
+        _originals[(cls, name)] = cls.__dict__.get(name)
+        setattr(cls, name, _wrap(method, stats, name == "is_legal"))
+    if _started is None:
+        _started = time.time()
+
+    if snapshot is not None and _snapshot_thread is None:
+        _stop.clear()
+
+        def run():
+            while not _stop.wait(interval):
+                write_snapshot(snapshot)
+            write_snapshot(snapshot)
+        _snapshot_thread = threading.Thread(target=run, name="tablut-instrument", daemon=True)
+        _snapshot_thread.start()
+
+
+def disable():
+    """
+    Restore the original methods and stop the snapshots, collected stats are kept
+    """
+    global _snapshot_thread
+    for (cls, name), original in _originals.items():
+        if original is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+    _originals.clear()
+    if _snapshot_thread is not None:
+        _stop.set()
+        _snapshot_thread.join()
+        _snapshot_thread = None
+
+
+def enabled():
+    return bool(_originals)
+
+
+def reset():
+    """
+    Clear the collected stats
+    """
+    global _started
+    for stats in _methods.values():
+        stats.__init__()
+    _rejections.clear()
+    _started = time.time() if enabled() else None
+
+
+def stats():
+    """
+    Collected stats: per method counters and latencies, is_legal rejection reasons
+    """
+    return {
+        "since": _started,
+        "time": time.time(),
+        "methods": dict((name, s.as_dict()) for name, s in _methods.items() if s.calls),
+        "rejections": dict(_rejections),
+    }
+
+
+def write_snapshot(path):
+    """
+    Write stats() as JSON to path, atomically replacing the previous snapshot
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(stats(), f, indent=2, sort_keys=True)
+    os.replace(temporary, path)
@@ -0,0 +1,188 @@
+from collections import namedtuple
+from math import log, sqrt
+import pickle
+import random
+import time
+from tablut.game import Player
+
+MCTSStats = namedtuple("MCTSStats", [
+    "move", "visits", "simulations", "nodes", "seconds", "simulations_per_second"])
+
+
+def random_policy(board, player, moves):
+    """
+    Default rollout policy: a uniformly random legal move
+    """
+    return random.choice(moves)
+
+
+def terminal_result(board):
+    """
+    Result for white of an ended game (1 win, 0 loss, 0.5 draw), None if not ended
+    """
+    if board.winning_condition():
+        return 1.0
+    elif board.lose_condition():
+        return 0.0
+    elif board.draw_condition():
+        return 0.5
+    return None
+
+
+def rollout(board, player, policy=random_policy, max_plies=200):
+    """
+    Play policy moves from board until the game ends or max_plies moves are played,
+    then take them all back. Returns the result for white, 0.5 if unfinished
+    """
+    undos = list()
+    result = terminal_result(board)
+    try:
+        while result is None and len(undos) < max_plies:
+            moves = board.legal_moves(player)
+            if not moves:
+                # a player unable to move loses
+                result = 0.0 if player is Player.WHITE else 1.0
+                break
+            start, end = policy(board, player, moves)
+            undos.append(board.make_move(player, start, end, check_legal=False))
+            player = player.next()
+            result = terminal_result(board)
+    finally:
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+    return 0.5 if result is None else result
+
+
+class Node(object):
+    """
+    Search tree node: the position reached playing move from parent.
+    value sums the results for the player who played move
+    """
+    __slots__ = ("move", "parent", "player", "hash", "children", "untried", "result",
+                 "visits", "value")
+
+    def __init__(self, move, parent, player, board):
+        self.move = move
+        self.parent = parent
+        # player to move in this position
+        self.player = player
+        self.hash = board.hash
+        self.children = list()
+        self.result = terminal_result(board) if parent is not None else None
+        self.untried = board.legal_moves(player) if self.result is None else list()
+        random.shuffle(self.untried)
+        self.visits = 0
+        self.value = 0.0
+
+    def size(self):
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
+
+class MCTS(object):
+    """
+    UCT search with rollouts played by policy.
+    The tree stops growing at max_nodes nodes, simulations go on from its leaves.
+    With a rollout_pool (multiprocessing.Pool) each leaf is evaluated by leaf_batch
+    rollouts played in parallel by the pool workers.
+    """
+
+    def __init__(self, c=1.4, max_nodes=100000, policy=random_policy, max_rollout=200,
+                 rollout_pool=None, leaf_batch=1):
+        self.c = c
+        self.max_nodes = max_nodes
+        self.policy = policy
+        self.max_rollout = max_rollout
+        self.rollout_pool = rollout_pool
+        self.leaf_batch = leaf_batch
+
+    def search(self, board, player, time_budget, root=None):
+        """
+        Grow root (a new tree if None) for time_budget seconds.
+        Returns the root and the number of simulations played
+        """
+        if root is None or root.hash != board.hash:
+            root = Node(None, None, player, board)
+        self.nodes = root.size()
+        deadline = time.perf_counter() + time_budget
+        simulations = 0
+        while time.perf_counter() < deadline:
+            simulations += self._iteration(board, root)
+        return root, simulations
+
+    def _select(self, node):
+        log_visits = log(node.visits)
+        c = self.c
+        return max(node.children, key=lambda child: child.value / child.visits +
+                   c * sqrt(log_visits / child.visits))
+
+    def _iteration(self, board, root):
+        node = root
+        undos = list()
+        try:
+            # selection
+            while not node.untried and node.children:
+                node = self._select(node)
+                undos.append(board.make_move(node.parent.player, node.move[0], node.move[1],
+                                             check_legal=False))
+            # expansion
+            if node.untried and self.nodes < self.max_nodes:
+                move = node.untried.pop()
+                undos.append(board.make_move(node.player, move[0], move[1], check_legal=False))
+                child = Node(move, node, node.player.next(), board)
+                node.children.append(child)
+                node = child
+                self.nodes += 1
+            # simulation
+            if node.result is not None:
+                results = [node.result]
+            elif self.rollout_pool is not None:
+                # the board (and its history) is serialized once for the whole batch
+                task = (pickle.dumps(board, pickle.HIGHEST_PROTOCOL), node.player, self.policy,
+                        self.max_rollout)
+                results = self.rollout_pool.map(rollout_task, [task] * self.leaf_batch)
+            else:
+                results = [rollout(board, node.player, self.policy, self.max_rollout)]
+        finally:
+            for undo in reversed(undos):
+                board.unmake_move(undo)
+
+        # backpropagation
+        total = sum(results)
+        while node is not None:
+            node.visits += len(results)
+            if node.parent is not None:
+                node.value += total if node.parent.player is Player.WHITE else len(results) - total
+            node = node.parent
+        return len(results)
+
+
+def root_stats(root):
+    """
+    {move: [visits, value]} of the root children
+    """
+    return dict((child.move, [child.visits, child.value]) for child in root.children)
+
+
+def rollout_task(task):
+    """
+    Pool worker for leaf parallel search: a rollout from a pickled board
+    """
+    board, player, policy, max_rollout = task
+    return rollout(pickle.loads(board), player, policy, max_rollout)
+
+
+def root_search_task(task):
+    """
+    Pool worker for root parallel search: grow an independent tree and
+    return its root statistics
+    """
+    board, player, time_budget, seed, options = task
+    random.seed(seed)
+    root, simulations = MCTS(**options).search(board, player, time_budget)
+    return root_stats(root), simulations
@@ -0,0 +1,144 @@
+"""
+Perft: count the positions reachable from a position in exactly depth moves.
+
+    tablut-perft 4 --divide -j 8
+
+A checksum of move generation and captures (the counts must not change when the
+rules code is optimized) and a standard speed benchmark (nodes per second).
+As in chess perft, positions where the game is won or lost are leaves only at the
+last ply, nothing is counted below them. Draws by repetition are ignored: they
+depend on the path, not on the position, so they would make counts depend on the
+move order and break the cache. Counts of repeated positions are cached by
+(hash, player, depth); root moves can be split over a process pool.
+"""
+from collections import namedtuple
+import argparse
+import multiprocessing
+import sys
+import time
+from tablut.game import Player
+import tablut.rules.ashton_server as ashton_server
+from tablut.util import load_class
+
+PerftResult = namedtuple("PerftResult", ["depth", "nodes", "seconds", "nodes_per_second", "divide"])
+
+
+def perft(board, player, depth, cache=None):
+    """
+    Number of positions reached playing depth moves from board, player moving first.
+    cache is a dict storing the counts of the positions met, None to disable it
+    """
+    if depth == 0:
+        return 1
+    if cache is not None:
+        key = (board.hash, player, depth)
+        nodes = cache.get(key)
+        if nodes is not None:
+            return nodes
+
+    moves = board.legal_moves(player)
+    if depth == 1:
+        # every move reaches a leaf, no need to play it
+        nodes = len(moves)
+    else:
+        nodes = 0
+        opponent = player.next()
+        for start, end in moves:
+            undo = board.make_move(player, start, end, check_legal=False)
+            if not (board.winning_condition() or board.lose_condition()):
+                nodes += perft(board, opponent, depth - 1, cache)
+            board.unmake_move(undo)
+
+    if cache is not None:
+        cache[key] = nodes
+    return nodes
+
+
+# cache of a divide worker process, shared by all the root moves it counts
+_worker_cache = None
+
+
+def _divide_worker_init(cache):
+    global _worker_cache
+    _worker_cache = dict() if cache else None
+
+
+def _divide_task(task):
+    """
+    Pool worker: perft below one root move
+    """
+    board, player, move, depth = task
+    board.make_move(player, *move, check_legal=False)
+    if depth > 1 and (board.winning_condition() or board.lose_condition()):
+        return move, 0
+    return move, perft(board, player.next(), depth - 1, _worker_cache)
+
+
+def run_perft(board, player, depth, processes=1, cache=True):
+    """
+    Perft with the count of every root move (divide). With processes > 1 the root
+    moves are spread over a process pool, each worker keeping its own cache.
+    Returns a PerftResult
+    """
+    start = time.perf_counter()
+    if depth == 0:
+        divide = dict()
+        nodes = 1
+    else:
+        tasks = [(board, player, move, depth) for move in board.legal_moves(player)]
+        if processes > 1:
+            with multiprocessing.Pool(processes, _divide_worker_init, (cache,)) as pool:
+                divide = dict(pool.imap_unordered(_divide_task, tasks))
+        else:
+            shared = dict() if cache else None
+            divide = dict()
+            for _, _, move, _ in tasks:
+                undo = board.make_move(player, *move, check_legal=False)
+                if depth > 1 and (board.winning_condition() or board.lose_condition()):
+                    divide[move] = 0
+                else:
+                    divide[move] = perft(board, player.next(), depth - 1, shared)
+                board.unmake_move(undo)
+        nodes = sum(divide.values())
+    seconds = time.perf_counter() - start
+    return PerftResult(depth, nodes, seconds, nodes / seconds if seconds else 0.0, divide)
+
+
+def _square_name(position):
+    return "%s%d" % ("abcdefghijk"[position[1]], position[0] + 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count the positions reachable in depth moves")
+    parser.add_argument("depth", type=int)
+    parser.add_argument("--state", default=None,
+                        help="file with a server state (JSON or text) to start from, "
+                        "the opening position if not given")
+    parser.add_argument("--board", default="tablut.rules.ashton:Board")
+    parser.add_argument("-j", "--processes", type=int, default=1)
+    parser.add_argument("--divide", action="store_true", help="print the count of every root move")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    board_class = load_class(args.board)
+    if args.state is None:
+        board, player = board_class(), Player.WHITE
+    else:
+        with open(args.state) as f:
+            state = f.read()
+        board = ashton_server.parse_board(state, board_class)
+        player = ashton_server.parse_turn(state)
+        if player is None:
+            sys.exit("The game in %s is over" % args.state)
+
+    for depth in range(1, args.depth + 1):
+        result = run_perft(board, player, depth, args.processes, not args.no_cache)
+        print("perft(%d) = %d in %.2fs, %.0f nodes/s" % (
+            depth, result.nodes, result.seconds, result.nodes_per_second))
+    if args.divide:
+        for move, nodes in sorted(result.divide.items()):
+            print("%s%s %d" % (_square_name(move[0]), _square_name(move[1]), nodes))
+
+
+if __name__ == "__main__":
+    main()
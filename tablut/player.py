@@ -1,37 +1,190 @@
 from tablut.game import Player
 from tablut.board import WinException, LoseException, DrawException
-import threading
-from time import sleep
-from random import randint
+from tablut.search import AlphaBeta, LazySMP, TranspositionTable, evaluate
+from tablut.mcts import MCTS, MCTSStats, random_policy, root_stats, root_search_task
+from random import choice, getrandbits
+import multiprocessing
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def play_move(game, player, move):
+    """
+    Play the (start, end) move for player on game
+    """
+    start, end = move
+    try:
+        if player is Player.WHITE:
+            game.white_move(start, end)
+        elif player is Player.BLACK:
+            game.black_move(start, end)
+    except (ValueError, WinException, LoseException, DrawException):
+        # illegal move... shouldnt happen
+        pass
 
 
 class RandomPlayer(object):
     """
-    Really naive implementation of a random playey
+    Really naive implementation of a random playey.
+    rnd is the random.Random picking the moves, the random module if not given
     """
 
-    def __init__(self, game, player):
+    def __init__(self, game, player, rnd=None):
         self.game = game
         self.player = player
+        self.choice = choice if rnd is None else rnd.choice
+
+    def play(self):
+        # Pick a random move among the legal ones
+        moves = self.game.board.legal_moves(self.player)
+        if not moves:
+            # stuck player: nothing to play
+            return
+        play_move(self.game, self.player, self.choice(moves))
 
-    def _random_move(self):
-        start = (randint(0, 8), randint(0, 8))
-        end = (randint(0, 8), randint(0, 8))
-        return start, end
+
+class SearchPlayer(object):
+    """
+    Iterative deepening alpha-beta player with a fixed size transposition table.
+    Each move is searched for time_budget seconds; the search statistics of the
+    last move are kept in last_stats and logged.
+    With processes > 1 the search is a LazySMP one over that many processes sharing
+    the table; call close() to stop them.
+    """
+
+    def __init__(self, game, player, time_budget=1.0, tt_megabytes=16, max_depth=64,
+                 evaluate=evaluate, processes=1):
+        self.game = game
+        self.player = player
+        self.time_budget = time_budget
+        if processes > 1:
+            self.search = LazySMP(processes, tt_megabytes, evaluate, max_depth)
+        else:
+            self.search = AlphaBeta(TranspositionTable(tt_megabytes), evaluate, max_depth)
+        self.last_stats = None
 
     def play(self):
-        # Find a random move
-        start, end = self._random_move()
-        legal, _ = self.game.board.is_legal(self.player, start, end)
-        while not legal:
-            start, end = self._random_move()
-            legal, _ = self.game.board.is_legal(self.player, start, end)
-
-        try:
-            if self.player is Player.WHITE:
-                self.game.white_move(start, end)
-            elif self.player is Player.BLACK:
-                self.game.black_move(start, end)
-        except (ValueError, WinException, LoseException, DrawException):
-            # illegal move... shouldnt happen
-            pass
+        if self.game.ended:
+            return
+        move = self.game.book_move()
+        if move is not None:
+            self.last_stats = None
+            play_move(self.game, self.player, move)
+            return
+        stats = self.search.search(self.game.board, self.player, self.time_budget)
+        self.last_stats = stats
+        logger.info("%s: move %s score %d depth %d, %d nodes in %.2fs (%.0f nodes/s), "
+                    "TT hit rate %.1f%%", self.player.name, stats.move, stats.score,
+                    stats.depth, stats.nodes, stats.seconds, stats.nodes_per_second,
+                    100 * stats.tt_hit_rate)
+        if stats.move is None:
+            # stuck player: nothing to play
+            return
+        play_move(self.game, self.player, stats.move)
+
+    def close(self):
+        if isinstance(self.search, LazySMP):
+            self.search.close()
+
+
+class MCTSPlayer(object):
+    """
+    Monte Carlo tree search (UCT) player with rollouts played by policy.
+    With processes > 1 the search runs over a process pool:
+    - "root": every worker grows its own tree for the same time_budget and the root
+      visit counts of all trees are summed up before picking the move
+    - "leaf": each new leaf is evaluated by processes rollouts played in parallel
+    The tree grows up to max_nodes nodes and is reused for the next move when the
+    position reached is in it. Call close() to stop the worker pool.
+    """
+
+    def __init__(self, game, player, time_budget=1.0, processes=1, parallel="root",
+                 max_nodes=100000, policy=random_policy, c=1.4, max_rollout=200):
+        if parallel not in ("root", "leaf"):
+            raise ValueError("parallel must be 'root' or 'leaf'")
+        self.game = game
+        self.player = player
+        self.time_budget = time_budget
+        self.processes = processes
+        self.parallel = parallel
+        self.options = dict(c=c, max_nodes=max_nodes, policy=policy, max_rollout=max_rollout)
+        self.mcts = MCTS(**self.options)
+        self.pool = None
+        self.root = None
+        # number of game moves played when root was the current position
+        self.root_ply = 0
+        self.last_stats = None
+
+    def _reused_root(self):
+        """
+        Walk the previous tree down the moves played since its search
+        """
+        node = self.root
+        if node is None or self.root_ply > len(self.game.moves):
+            return None
+        for move in self.game.moves[self.root_ply:]:
+            node = next((child for child in node.children if child.move == move), None)
+            if node is None:
+                return None
+        if node.hash != self.game.board.hash or node.player is not self.player:
+            return None
+        node.parent = None
+        node.move = None
+        return node
+
+    def play(self):
+        if self.game.ended:
+            return
+        move = self.game.book_move()
+        if move is not None:
+            self.last_stats = None
+            play_move(self.game, self.player, move)
+            return
+        board = self.game.board
+        start_time = time.perf_counter()
+        if self.processes > 1 and self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes)
+
+        root = self._reused_root()
+        if self.pool is not None and self.parallel == "root":
+            tasks = [(board, self.player, self.time_budget, getrandbits(64), self.options)
+                     for _ in range(self.processes - 1)]
+            pending = self.pool.map_async(root_search_task, tasks)
+            root, simulations = self.mcts.search(board, self.player, self.time_budget, root)
+            stats = root_stats(root)
+            for worker_stats, worker_simulations in pending.get():
+                simulations += worker_simulations
+                for move, (visits, value) in worker_stats.items():
+                    total = stats.setdefault(move, [0, 0.0])
+                    total[0] += visits
+                    total[1] += value
+        else:
+            self.mcts.rollout_pool = self.pool
+            self.mcts.leaf_batch = self.processes
+            root, simulations = self.mcts.search(board, self.player, self.time_budget, root)
+            stats = root_stats(root)
+
+        seconds = time.perf_counter() - start_time
+        move, visits = None, 0
+        if stats:
+            move = max(stats, key=lambda m: stats[m][0])
+            visits = stats[move][0]
+        self.last_stats = MCTSStats(move, visits, simulations, self.mcts.nodes, seconds,
+                                    simulations / seconds if seconds else 0.0)
+        logger.info("%s: move %s visits %d, %d simulations in %.2fs (%.0f/s), %d nodes",
+                    self.player.name, move, visits, simulations, seconds,
+                    self.last_stats.simulations_per_second, self.mcts.nodes)
+        self.root = root
+        self.root_ply = len(self.game.moves)
+        if move is None:
+            # stuck player: nothing to play
+            return
+        play_move(self.game, self.player, move)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
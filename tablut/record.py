@@ -0,0 +1,210 @@
+"""
+Binary game records.
+
+A record file starts with MAGIC and holds records back to back, each one a 4 bytes
+header (variant code, result code, number of moves as little endian uint16)
+followed by the moves as little endian uint16 codes (see tablut.util.encode_move,
+with the board size of the variant).
+The optional "<path>.idx" file holds the little endian uint64 offset of every record,
+for random access to game k.
+"""
+from collections import namedtuple
+import mmap
+import os
+import struct
+import numpy as np
+from tablut.board import WinException, LoseException, DrawException
+from tablut.game import Player
+from tablut.util import encode_move, load_class
+
+MAGIC = b"TBR1"
+SUFFIX = ".tbr"
+INDEX_SUFFIX = ".idx"
+HEADER = struct.Struct("<BBH")
+
+# Variant and result of a record are stored as their position in these lists
+VARIANTS = ["ashton", "brandubh", "hnefatafl"]
+VARIANT_BOARDS = {
+    "ashton": "tablut.rules.ashton:Board",
+    "brandubh": "tablut.rules.brandubh:Board",
+    "hnefatafl": "tablut.rules.hnefatafl:Board",
+}
+VARIANT_SIZES = {"ashton": 9, "brandubh": 7, "hnefatafl": 11}
+RESULTS = ["unfinished", "W", "B", "draw"]
+
+
+class Record(namedtuple("Record", ["variant", "result", "codes"])):
+    """
+    A game read from a record file, codes is the uint16 array of encoded moves
+    """
+    __slots__ = ()
+
+    @property
+    def moves(self):
+        """
+        The list of ((si, sj), (ei, ej)) moves
+        """
+        size = VARIANT_SIZES[self.variant]
+        start, end = np.divmod(self.codes.astype(np.int64) - 1, size * size)
+        return list(zip(zip((start // size).tolist(), (start % size).tolist()),
+                        zip((end // size).tolist(), (end % size).tolist())))
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class RecordWriter(object):
+    """
+    Append games to a record file (created if missing) and to its index
+    """
+
+    def __init__(self, path, index=True):
+        self.path = path
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._index = open(path + INDEX_SUFFIX, "ab") if index else None
+
+    def write(self, moves, result="unfinished", variant="ashton"):
+        """
+        Append a game given its ((si, sj), (ei, ej)) moves, result ("W", "B", "draw"
+        or "unfinished") and rules variant (board.TABLES.name). Returns the record offset
+        """
+        if variant not in VARIANT_SIZES:
+            raise ValueError("No record format for the %s variant" % variant)
+        if len(moves) > 0xFFFF:
+            raise ValueError("Too many moves for a record: %d" % len(moves))
+        offset = self._file.tell()
+        size = VARIANT_SIZES[variant]
+        codes = np.array([encode_move(move, size) for move in moves], dtype="<u2")
+        self._file.write(HEADER.pack(VARIANTS.index(variant), RESULTS.index(result), len(moves)))
+        self._file.write(codes.tobytes())
+        if self._index is not None:
+            self._index.write(struct.pack("<Q", offset))
+        return offset
+
+    def flush(self):
+        self._file.flush()
+        if self._index is not None:
+            self._index.flush()
+
+    def close(self):
+        self._file.close()
+        if self._index is not None:
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordReader(object):
+    """
+    Read games from a memory mapped record file.
+    Iterating yields the records in file order; indexing (reader[k]) uses the
+    index file, which is built by scanning the records when missing and rebuilt
+    when it doesn't match the records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("Not a record file: %s" % path)
+        self._offsets = None
+
+    @property
+    def offsets(self):
+        """
+        Array of the record offsets, from the index file when present and
+        matching the records (rebuilt with build_index otherwise)
+        """
+        if self._offsets is None:
+            index = self.path + INDEX_SUFFIX
+            if os.path.exists(index) and os.path.getsize(index):
+                offsets = np.memmap(index, dtype="<u8", mode="r")
+                if not self._index_matches(offsets):
+                    del offsets
+                    build_index(self.path)
+                    offsets = np.memmap(index, dtype="<u8", mode="r")
+                self._offsets = offsets
+            else:
+                self._offsets = np.array(list(self._scan()), dtype=np.uint64)
+        return self._offsets
+
+    def _index_matches(self, offsets):
+        """
+        Whether offsets starts at the first record and ends at the last one, which
+        catches indexes left behind by writes with index=False
+        """
+        if os.path.getsize(self.path + INDEX_SUFFIX) % 8 or int(offsets[0]) != len(MAGIC):
+            return False
+        last = int(offsets[-1])
+        if last + HEADER.size > len(self._mmap):
+            return False
+        return last + HEADER.size + 2 * HEADER.unpack_from(self._mmap, last)[2] == len(self._mmap)
+
+    def _scan(self):
+        offset = len(MAGIC)
+        size = len(self._mmap)
+        while offset < size:
+            yield offset
+            offset += HEADER.size + 2 * HEADER.unpack_from(self._mmap, offset)[2]
+
+    def _read(self, offset):
+        variant, result, length = HEADER.unpack_from(self._mmap, offset)
+        codes = np.frombuffer(self._mmap, dtype="<u2", count=length,
+                              offset=offset + HEADER.size).copy()
+        return Record(VARIANTS[variant], RESULTS[result], codes)
+
+    def __iter__(self):
+        for offset in self._scan():
+            yield self._read(offset)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, k):
+        return self._read(int(self.offsets[k]))
+
+    def close(self):
+        self._offsets = None
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_index(path):
+    """
+    (Re)write the index file of a record file, returns the number of records
+    """
+    with RecordReader(path) as reader:
+        offsets = np.array(list(reader._scan()), dtype="<u8")
+    offsets.tofile(path + INDEX_SUFFIX)
+    return len(offsets)
+
+
+def replay(record, board_class=None):
+    """
+    Play the record moves with step on a new board of its variant,
+    yielding the board after every move
+    """
+    board = load_class(board_class or VARIANT_BOARDS[record.variant])()
+    player = Player.WHITE
+    for start, end in record.moves:
+        try:
+            board.step(player, start, end, check_legal=False)
+        except (WinException, LoseException, DrawException):
+            yield board
+            return
+        yield board
+        player = player.next()
@@ -0,0 +1,169 @@
+import tablut.rules.ashton as ashton
+from tablut.game import Player
+import numpy as np
+
+# Vectorized ashton rules working on stacks of positions: boards are (N, 9, 9) arrays
+# with the float tile-piece codes of ashton.Board.
+
+
+def _tile_mask(tiles):
+    mask = np.zeros((9, 9), dtype=bool)
+    for i, j in tiles:
+        mask[i, j] = True
+    return mask
+
+
+DIRECTIONS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+CAMP_MASK = _tile_mask(ashton.CAMP_TILES)
+CASTLE_MASK = _tile_mask([ashton.CASTLE_TILE])
+ESCAPE_MASK = _tile_mask(ashton.ESCAPE_TILES)
+CASTLE_ADJACENT = [(ashton.CASTLE_TILE[0] + di, ashton.CASTLE_TILE[1] + dj) for di, dj in DIRECTIONS]
+# king in or next to the castle is not captured by two soldiers
+CASTLE_ZONE_MASK = CASTLE_MASK | _tile_mask(CASTLE_ADJACENT)
+ZOBRIST = np.array([ashton.ZOBRIST_PIECES[piece] for piece in (2, -2, 1)], dtype=np.uint64)
+
+
+def _shift(array, di, dj, fill):
+    """
+    Return out with out[:, i, j] = array[:, i + di, j + dj], fill outside the board
+    """
+    out = np.full_like(array, fill)
+    rows, cols = array.shape[1:]
+    out[:, max(0, -di):rows - max(0, di), max(0, -dj):cols - max(0, dj)] = \
+        array[:, max(0, di):rows - max(0, -di), max(0, dj):cols - max(0, -dj)]
+    return out
+
+
+def _ray_indices(di, dj, distance):
+    """
+    Starts and ends of every on-board move of distance squares in direction (di, dj)
+    """
+    starts = [(i, j) for i in range(9) for j in range(9)
+              if 0 <= i + di * distance < 9 and 0 <= j + dj * distance < 9]
+    rows, cols = np.array(starts, dtype=np.intp).reshape(-1, 2).T
+    return rows, cols, rows + di * distance, cols + dj * distance
+
+
+RAY_INDICES = dict(((d, k), _ray_indices(d[0], d[1], k)) for d in DIRECTIONS for k in range(1, 9))
+
+
+def pieces(boards):
+    """
+    Integer piece layer of the boards: 2 white, -2 black, 1 king, 0 empty
+    """
+    return np.trunc(boards).astype(np.int8)
+
+
+def legal_destinations(boards, player):
+    """
+    Legal moves of player in every position as a (N, 9, 9, 9, 9) boolean array:
+    item [n, si, sj, ei, ej] tells if (si, sj) -> (ei, ej) is legal in boards[n].
+    Same rules as ashton.Board.is_legal.
+    """
+    boards = np.asarray(boards, dtype=np.float64)
+    piece_layer = pieces(boards)
+    if player is Player.WHITE:
+        own = piece_layer >= 1
+    else:
+        own = piece_layer <= -1
+    in_camp = own & CAMP_MASK
+    empty = boards == 0
+    empty_camp = boards == -0.5
+
+    out = np.zeros(boards.shape[:1] + (9, 9, 9, 9), dtype=bool)
+    for d in DIRECTIONS:
+        clear = _shift(empty, d[0], d[1], False)
+        # first step: an empty tile, or an empty camp when leaving from a camp
+        reach = own & (clear | (in_camp & _shift(empty_camp, d[0], d[1], False)))
+        for distance in range(1, 9):
+            if distance > 1:
+                # further steps only over plain empty tiles
+                clear &= _shift(empty, d[0] * distance, d[1] * distance, False)
+                reach = own & clear
+            rows, cols, end_rows, end_cols = RAY_INDICES[(d, distance)]
+            if not len(rows):
+                break
+            out[:, rows, cols, end_rows, end_cols] = reach[:, rows, cols]
+    return out
+
+
+def apply_moves(boards, moves):
+    """
+    Play moves[n] = (si, sj, ei, ej) on boards[n] and resolve captures.
+    Moves are not checked for legality.
+    Returns the new boards and the number of pieces captured on each of them
+    """
+    boards = np.array(boards, dtype=np.float64)
+    moves = np.asarray(moves, dtype=np.intp)
+    n = np.arange(len(boards))
+    si, sj, ei, ej = moves.T
+
+    piece = np.trunc(boards[n, si, sj])
+    boards[n, si, sj] -= piece
+    boards[n, ei, ej] += piece
+    piece_layer = pieces(boards)
+    mover = np.sign(piece)
+
+    captured = np.zeros(boards.shape, dtype=bool)
+    for di, dj in DIRECTIONS:
+        ni, nj = ei + di, ej + dj
+        oi, oj = ei + 2 * di, ej + 2 * dj
+        # the other side must be on the board too
+        valid = (oi >= 0) & (oi < 9) & (oj >= 0) & (oj < 9)
+        ni, nj = np.clip(ni, 0, 8), np.clip(nj, 0, 8)
+        oi, oj = np.clip(oi, 0, 8), np.clip(oj, 0, 8)
+
+        neighbour = piece_layer[n, ni, nj]
+        enemy = neighbour * mover < 0
+        protected_king = (neighbour == 1) & CASTLE_ZONE_MASK[ni, nj]
+        # castle and camps are hostile to everyone
+        other_side = piece_layer[n, oi, oj]
+        hostile = (other_side * mover > 0) | CASTLE_MASK[oi, oj] | CAMP_MASK[oi, oj]
+        capture = valid & enemy & ~protected_king & hostile
+        captured[n[capture], ni[capture], nj[capture]] = True
+
+    black = piece_layer == -2
+    # king in castle captured when surrounded on all sides
+    ci, cj = ashton.CASTLE_TILE
+    surrounded = np.all([black[:, i, j] for i, j in CASTLE_ADJACENT], axis=0)
+    captured[:, ci, cj] |= (piece_layer[:, ci, cj] == 1) & surrounded
+
+    # king next to castle captured when surrounded on the other three sides
+    for i, j in CASTLE_ADJACENT:
+        sides = [(i + di, j + dj) for di, dj in DIRECTIONS if (i + di, j + dj) != (ci, cj)]
+        surrounded = np.all([black[:, a, b] for a, b in sides], axis=0)
+        captured[:, i, j] |= (piece_layer[:, i, j] == 1) & surrounded
+
+    boards -= np.where(captured, piece_layer, 0)
+    return boards, captured.sum(axis=(1, 2))
+
+
+def hashes(boards, black_to_move=False):
+    """
+    Zobrist hashes of the boards, the same ashton.Board.hash would give.
+    black_to_move is a bool or an array of N bools
+    """
+    piece_layer = pieces(boards).reshape(len(boards), -1)
+    h = np.zeros(len(boards), dtype=np.uint64)
+    for keys, piece in zip(ZOBRIST, (2, -2, 1)):
+        h ^= np.bitwise_xor.reduce(
+            np.where(piece_layer == piece, keys, np.uint64(0)), axis=1)
+    side = np.where(black_to_move, np.uint64(ashton.ZOBRIST_BLACK_TO_MOVE), np.uint64(0))
+    return h ^ side
+
+
+def end_conditions(boards, black_to_move=False, history=None):
+    """
+    Return the (win, lose, draw) boolean arrays for the boards.
+    win: the king reached an escape tile, lose: the king has been captured,
+    draw: the position hash already appears in history (e.g. board.hash_history)
+    """
+    boards = np.asarray(boards, dtype=np.float64)
+    win = np.any((boards == 1) & ESCAPE_MASK, axis=(1, 2))
+    lose = ~np.any(pieces(boards) == 1, axis=(1, 2))
+    if history is None:
+        draw = np.zeros(len(boards), dtype=bool)
+    else:
+        draw = np.isin(hashes(boards, black_to_move),
+                       np.asarray(list(history), dtype=np.uint64))
+    return win, lose, draw
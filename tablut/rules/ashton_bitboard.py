@@ -0,0 +1,386 @@
+from collections import namedtuple
+import copy
+import numpy as np
+import tablut.rules.ashton as ashton
+from tablut.game import Player
+from tablut.rules.variant import KING, DEFENDER, ATTACKER, PIECES, ALWAYS, WHEN_EMPTY, \
+    CUSTODIAL, SURROUND, TILE_VALUES, TILE_NAMES
+
+BitTables = namedtuple("BitTables", [
+    # piece -> for every square its move rays as (mask, moves cache, ray moves) triples,
+    # the cache maps the occupied squares of the ray mask to the moves they allow
+    "move_rays",
+    # (start * squares + end) -> mask of the squares between them, 0 for non orthogonal pairs
+    "between",
+    "adjacent", "escapes", "hostile_always", "hostile_empty", "king_custodial", "king_surround",
+])
+
+# piece of the white, black and king masks, in this order
+PIECE_VALUES = np.array([DEFENDER, ATTACKER, KING], dtype=np.int8)
+
+
+def _mask(squares):
+    """
+    Build the bit mask with the given flat squares set
+    """
+    mask = 0
+    for square in squares:
+        mask |= 1 << square
+    return mask
+
+
+def _bits(mask):
+    """
+    Return the flat squares set in mask
+    """
+    squares = list()
+    while mask:
+        low = mask & -mask
+        squares.append(low.bit_length() - 1)
+        mask ^= low
+    return squares
+
+
+def _ray_moves(ray, occupied):
+    """
+    Moves along a ray of (square, move) pairs (see variant.Tables.ray_moves)
+    up to the first occupied square
+    """
+    moves = list()
+    for end, move in ray:
+        if occupied >> end & 1:
+            break
+        if move is not None:
+            moves.append(move)
+    return tuple(moves)
+
+
+def compile_bitboard(tables):
+    """
+    Bit mask versions of the variant tables (square (row, col) is bit row * size + col)
+    """
+    count = tables.size * tables.size
+    move_rays = dict()
+    for piece in PIECES:
+        move_rays[piece] = [tuple((_mask(end for end, _ in ray), dict(), ray) for ray in rays if ray)
+                            for rays in tables.ray_moves[piece]]
+    between = [0] * (count * count)
+    for start, rays in enumerate(tables.rays):
+        for ray in rays:
+            for distance, end in enumerate(ray):
+                between[start * count + end] = _mask(ray[:distance])
+    return BitTables(
+        move_rays=move_rays, between=between,
+        adjacent=[_mask(squares) for squares in tables.adjacent],
+        escapes=_mask(row * tables.size + col for row, col in tables.escape_tiles),
+        hostile_always=_mask(i for i, h in enumerate(tables.hostile) if h == ALWAYS),
+        hostile_empty=_mask(i for i, h in enumerate(tables.hostile) if h == WHEN_EMPTY),
+        king_custodial=_mask(i for i, rule in enumerate(tables.king_rule) if rule == CUSTODIAL),
+        king_surround=_mask(i for i, rule in enumerate(tables.king_rule) if rule == SURROUND))
+
+
+class Board(ashton.Board):
+    """
+    Ashton board keeping each piece type in its own 81 bits integer mask
+    (square (row, col) is bit row * 9 + col).
+    Moves and captures read the compiled variant tables as bit masks (BITS), the moves
+    of every ray being cached by the pieces met on it; the piece layer and the float
+    grid are rebuilt on demand from the masks.
+    """
+    BITS = compile_bitboard(ashton.TABLES)
+
+    def __init__(self):
+        self._captured = None
+        self.turn = Player.WHITE
+        self.board = self.unpack(self.BOARD_TEMPLATE)
+        self._reset_history()
+
+    @property
+    def board(self):
+        """
+        Float grid of the position, writing its squares updates the board (see BaseBoard.board)
+        """
+        return super().board
+
+    @board.setter
+    def board(self, grid):
+        self.white = self.black = self.king = 0
+        for square, piece in enumerate(ashton.pieces_of(grid).ravel().tolist()):
+            if piece == DEFENDER:
+                self.white |= 1 << square
+            elif piece == ATTACKER:
+                self.black |= 1 << square
+            elif piece == KING:
+                self.king |= 1 << square
+        self.rehash()
+
+    @property
+    def pieces(self):
+        """
+        Piece layer of the position as stored by ashton.Board, rebuilt on every access
+        """
+        return self._pieces(self.white, self.black, self.king)
+
+    def _pieces(self, white, black, king):
+        size = self.TABLES.size
+        # the three masks side by side, each one in a whole number of bytes
+        stride = (size * size + 7) // 8
+        data = (white | black << 8 * stride | king << 16 * stride).to_bytes(3 * stride, "little")
+        layers = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little")
+        layers = layers.view(np.int8).reshape(3, 8 * stride)[:, :size * size]
+        return (PIECE_VALUES @ layers).reshape(size, size)
+
+    def _snapshot(self):
+        return (self.turn, self.white, self.black, self.king)
+
+    def _snapshot_board(self, snapshot):
+        return TILE_VALUES[self.TILES] + self._pieces(*snapshot[1:])
+
+    def _piece_count(self):
+        return self._count
+
+    def copy(self):
+        return copy.copy(self)
+
+    @property
+    def king_position(self):
+        return self.TABLES.squares[self.king.bit_length() - 1] if self.king else None
+
+    @property
+    def white_count(self):
+        return bin(self.white).count("1")
+
+    @property
+    def black_count(self):
+        return bin(self.black).count("1")
+
+    def rehash(self):
+        t = self.TABLES
+        h = t.zobrist_black_to_move if self.turn is Player.BLACK else 0
+        for mask, piece in ((self.white, DEFENDER), (self.black, ATTACKER), (self.king, KING)):
+            keys = t.zobrist_pieces[piece]
+            for square in _bits(mask):
+                h ^= keys[square]
+        self._hash = h
+        self._count = bin(self.white | self.black | self.king).count("1")
+
+    def _piece_at(self, square):
+        if self.white >> square & 1:
+            return DEFENDER
+        elif self.black >> square & 1:
+            return ATTACKER
+        elif self.king >> square & 1:
+            return KING
+        return 0
+
+    def is_legal(self, player, start, end):
+        """
+        Check if move is legal according to the variant rules
+        """
+        t = self.TABLES
+        size = t.size
+        s = start[0] * size + start[1]
+        e = end[0] * size + end[1]
+        sp = self._piece_at(s)
+
+        # start tile cant be empty
+        if not sp:
+            return False, "Start tile is empty"
+
+        # start tile must contain my pieces
+        if (player is Player.BLACK and sp > 0 or
+                (player is Player.WHITE and sp < 0)):
+            return False, "Cant move other player pieces"
+
+        # start and end cannot be the same
+        if s == e:
+            return False, "End needs to be different than start"
+
+        # Move need to be orthogonal
+        if start[0] == end[0]:
+            direction = 1 if end[1] > start[1] else 3
+        elif start[1] == end[1]:
+            direction = 2 if end[0] > start[0] else 0
+        else:
+            return False, "Moves need to be orthogonal"
+
+        # End tile cannot be already occupied
+        occupied = self.white | self.black | self.king
+        if occupied >> e & 1:
+            return False, "Cannot go into already occupied tile"
+
+        # The end tile must be in the piece move ray, past empty tiles only
+        ray = t.move_rays[sp][s][direction]
+        distance = abs(end[0] - start[0]) + abs(end[1] - start[1])
+        path = t.rays[s][direction][:distance - 1]
+        if len(ray) >= distance and ray[distance - 1] == e and e not in t.pass_only[sp]:
+            if not occupied & self.BITS.between[s * size * size + e]:
+                return True, ""
+        elif ray[:distance - 1] == path:
+            # the tiles on the way can be passed over, the end tile is out of reach
+            return False, "Cannot end in %s" % TILE_NAMES[t.tile_codes[e]]
+        obstacles = sum(abs(TILE_VALUES[t.tile_codes[i]] + self._piece_at(i)) for i in path)
+        return False, "Cannot pass over obstacle: %s" % obstacles
+
+    def legal_moves(self, player):
+        """
+        Return the list of (start, end) legal moves for player
+        """
+        occupied = self.white | self.black | self.king
+        moves = list()
+        if player is Player.BLACK:
+            self._add_moves(moves, self.black, ATTACKER, occupied)
+        elif self.king:
+            # the king moves come in square order, as in variant.Board
+            king = self.king
+            self._add_moves(moves, self.white & (king - 1), DEFENDER, occupied)
+            self._add_moves(moves, king, KING, occupied)
+            self._add_moves(moves, self.white & ~(2 * king - 1), DEFENDER, occupied)
+        else:
+            self._add_moves(moves, self.white, DEFENDER, occupied)
+        return moves
+
+    def iter_legal_moves(self, player):
+        """
+        Generate the (start, end) legal moves for player, piece by piece
+        """
+        return iter(self.legal_moves(player))
+
+    def piece_legal_moves(self, position):
+        """
+        Return the list of (start, end) legal moves for the piece in position
+        """
+        square = int(position[0]) * self.TABLES.size + int(position[1])
+        piece = self._piece_at(square)
+        moves = list()
+        if piece:
+            self._add_moves(moves, 1 << square, piece, self.white | self.black | self.king)
+        return moves
+
+    def _add_moves(self, moves, mask, piece, occupied):
+        """
+        Append to moves the moves of the piece pieces in mask
+        """
+        piece_rays = self.BITS.move_rays[piece]
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            for ray_mask, cache, ray in piece_rays[low.bit_length() - 1]:
+                key = occupied & ray_mask
+                ray_moves = cache.get(key)
+                if ray_moves is None:
+                    ray_moves = cache[key] = _ray_moves(ray, key)
+                moves += ray_moves
+
+    def _move_piece(self, start, end):
+        size = self.TABLES.size
+        s = start[0] * size + start[1]
+        e = end[0] * size + end[1]
+        move = (1 << s) | (1 << e)
+        if self.white >> s & 1:
+            self.white ^= move
+            piece = DEFENDER
+        elif self.black >> s & 1:
+            self.black ^= move
+            piece = ATTACKER
+        elif self.king >> s & 1:
+            self.king ^= move
+            piece = KING
+        else:
+            return 0
+        keys = self.TABLES.zobrist_pieces[piece]
+        self._hash ^= keys[s] ^ keys[e]
+        return piece
+
+    def _remove_piece(self, position):
+        square = position[0] * self.TABLES.size + position[1]
+        bit = 1 << square
+        if self.white & bit:
+            self.white ^= bit
+            piece = DEFENDER
+        elif self.black & bit:
+            self.black ^= bit
+            piece = ATTACKER
+        elif self.king & bit:
+            self.king ^= bit
+            piece = KING
+        else:
+            return 0
+        self._hash ^= self.TABLES.zobrist_pieces[piece][square]
+        self._count -= 1
+        if self._captured is not None:
+            self._captured.append((position, piece))
+        return piece
+
+    def _place_piece(self, position, piece):
+        square = position[0] * self.TABLES.size + position[1]
+        if piece == DEFENDER:
+            self.white |= 1 << square
+        elif piece == ATTACKER:
+            self.black |= 1 << square
+        else:
+            self.king |= 1 << square
+        self._hash ^= self.TABLES.zobrist_pieces[piece][square]
+        self._count += 1
+
+    def _pass_turn(self, player):
+        if self.turn is not player.next():
+            self._hash ^= self.TABLES.zobrist_black_to_move
+        self.turn = player.next()
+
+    def apply_captures(self, changed_position):
+        """
+        Apply orthogonal captures for soldiers and the king, then the capture of a
+        surrounded king, with the rules of variant.Board.apply_captures.
+        Returns the number of captured checkers, -1 if the king is captured
+        """
+        t = self.TABLES
+        bits = self.BITS
+        square = changed_position[0] * t.size + changed_position[1]
+        bit = 1 << square
+        if self.white & bit or self.king & bit and t.king_armed:
+            friends, enemies = self.white | (self.king if t.king_armed else 0), self.black
+        elif self.black & bit:
+            friends, enemies = self.black, self.white | self.king
+        else:
+            friends = enemies = 0
+
+        captured = 0
+        if enemies:
+            # squares acting as the other side of a capture
+            occupied = self.white | self.black | self.king
+            hostile = friends | bits.hostile_always | bits.hostile_empty & ~occupied
+            for neighbour, other_side in t.neighbours[square]:
+                neighbour_bit = 1 << neighbour
+                if not enemies & neighbour_bit or other_side < 0:
+                    continue
+                # the king may have its own capture rules on this square
+                if self.king & neighbour_bit and not bits.king_custodial & neighbour_bit:
+                    continue
+                if hostile >> other_side & 1:
+                    self._remove_piece(t.squares[neighbour])
+                    captured += 1
+
+        # where the king must be surrounded it is captured once every side is an
+        # attacker or a hostile tile
+        if self.king & bits.king_surround:
+            king_square = self.king.bit_length() - 1
+            occupied = self.white | self.black | self.king
+            sides = bits.adjacent[king_square]
+            if sides & ~(self.black | bits.hostile_always | bits.hostile_empty & ~occupied) == 0:
+                self._remove_piece(t.squares[king_square])
+        if not self.king:
+            captured = -1
+        return captured
+
+    def winning_condition(self):
+        """
+        Check if escape tiles are occupied by a king
+        """
+        return bool(self.king & self.BITS.escapes)
+
+    def lose_condition(self):
+        """
+        Check if king is still on the board
+        """
+        return not self.king
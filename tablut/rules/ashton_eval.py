@@ -0,0 +1,248 @@
+"""
+Ashton board keeping evaluation terms up to date as pieces move.
+
+The terms are piece-square score, mobility (legal moves) of each side, king
+escapes and freedom, attackers next to the king and hanging soldiers of each side
+(a soldier with an enemy or a camp/castle on one side and an empty plain tile on
+the other, where an enemy could land to capture it).
+
+The piece primitives (_move_piece, _remove_piece, _place_piece) update the
+piece-square score and mark the squares they change; the other terms are refreshed
+when read, recomputing only the pieces whose moves can go through a changed square
+(the first piece met from it in each direction) and the soldiers next to it.
+unmake_move goes through the same primitives, so taking moves back reverts the terms.
+
+    game = Game(ashton_eval.Board())
+    player = SearchPlayer(game, Player.WHITE, evaluate=ashton_eval.evaluate)
+"""
+import tablut.rules.ashton as ashton
+from tablut.game import Player
+from tablut.rules.ashton import RAYS, ADJACENT, SQUARES, TILE_CODES, PLAIN, CAMP, ESCAPE_SET
+
+
+def _build_piece_square():
+    """
+    Default piece-square tables, from white point of view: the king is worth more
+    the closer it is to an escape tile, black soldiers guarding the escape
+    corners are worth more
+    """
+    escapes = [r * 9 + c for r, c in ashton.ESCAPE_TILES]
+    king = [-5 * min(abs(s // 9 - e // 9) + abs(s % 9 - e % 9) for e in escapes) for s in range(81)]
+    black = [0] * 81
+    for r, c in [(1, 2), (2, 1), (1, 6), (2, 7), (6, 1), (7, 2), (6, 7), (7, 6)]:
+        black[r * 9 + c] = -10
+    return {2: [0] * 81, -2: black, 1: king}
+
+
+PIECE_SQUARE = _build_piece_square()
+ESCAPE_SQUARES = frozenset(r * 9 + c for r, c in ESCAPE_SET)
+
+
+class Board(ashton.Board):
+    """
+    Ashton board with incrementally updated evaluation terms, see the module doc.
+    piece_square maps every piece to its 81 values (PIECE_SQUARE by default)
+    """
+
+    def __init__(self, piece_square=None):
+        self.piece_square = piece_square or PIECE_SQUARE
+        super().__init__()
+
+    def rehash(self):
+        super().rehash()
+        self._rescan()
+
+    def _rescan(self):
+        """
+        Compute every term from scratch
+        """
+        cells = self.pieces.ravel().tolist()
+        self._piece_square_score = sum(self.piece_square[piece][square]
+                                       for square, piece in enumerate(cells) if piece)
+        self._mobility = [0] * 81
+        self._hanging = [0] * 81
+        self._white_mobility = self._black_mobility = 0
+        self._white_hanging = self._black_hanging = 0
+        self._king_escapes = 0
+        self._dirty = set(range(81))
+        self._refresh(cells)
+
+    def copy(self):
+        clone = super().copy()
+        clone._mobility = list(self._mobility)
+        clone._hanging = list(self._hanging)
+        clone._dirty = set(self._dirty)
+        return clone
+
+    def _move_piece(self, start, end):
+        piece = super()._move_piece(start, end)
+        if piece:
+            s, e = int(start[0]) * 9 + int(start[1]), int(end[0]) * 9 + int(end[1])
+            table = self.piece_square[piece]
+            self._piece_square_score += table[e] - table[s]
+            self._dirty.add(s)
+            self._dirty.add(e)
+        return piece
+
+    def _remove_piece(self, position):
+        piece = super()._remove_piece(position)
+        if piece:
+            square = int(position[0]) * 9 + int(position[1])
+            self._piece_square_score -= self.piece_square[piece][square]
+            self._dirty.add(square)
+        return piece
+
+    def _place_piece(self, position, piece):
+        super()._place_piece(position, piece)
+        square = int(position[0]) * 9 + int(position[1])
+        self._piece_square_score += self.piece_square[piece][square]
+        self._dirty.add(square)
+
+    def _refresh(self, cells=None):
+        """
+        Recompute mobility and hanging status of the pieces affected by the changed squares
+        """
+        if not self._dirty:
+            return
+        if cells is None:
+            cells = self.pieces.ravel().tolist()
+        moving, hanging = set(), set()
+        for square in self._dirty:
+            moving.add(square)
+            hanging.add(square)
+            hanging.update(ADJACENT[square])
+            for ray in RAYS[square]:
+                for other in ray:
+                    if cells[other]:
+                        moving.add(other)
+                        break
+                    if TILE_CODES[other]:
+                        break
+        self._dirty.clear()
+
+        for square in moving:
+            old = self._mobility[square]
+            if old > 0:
+                self._white_mobility -= old
+            else:
+                self._black_mobility += old
+            new = self._count_moves(cells, square)
+            if new > 0:
+                self._white_mobility += new
+            else:
+                self._black_mobility -= new
+            self._mobility[square] = new
+        if self._king is None:
+            self._king_escapes = 0
+
+        for square in hanging:
+            old = self._hanging[square]
+            new = self._is_hanging(cells, square)
+            if old != new:
+                self._white_hanging += (new > 0) - (old > 0)
+                self._black_hanging += (new < 0) - (old < 0)
+                self._hanging[square] = new
+
+    def _count_moves(self, cells, square):
+        """
+        Number of legal moves of the piece on square, negative for black pieces.
+        Same walk as _piece_moves; the king escapes are counted on the way
+        """
+        piece = cells[square]
+        if not piece:
+            return 0
+        in_camp = TILE_CODES[square] == CAMP
+        count = escapes = 0
+        for ray in RAYS[square]:
+            if not ray:
+                continue
+            first = ray[0]
+            if cells[first] or TILE_CODES[first]:
+                if in_camp and not cells[first] and TILE_CODES[first] == CAMP:
+                    count += 1
+                continue
+            for end in ray:
+                if cells[end] or TILE_CODES[end]:
+                    break
+                count += 1
+                if end in ESCAPE_SQUARES:
+                    escapes += 1
+        if piece == 1:
+            self._king_escapes = escapes
+        return count if piece > 0 else -count
+
+    @staticmethod
+    def _is_hanging(cells, square):
+        """
+        1 for a hanging white soldier, -1 for a hanging black one, 0 otherwise
+        """
+        piece = cells[square]
+        if piece != 2 and piece != -2:
+            return 0
+        rays = RAYS[square]
+        for a, b in ((rays[0], rays[2]), (rays[1], rays[3])):
+            if not a or not b:
+                continue
+            a, b = a[0], b[0]
+            for hostile, free in ((a, b), (b, a)):
+                if (cells[hostile] * piece < 0 or (not cells[hostile] and TILE_CODES[hostile])) \
+                        and not cells[free] and TILE_CODES[free] == PLAIN:
+                    return 1 if piece > 0 else -1
+        return 0
+
+    @property
+    def piece_square_score(self):
+        return self._piece_square_score
+
+    @property
+    def mobility(self):
+        """
+        (white, black) number of legal moves
+        """
+        self._refresh()
+        return self._white_mobility, self._black_mobility
+
+    @property
+    def hanging(self):
+        """
+        (white, black) number of hanging soldiers
+        """
+        self._refresh()
+        return self._white_hanging, self._black_hanging
+
+    @property
+    def king_escapes(self):
+        """
+        Escape tiles the king can reach with one move
+        """
+        self._refresh()
+        return self._king_escapes
+
+    @property
+    def king_mobility(self):
+        self._refresh()
+        return self._mobility[self._king[0] * 9 + self._king[1]] if self._king else 0
+
+    @property
+    def king_attackers(self):
+        """
+        Black soldiers, camps and castle next to the king
+        """
+        if self._king is None:
+            return 0
+        square = self._king[0] * 9 + self._king[1]
+        return sum(1 for n in ADJACENT[square]
+                   if self.pieces[SQUARES[n]] == -2 or TILE_CODES[n] != PLAIN)
+
+
+def evaluate(board, player):
+    """
+    Static evaluation of a Board of this module for player: material, piece-square
+    score, king escapes, freedom and attackers, mobility and hanging soldiers
+    """
+    white_mobility, black_mobility = board.mobility
+    white_hanging, black_hanging = board.hanging
+    score = (100 * board.white_count - 50 * board.black_count + board.piece_square_score +
+             400 * board.king_escapes + 5 * board.king_mobility - 20 * board.king_attackers +
+             2 * (white_mobility - black_mobility) + 10 * (black_hanging - white_hanging))
+    return score if player is Player.WHITE else -score
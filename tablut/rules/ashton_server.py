@@ -0,0 +1,121 @@
+"""
+Positions sent by the Ashton tournament server.
+
+The server sends the state as JSON, {"board": [["EMPTY", "BLACK", ...], ...], "turn": "WHITE"},
+with cells EMPTY, WHITE, BLACK, KING or THRONE (the empty castle), and logs it as text:
+nine lines of O, W, B, K, T letters followed by a "-" line and the turn letter.
+Both forms are parsed through a lookup table on the first letter of every cell.
+"""
+import json
+import re
+import numpy as np
+import tablut.rules.ashton as ashton
+from tablut.game import Player
+
+# first letter of a cell -> piece, 127 for anything else
+PIECE_LUT = np.full(256, 127, dtype=np.int8)
+for _letter, _piece in (("E", 0), ("O", 0), ("T", 0), ("W", 2), ("B", -2), ("K", 1)):
+    PIECE_LUT[ord(_letter)] = _piece
+
+# first letter of the cell names in the JSON board
+CELL = re.compile(r'"([A-Z])[A-Z]*"')
+
+TURNS = {"W": Player.WHITE, "WHITE": Player.WHITE, "B": Player.BLACK, "BLACK": Player.BLACK}
+CELL_NAMES = {0: "EMPTY", 2: "WHITE", -2: "BLACK", 1: "KING"}
+
+
+def _decode(state):
+    """
+    Return the JSON state as a dict, the text one as its list of lines
+    """
+    if isinstance(state, bytes):
+        state = state.decode()
+    if isinstance(state, str):
+        if state.lstrip().startswith("{"):
+            return json.loads(state)
+        return [line.strip() for line in state.splitlines() if line.strip()]
+    return state
+
+
+def _letters(state):
+    if isinstance(state, bytes):
+        state = state.decode()
+    if isinstance(state, str) and state.lstrip().startswith("{"):
+        # pick the cells straight from the compact JSON text, much faster than decoding
+        # it; any other layout (e.g. indented) is decoded
+        board = state.find('"board"')
+        start = state.find("[", board) if board >= 0 else -1
+        end = state.find("]]", start) if start >= 0 else -1
+        if end >= 0:
+            letters = CELL.findall(state, start, end)
+            if len(letters) == 81:
+                return "".join(letters).encode()
+    state = _decode(state)
+    if isinstance(state, dict):
+        return "".join(cell[:1] for row in state["board"] for cell in row).encode()
+    return "".join(state[:9]).encode()
+
+
+def _lookup(letters, count):
+    codes = np.frombuffer(letters, dtype=np.uint8)
+    if len(codes) != 81 * count:
+        raise ValueError("Expected %d squares, got %d" % (81 * count, len(codes)))
+    pieces = PIECE_LUT[codes]
+    if (pieces == 127).any():
+        raise ValueError("Unknown cell %r" % chr(codes[(pieces == 127).argmax()]))
+    return pieces.reshape(count, 9, 9)
+
+
+def parse_pieces(state):
+    """
+    Piece layer (9x9 int8 array, see ashton.Board.pieces) of a server state
+    """
+    return _lookup(_letters(state), 1)[0]
+
+
+def parse_states(states):
+    """
+    (N, 9, 9) piece layers of a sequence of server states, looked up in one go
+    """
+    states = list(states)
+    return _lookup(b"".join(_letters(state) for state in states), len(states))
+
+
+def format_state(pieces, turn):
+    """
+    JSON state dict of a piece layer, turn is "WHITE", "BLACK" or the end of
+    game ones ("WHITEWIN", "BLACKWIN", "DRAW")
+    """
+    board = [[CELL_NAMES[piece] for piece in row] for row in np.asarray(pieces).tolist()]
+    i, j = ashton.CASTLE_TILE
+    if board[i][j] == "EMPTY":
+        board[i][j] = "THRONE"
+    return {"board": board, "turn": turn}
+
+
+def parse_turn(state):
+    """
+    Player to move in a server state, None once the game is over
+    """
+    state = _decode(state)
+    turn = state["turn"] if isinstance(state, dict) else state[-1]
+    return TURNS.get(turn)
+
+
+def parse_board(state, board_class=ashton.Board):
+    """
+    New board_class board set to a server state, its history starting there
+    """
+    board = board_class()
+    board.turn = parse_turn(state) or Player.WHITE
+    board.board = ashton.TILE_VALUES[ashton.TILES] + parse_pieces(state)
+    # the opening is not part of this game
+    board._reset_history()
+    return board
+
+
+def infer_moves(states):
+    """
+    Moves played between consecutive server states, captures included
+    """
+    return ashton.infer_moves(parse_states(states))
@@ -0,0 +1,126 @@
+"""
+Symmetries of the Ashton board.
+
+Tiles, camps, castle and escape tiles are the same under the 8 rotations and
+reflections of the square, so the 8 transformed copies of a position play the
+same game. Transform t is t % 4 quarter turns counterclockwise (as numpy.rot90),
+followed by a left-right mirror when t >= 4; transform 0 is the identity.
+
+The canonical orientation of a position is the transform giving the smallest
+Zobrist hash, and that hash is its symmetric hash: the 8 copies of a position
+have the same one, so caches and books keyed by it store them once.
+"""
+import numpy as np
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_batch as ashton_batch
+from tablut.game import Player
+
+TRANSFORMS = 8
+
+
+def transform(array, t):
+    """
+    Transform t of a 9x9 array, or of the last two axes of a (N, 9, 9) stack.
+    Returns a view
+    """
+    out = np.rot90(array, t % 4, axes=(-2, -1))
+    if t >= 4:
+        out = np.flip(out, -1)
+    return out
+
+
+def _build_squares():
+    """
+    SQUARE_MAPS[t][square] is where transform t moves square
+    """
+    squares = np.arange(81).reshape(9, 9)
+    maps = np.empty((TRANSFORMS, 81), dtype=np.intp)
+    for t in range(TRANSFORMS):
+        maps[t, transform(squares, t).ravel()] = np.arange(81)
+    return maps
+
+
+SQUARE_MAPS = _build_squares()
+# INVERSE[t] is the transform taking back transform t
+INVERSE = [next(u for u in range(TRANSFORMS) if (SQUARE_MAPS[u][SQUARE_MAPS[t]] == np.arange(81)).all())
+           for t in range(TRANSFORMS)]
+_SQUARE_MAPS = SQUARE_MAPS.tolist()
+# _ZOBRIST[piece][square] holds the key of the piece moved there by each transform
+_ZOBRIST = dict((piece, [tuple(keys[_SQUARE_MAPS[t][square]] for t in range(TRANSFORMS))
+                         for square in range(81)])
+                for piece, keys in ashton.ZOBRIST_PIECES.items())
+
+
+def inverse(t):
+    return INVERSE[t]
+
+
+def transform_square(position, t):
+    """
+    (row, col) where transform t moves position
+    """
+    return ashton.SQUARES[_SQUARE_MAPS[t][position[0] * 9 + position[1]]]
+
+
+def transform_move(move, t):
+    """
+    The ((si, sj), (ei, ej)) move in the position transformed by t
+    """
+    return transform_square(move[0], t), transform_square(move[1], t)
+
+
+def hashes(board):
+    """
+    Zobrist hashes of the 8 transforms of a board, in transform order
+    """
+    side = ashton.ZOBRIST_BLACK_TO_MOVE if board.turn is Player.BLACK else 0
+    h = [side] * TRANSFORMS
+    for square, piece in enumerate(board.pieces.ravel().tolist()):
+        if piece:
+            keys = _ZOBRIST[piece][square]
+            h = [a ^ b for a, b in zip(h, keys)]
+    return h
+
+
+def canonical_transform(board):
+    """
+    Transform taking the board to its canonical orientation, and the symmetric hash
+    """
+    h = hashes(board)
+    t = min(range(TRANSFORMS), key=h.__getitem__)
+    return t, h[t]
+
+
+def symmetric_hash(board):
+    """
+    Hash shared by the 8 transforms of the board position
+    """
+    return min(hashes(board))
+
+
+def batch_hashes(boards, black_to_move=False):
+    """
+    (N, 8) Zobrist hashes of the transforms of a (N, 9, 9) stack of piece layers
+    (or float grids)
+    """
+    boards = np.asarray(boards)
+    stacked = np.concatenate([transform(boards, t) for t in range(TRANSFORMS)])
+    side = np.tile(np.broadcast_to(black_to_move, len(boards)), TRANSFORMS)
+    return ashton_batch.hashes(stacked, side).reshape(TRANSFORMS, len(boards)).T
+
+
+def canonical(boards, black_to_move=False):
+    """
+    Canonical orientation of a (N, 9, 9) stack of piece layers (or float grids).
+    Returns the transformed stack, the (N,) transforms applied (take a position back
+    with transform(position, inverse(t))) and the (N,) symmetric hashes
+    """
+    boards = np.asarray(boards)
+    h = batch_hashes(boards, black_to_move)
+    t = h.argmin(axis=1)
+    out = np.empty_like(boards)
+    for u in range(TRANSFORMS):
+        selected = t == u
+        if selected.any():
+            out[selected] = transform(boards[selected], u)
+    return out, t, h[np.arange(len(boards)), t]
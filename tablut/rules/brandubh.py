@@ -0,0 +1,44 @@
+"""
+Brandubh: 7x7 tafl with corner escapes.
+
+The king wins reaching a corner; only the king can stop on the corners and on the
+castle, every piece can pass over the empty castle. Corners always count as enemies
+in captures, the castle only while empty. The king takes part in captures and is
+captured like a soldier, except on and next to the castle where it must be
+surrounded on four sides.
+"""
+import tablut.rules.variant as variant
+from tablut.rules.variant import CASTLE, CORNER, KING, DEFENDER, ATTACKER
+
+BRANDUBH = variant.Variant(
+    name="brandubh",
+    tiles=[
+        "x.....x",
+        ".......",
+        ".......",
+        "...t...",
+        ".......",
+        ".......",
+        "x.....x",
+    ],
+    start=[
+        "...B...",
+        "...B...",
+        "...W...",
+        "BBWKWBB",
+        "...W...",
+        "...B...",
+        "...B...",
+    ],
+    stop={CASTLE: (KING,), CORNER: (KING,)},
+    through={CASTLE: (KING, DEFENDER, ATTACKER)},
+    hostile={CASTLE: variant.WHEN_EMPTY, CORNER: variant.ALWAYS},
+    king_capture=variant.KING_CASTLE)
+TABLES = variant.compile_variant(BRANDUBH)
+
+
+class Board(variant.Board):
+    """
+    Brandubh board, 7x7 squares
+    """
+    TABLES = TABLES
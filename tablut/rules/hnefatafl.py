@@ -0,0 +1,53 @@
+"""
+Hnefatafl: 11x11 tafl with the Copenhagen movement and capture rules.
+
+The king wins reaching a corner; only the king can stop on the corners and on the
+castle, every piece can pass over the empty castle. Corners always count as enemies
+in captures, the castle only while empty. The king is armed and is captured only
+surrounded on four sides by attackers (or attackers and the empty castle), so never
+on the board edge. Shieldwall captures, edge forts and the loss on repetition are
+left out: repetitions are draws as in every other variant.
+"""
+import tablut.rules.variant as variant
+from tablut.rules.variant import CASTLE, CORNER, KING, DEFENDER, ATTACKER
+
+HNEFATAFL = variant.Variant(
+    name="hnefatafl",
+    tiles=[
+        "x.........x",
+        "...........",
+        "...........",
+        "...........",
+        "...........",
+        ".....t.....",
+        "...........",
+        "...........",
+        "...........",
+        "...........",
+        "x.........x",
+    ],
+    start=[
+        "...BBBBB...",
+        ".....B.....",
+        "...........",
+        "B....W....B",
+        "B...WWW...B",
+        "BB.WWKWW.BB",
+        "B...WWW...B",
+        "B....W....B",
+        "...........",
+        ".....B.....",
+        "...BBBBB...",
+    ],
+    stop={CASTLE: (KING,), CORNER: (KING,)},
+    through={CASTLE: (KING, DEFENDER, ATTACKER)},
+    hostile={CASTLE: variant.WHEN_EMPTY, CORNER: variant.ALWAYS},
+    king_capture=variant.KING_SURROUNDED)
+TABLES = variant.compile_variant(HNEFATAFL)
+
+
+class Board(variant.Board):
+    """
+    Hnefatafl board, 11x11 squares
+    """
+    TABLES = TABLES
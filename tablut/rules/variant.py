@@ -0,0 +1,632 @@
+"""
+Tafl variants described as data and compiled into lookup tables.
+
+A Variant gives the tiles and the starting position as rows of characters, and the
+movement and capture rules as a few fields. compile_variant turns it, once, into
+flat tables: squares are flat indices (row * size + col), and the rays every piece
+can walk, the neighbours, the hostile tiles and the king capture rule of every
+square are precomputed. The Board of this module only reads those tables, so any
+variant and board size goes through the same move generation and capture code.
+
+    class Board(variant.Board):
+        TABLES = variant.compile_variant(MY_VARIANT)
+
+Tiles: "." plain, "e" plain escape tile, "c" camp, "t" castle (throne),
+"x" corner (an escape tile). Pieces: "." empty, "W" defender, "B" attacker, "K" king.
+"""
+from collections import namedtuple
+import random
+import numpy as np
+import tablut.board as board
+from tablut.game import Player
+
+# Codes of the fixed tile layer and their value in the float grid
+PLAIN, CAMP, CASTLE, CORNER = 0, 1, 2, 3
+TILE_VALUES = np.array([0, -0.5, 0.7, 0.3])
+TILE_CHARS = {".": PLAIN, "e": PLAIN, "c": CAMP, "t": CASTLE, "x": CORNER}
+ESCAPE_CHARS = "ex"
+TILE_NAMES = {PLAIN: "plain tile", CAMP: "camp", CASTLE: "the castle", CORNER: "a corner"}
+
+KING, DEFENDER, ATTACKER = 1, 2, -2
+PIECE_CHARS = {".": 0, "W": DEFENDER, "B": ATTACKER, "K": KING}
+PIECES = (KING, DEFENDER, ATTACKER)
+
+# Hostile tiles count as an enemy in captures: always, or only while empty
+ALWAYS, WHEN_EMPTY = 1, 2
+
+# How the king is captured: like a soldier, like a soldier except on and next to the
+# castle where it must be surrounded on four sides, or surrounded on four sides
+# anywhere (never on the board edge)
+KING_CUSTODIAL, KING_CASTLE, KING_SURROUNDED = "custodial", "castle", "surrounded"
+# per square rule
+CUSTODIAL, SURROUND, SAFE = 0, 1, 2
+
+Variant = namedtuple("Variant", [
+    "name",
+    # rows of TILE_CHARS
+    "tiles",
+    # rows of PIECE_CHARS
+    "start",
+    # tile code -> pieces that can end a move there, plain tiles take every piece
+    "stop",
+    # tile code -> pieces that can pass over it while empty, besides plain tiles
+    "through",
+    # tile code -> ALWAYS or WHEN_EMPTY
+    "hostile",
+    "king_capture",
+    # whether the king takes part in captures
+    "king_armed",
+    # a piece on a camp can also step onto a next empty camp (Ashton)
+    "camp_steps",
+], defaults=({}, {}, {}, KING_CUSTODIAL, True, False))
+
+Tables = namedtuple("Tables", [
+    "name", "size", "squares", "tiles", "tile_codes", "rays", "neighbours", "adjacent",
+    # piece -> for every square the rays the piece can walk from it (up, right, down, left)
+    "move_rays",
+    # piece -> squares in its move rays it can pass over but not stop on
+    "pass_only",
+    # piece -> the move rays as (square, (start, end) move) pairs, None as the move
+    # of the squares it can only pass over
+    "ray_moves",
+    "hostile", "king_rule", "king_armed",
+    "escape_tiles", "escape_set", "castle_tile", "castle_square",
+    "zobrist_pieces", "zobrist_black_to_move", "template",
+])
+
+# Everything unmake_move needs to take back a move done by make_move
+Undo = namedtuple("Undo", ["start", "end", "piece", "captured", "hash", "turn", "history"])
+
+
+def _build_rays(size):
+    """
+    Precompute for every square the four orthogonal rays (up, right, down, left).
+    Squares are flat indices (row * size + col), each ray lists the squares met
+    walking away from the square, nearest first.
+    """
+    rays = list()
+    for row in range(size):
+        for col in range(size):
+            rays.append((
+                tuple(i * size + col for i in range(row - 1, -1, -1)),
+                tuple(row * size + i for i in range(col + 1, size)),
+                tuple(i * size + col for i in range(row + 1, size)),
+                tuple(row * size + i for i in range(col - 1, -1, -1)),
+            ))
+    return rays
+
+
+def _build_neighbours(rays):
+    """
+    For every square the (neighbour, other side) pairs in each direction,
+    other side is -1 when the neighbour lies on the board edge.
+    Directions with no neighbour (square on the edge) are left out.
+    """
+    neighbours = list()
+    for start_rays in rays:
+        neighbours.append(tuple(
+            (ray[0], ray[1] if len(ray) > 1 else -1) for ray in start_rays if ray))
+    return neighbours
+
+
+def _build_move_rays(variant, codes, rays, piece):
+    """
+    Rays piece can walk from every square on an empty board: plain tiles and the
+    tiles it can pass over, ended by the first other tile when it can stop there.
+    Returns the rays and the squares it can pass over but not stop on
+    """
+    stop = set([PLAIN] + [code for code, pieces in variant.stop.items() if piece in pieces])
+    through = set([PLAIN] + [code for code, pieces in variant.through.items() if piece in pieces])
+    move_rays = list()
+    for square, square_rays in enumerate(rays):
+        walks = list()
+        for ray in square_rays:
+            if variant.camp_steps and codes[square] == CAMP and ray and codes[ray[0]] == CAMP:
+                walks.append((ray[0],))
+                continue
+            walk = list()
+            for other in ray:
+                if codes[other] in through:
+                    walk.append(other)
+                else:
+                    if codes[other] in stop:
+                        walk.append(other)
+                    break
+            walks.append(tuple(walk))
+        move_rays.append(tuple(walks))
+    pass_only = frozenset(square for square, code in enumerate(codes)
+                          if code in through and code not in stop)
+    return move_rays, pass_only
+
+
+def _build_king_rule(variant, codes, adjacent, castle_square):
+    if variant.king_capture == KING_CUSTODIAL:
+        return [CUSTODIAL] * len(codes)
+    if variant.king_capture == KING_CASTLE:
+        zone = set([castle_square] + list(adjacent[castle_square]))
+        return [SURROUND if square in zone else CUSTODIAL for square in range(len(codes))]
+    if variant.king_capture == KING_SURROUNDED:
+        return [SURROUND if len(n) == 4 else SAFE for n in adjacent]
+    raise ValueError("Unknown king capture rule %r" % (variant.king_capture,))
+
+
+def compile_variant(variant):
+    """
+    Tables of a Variant, see the module doc
+    """
+    size = len(variant.tiles)
+    if any(len(row) != size for row in variant.tiles) or \
+            len(variant.start) != size or any(len(row) != size for row in variant.start):
+        raise ValueError("Tiles and start of %s must be %dx%d" % (variant.name, size, size))
+    chars = "".join(variant.tiles)
+    codes = [TILE_CHARS[c] for c in chars]
+    squares = [(i // size, i % size) for i in range(size * size)]
+    rays = _build_rays(size)
+    neighbours = _build_neighbours(rays)
+    adjacent = [tuple(n for n, _ in pairs) for pairs in neighbours]
+    castles = [square for square, code in enumerate(codes) if code == CASTLE]
+    castle_square = castles[0] if castles else None
+
+    move_rays, pass_only, ray_moves = dict(), dict(), dict()
+    for piece in PIECES:
+        move_rays[piece], pass_only[piece] = _build_move_rays(variant, codes, rays, piece)
+        ray_moves[piece] = [tuple(tuple((end, None if end in pass_only[piece] else (squares[start], squares[end]))
+                                        for end in ray) for ray in start_rays)
+                            for start, start_rays in enumerate(move_rays[piece])]
+    hostile = [variant.hostile.get(code, 0) for code in codes]
+    escape_tiles = [squares[i] for i, c in enumerate(chars) if c in ESCAPE_CHARS]
+
+    # Zobrist keys: one random 64 bits key for each (piece, square) plus one xored in
+    # when black is to move. Seeded so hashes are the same in every process.
+    zobrist_random = random.Random(0x7AB1)
+    zobrist_pieces = dict(
+        (piece, [zobrist_random.getrandbits(64) for _ in range(size * size)])
+        for piece in (DEFENDER, ATTACKER, KING))
+    zobrist_black_to_move = zobrist_random.getrandbits(64)
+
+    tile_letters = "tcsx"
+    piece_letters = {0: "e", DEFENDER: "W", ATTACKER: "B", KING: "K"}
+    template = list()
+    for row in range(size):
+        template.append([
+            tile_letters[codes[row * size + col]] + "e" if not PIECE_CHARS[variant.start[row][col]]
+            else tile_letters[codes[row * size + col]].upper() + piece_letters[PIECE_CHARS[variant.start[row][col]]]
+            for col in range(size)])
+
+    return Tables(
+        name=variant.name, size=size, squares=squares,
+        tiles=np.array(codes, dtype=np.int8).reshape(size, size), tile_codes=codes,
+        rays=rays, neighbours=neighbours, adjacent=adjacent,
+        move_rays=move_rays, pass_only=pass_only, ray_moves=ray_moves, hostile=hostile,
+        king_rule=_build_king_rule(variant, codes, adjacent, castle_square),
+        king_armed=variant.king_armed,
+        escape_tiles=escape_tiles, escape_set=frozenset(escape_tiles),
+        castle_tile=squares[castle_square] if castle_square is not None else None,
+        castle_square=castle_square,
+        zobrist_pieces=zobrist_pieces, zobrist_black_to_move=zobrist_black_to_move,
+        template=template)
+
+
+def infer_moves(pieces):
+    """
+    Moves between consecutive positions of a (N, size, size) stack of piece layers.
+    Captured pieces are allowed: the moved piece is the only one reaching an empty
+    square, every other changed square must be an enemy piece removed.
+    Returns the N - 1 ((si, sj), (ei, ej)) moves, raises ValueError when a pair of
+    positions is not one move apart.
+    """
+    pieces = np.asarray(pieces, dtype=np.int8)
+    size = pieces.shape[-1]
+    pieces = pieces.reshape(-1, size * size)
+    before, after = pieces[:-1], pieces[1:]
+    rows = np.arange(len(before))
+
+    arrived = (before == 0) & (after != 0)
+    end = arrived.argmax(axis=1)
+    moved = after[rows, end][:, None]
+    started = (before == moved) & (after == 0)
+    start = started.argmax(axis=1)
+    captured = (before * moved < 0) & (after == 0)
+    explained = arrived | started | captured
+
+    valid = ((arrived.sum(axis=1) == 1) & (started.sum(axis=1) == 1) &
+             ((before != after) <= explained).all(axis=1) &
+             ((start // size == end // size) | (start % size == end % size)))
+    if not valid.all():
+        raise ValueError("Positions %d and %d are not one move apart" % (
+            valid.argmin(), valid.argmin() + 1))
+    return [(divmod(s, size), divmod(e, size)) for s, e in zip(start.tolist(), end.tolist())]
+
+
+class Board(board.BaseBoard):
+    """
+    Board of the variant compiled in TABLES (set by subclasses)
+    """
+    TABLES = None
+
+    def __init__(self):
+        self.turn = Player.WHITE
+        super().__init__()
+
+    @property
+    def hash(self):
+        """
+        64 bits Zobrist hash of pieces positions and side to move
+        """
+        return self._hash
+
+    @property
+    def hash_history(self):
+        """
+        Hashes of the positions in board history, oldest first
+        """
+        return self.history.hashes()
+
+    @property
+    def king_position(self):
+        """
+        Square of the king, None once captured
+        """
+        return self._king
+
+    @property
+    def white_count(self):
+        """
+        Number of white soldiers on the board, king excluded
+        """
+        return self._white_count
+
+    @property
+    def black_count(self):
+        """
+        Number of black soldiers on the board
+        """
+        return self._black_count
+
+    def rehash(self):
+        """
+        Recompute the hash, the king square and the pieces count from scratch.
+        Needed only after editing the pieces array directly.
+        """
+        t = self.TABLES
+        h = t.zobrist_black_to_move if self.turn is Player.BLACK else 0
+        self._king = None
+        self._white_count = self._black_count = 0
+        for square, piece in enumerate(self.pieces.ravel().tolist()):
+            if piece:
+                h ^= t.zobrist_pieces[piece][square]
+            if piece == KING:
+                self._king = t.squares[square]
+            elif piece == DEFENDER:
+                self._white_count += 1
+            elif piece == ATTACKER:
+                self._black_count += 1
+        self._hash = h
+
+    @property
+    def TILES(self):
+        return self.TABLES.tiles
+
+    @property
+    def TILE_VALUES(self):
+        return TILE_VALUES
+
+    @property
+    def TILE_PIECE_MAP(self):
+        tile_piece_map = dict()
+        for code, letter in enumerate("tcsx"):
+            tile_piece_map[letter + "e"] = TILE_VALUES[code]
+            for piece, piece_letter in ((DEFENDER, "W"), (ATTACKER, "B"), (KING, "K")):
+                tile_piece_map[letter.upper() + piece_letter] = TILE_VALUES[code] + piece
+        return tile_piece_map
+
+    @property
+    def INVERSE_TILE_PIECE_MAP(self):
+        return dict((value, name) for name, value in self.TILE_PIECE_MAP.items())
+
+    @property
+    def BOARD_TEMPLATE(self):
+        return [list(row) for row in self.TABLES.template]
+
+    def infer_move(self, new_board):
+        """
+        Infer the move leading from this position to new_board (a float grid),
+        also when it captures pieces
+        """
+        pieces = np.rint(np.asarray(new_board, dtype=float) - TILE_VALUES[self.TILES]).astype(np.int8)
+        return infer_moves(np.stack([self.pieces, pieces]))[0]
+
+    def is_legal(self, player, start, end):
+        """
+        Check if move is legal according to the variant rules
+        """
+        t = self.TABLES
+        size = t.size
+        s = start[0] * size + start[1]
+        e = end[0] * size + end[1]
+        sp = int(self.pieces[start[0], start[1]])
+        ep = int(self.pieces[end[0], end[1]])
+
+        # start tile cant be empty
+        if not sp:
+            return False, "Start tile is empty"
+
+        # start tile must contain my pieces
+        if (player is Player.BLACK and sp > 0 or
+                (player is Player.WHITE and sp < 0)):
+            return False, "Cant move other player pieces"
+
+        # start and end cannot be the same
+        if start[0] == end[0] and start[1] == end[1]:
+            return False, "End needs to be different than start"
+
+        # Move need to be orthogonal
+        if start[0] == end[0]:
+            direction = 1 if end[1] > start[1] else 3
+        elif start[1] == end[1]:
+            direction = 2 if end[0] > start[0] else 0
+        else:
+            return False, "Moves need to be orthogonal"
+
+        # End tile cannot be already occupied
+        if ep:
+            return False, "Cannot go into already occupied tile"
+
+        # The end tile must be in the piece move ray, past empty tiles only
+        ray = t.move_rays[sp][s][direction]
+        distance = abs(end[0] - start[0]) + abs(end[1] - start[1])
+        if len(ray) >= distance and ray[distance - 1] == e and e not in t.pass_only[sp]:
+            if distance == 1:
+                return True, ""
+            path = ray[:distance - 1]
+            cells = self.pieces.ravel().tolist()
+            if not any(cells[i] for i in path):
+                return True, ""
+        else:
+            path = t.rays[s][direction][:distance - 1]
+            if ray[:distance - 1] == path:
+                # the tiles on the way can be passed over, the end tile is out of reach
+                return False, "Cannot end in %s" % TILE_NAMES[t.tile_codes[e]]
+            cells = self.pieces.ravel().tolist()
+        obstacles = sum(abs(TILE_VALUES[t.tile_codes[i]] + cells[i]) for i in path)
+        return False, "Cannot pass over obstacle: %s" % obstacles
+
+    def legal_moves(self, player):
+        """
+        Return the list of (start, end) legal moves for player.
+        Contains exactly the moves accepted by is_legal.
+        """
+        cells = self.pieces.ravel().tolist()
+        moves = list()
+        for square in self._player_squares(cells, player):
+            moves.extend(self._piece_moves(cells, square))
+        return moves
+
+    def iter_legal_moves(self, player):
+        """
+        Generate the (start, end) legal moves for player, piece by piece
+        """
+        cells = self.pieces.ravel().tolist()
+        for square in self._player_squares(cells, player):
+            for move in self._piece_moves(cells, square):
+                yield move
+
+    def piece_legal_moves(self, position):
+        """
+        Return the list of (start, end) legal moves for the piece in position
+        """
+        cells = self.pieces.ravel().tolist()
+        return self._piece_moves(cells, int(position[0]) * self.TABLES.size + int(position[1]))
+
+    def _player_squares(self, cells, player):
+        """
+        Return the squares containing player pieces
+        """
+        if player is Player.WHITE:
+            return [i for i, piece in enumerate(cells) if piece > 0]
+        else:
+            return [i for i, piece in enumerate(cells) if piece < 0]
+
+    def _piece_moves(self, cells, square):
+        """
+        Walk the precomputed move rays of the piece on square, stopping at the first
+        piece met; tiles the piece can only pass over have no move
+        """
+        moves = list()
+        piece = cells[square]
+        if not piece:
+            return moves
+        for ray in self.TABLES.ray_moves[piece][square]:
+            for end, move in ray:
+                if cells[end]:
+                    break
+                if move is not None:
+                    moves.append(move)
+        return moves
+
+    def _move_piece(self, start, end):
+        piece = super()._move_piece(start, end)
+        if piece:
+            t = self.TABLES
+            keys = t.zobrist_pieces[piece]
+            self._hash ^= keys[start[0] * t.size + start[1]] ^ keys[end[0] * t.size + end[1]]
+            if piece == KING:
+                self._king = (int(end[0]), int(end[1]))
+        return piece
+
+    def _remove_piece(self, position):
+        piece = super()._remove_piece(position)
+        if piece:
+            t = self.TABLES
+            self._hash ^= t.zobrist_pieces[piece][position[0] * t.size + position[1]]
+            if piece == KING:
+                self._king = None
+            elif piece == DEFENDER:
+                self._white_count -= 1
+            else:
+                self._black_count -= 1
+        return piece
+
+    def _place_piece(self, position, piece):
+        super()._place_piece(position, piece)
+        t = self.TABLES
+        self._hash ^= t.zobrist_pieces[piece][position[0] * t.size + position[1]]
+        if piece == KING:
+            self._king = (int(position[0]), int(position[1]))
+        elif piece == DEFENDER:
+            self._white_count += 1
+        else:
+            self._black_count += 1
+
+    def _pass_turn(self, player):
+        if self.turn is not player.next():
+            self._hash ^= self.TABLES.zobrist_black_to_move
+        super()._pass_turn(player)
+
+    def _piece_count(self):
+        return self._white_count + self._black_count + (self._king is not None)
+
+    def make_move(self, player, start, end, check_legal=True):
+        """
+        Perform a move and store it in board history like step, but without raising
+        when the game ends: check the end conditions afterwards.
+        Returns the Undo record to pass to unmake_move
+        """
+        if check_legal:
+            legal_move, message = self.is_legal(player, start, end)
+            if not legal_move:
+                raise ValueError(message)
+
+        previous_hash = self._hash
+        previous_turn = self.turn
+        history = self.history
+        self._captured = list()
+        try:
+            piece = self._move_piece(start, end)
+            self.apply_captures(end)
+            captured = self._captured
+        finally:
+            self._captured = None
+        self._pass_turn(player)
+        self._record()
+        return Undo(start, end, piece, captured, previous_hash, previous_turn, history)
+
+    def unmake_move(self, undo):
+        """
+        Take back the move done by make_move, restoring the exact previous state.
+        Moves must be taken back in reverse order.
+        """
+        self.history = undo.history
+        for position, piece in reversed(undo.captured):
+            self._place_piece(position, piece)
+        self._move_piece(undo.end, undo.start)
+        self.turn = undo.turn
+        self._hash = undo.hash
+
+    def apply_captures(self, changed_position):
+        """
+        Apply orthogonal captures for soldiers and the king, then the capture of a
+        surrounded king
+        """
+        captures = self._orthogonal_capture(changed_position)
+        if self._king_surrounded_capture() or self._king is None:
+            captures = -1
+        return captures
+
+    def _king_surrounded_capture(self):
+        """
+        Where the king must be surrounded it is captured once every side is an
+        attacker or a hostile tile
+        """
+        if self._king is None:
+            return False
+        t = self.TABLES
+        king = self._king[0] * t.size + self._king[1]
+        if t.king_rule[king] != SURROUND:
+            return False
+        cells = self.pieces.ravel()
+        hostile = t.hostile
+        for n in t.adjacent[king]:
+            if cells[n] != ATTACKER and not (hostile[n] == ALWAYS or (hostile[n] and not cells[n])):
+                return False
+        self._remove_piece(self._king)
+        return True
+
+    def get_neighbourhood_sum(self, position):
+        """
+        Method that returns the + (up, down, right, left) neighbourhood sum of a position,
+        summing the float grid values
+        """
+        t = self.TABLES
+        cells = self.pieces.ravel().tolist()
+        return sum(TILE_VALUES[t.tile_codes[n]] + cells[n]
+                   for n in t.adjacent[position[0] * t.size + position[1]])
+
+    def _orthogonal_capture(self, changed_position):
+        """
+        A soldier is captured if its surrounded by two other soldiers, note that the capture needs to be
+        active: if a soldier places himself between two enemies its not captured.
+        We just need to check the piece orthogonal neighborhood: if an enemy is present then we need to
+        wether in the same axis there is another soldier and just in that case capture.
+
+        e.g. (S is newly moved soldier, s is for soldier, e for enemy)
+
+        ... | S | e | s | ...
+        => enemy is captured as there was already a soldier on his side on same the same axis
+
+        ... | s | S | e | ...
+        => enemy isnt captured as there isnt a soldier on his side on same the same axis
+
+        ... | s | E | s | ...
+        => enemy isnt captured as the capture is not active.
+
+        Hostile tiles act as an enemy.
+        e.g. (S is newly moved soldier, c for castle, e for enemy)
+        ... | c | e | S | ...
+        => enemy is captured
+        Neighbours come from the precomputed NEIGHBOURS table, so squares past the
+        board edges are never looked at.
+        """
+        t = self.TABLES
+        square = changed_position[0] * t.size + changed_position[1]
+        cells = self.pieces.ravel().tolist()
+        piece = cells[square]
+        armed = t.king_armed
+        if piece == KING and not armed:
+            return 0
+        hostile = t.hostile
+        king_rule = t.king_rule
+        captured = 0
+
+        for neighbour, other_side in t.neighbours[square]:
+            enemy = cells[neighbour]
+            # only an enemy with a square on its other side can be captured
+            if piece * enemy >= 0 or other_side < 0:
+                continue
+            # the king may have its own capture rules on this square
+            if enemy == KING and king_rule[neighbour] != CUSTODIAL:
+                continue
+            other = cells[other_side]
+            h = hostile[other_side]
+            if (other * enemy < 0 and (armed or other != KING)) or h == ALWAYS or (h and not other):
+                self._remove_piece(t.squares[neighbour])
+                captured += 1
+        return captured
+
+    def winning_condition(self):
+        """
+        Check if escape tiles are occupied by a king
+        """
+        return self._king in self.TABLES.escape_set
+
+    def lose_condition(self):
+        """
+        Check if king has been captured
+        """
+        return self._king is None
+
+    def draw_condition(self):
+        """
+        Twice the same state, side to move included
+        """
+        return self._repeated()
@@ -0,0 +1,376 @@
+from collections import namedtuple
+from multiprocessing import shared_memory, resource_tracker
+import multiprocessing
+import time
+import numpy as np
+from tablut.game import Player
+from tablut.util import encode_move, decode_move
+
+# Scores are from the point of view of the player to move
+WIN = 100000
+# Scores above this are wins found at some ply
+WIN_THRESHOLD = WIN - 1000
+INFINITY = WIN + 1
+
+# Transposition table bounds
+EXACT, LOWER, UPPER = 1, 2, 3
+
+SearchStats = namedtuple("SearchStats", [
+    "move", "score", "depth", "nodes", "seconds", "nodes_per_second",
+    "tt_probes", "tt_hits", "tt_hit_rate"])
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget is over
+    """
+    pass
+
+
+class TranspositionTable(object):
+    """
+    Fixed size hash table of search results keyed by position hash.
+    Each entry is two 64 bits words: the position hash and the packed
+    (score, depth, bound, move) data, so megabytes fixes the number of entries.
+    """
+    ENTRY_BYTES = 16
+
+    def __init__(self, megabytes=16):
+        entries = max(1, megabytes * 2 ** 20 // self.ENTRY_BYTES)
+        # power of two size so that the slot is just the low bits of the hash
+        self.size = 1 << (entries.bit_length() - 1)
+        self.keys = np.zeros(self.size, dtype=np.uint64)
+        self.data = np.zeros(self.size, dtype=np.uint64)
+        self.probes = 0
+        self.hits = 0
+
+    @staticmethod
+    def pack(depth, score, bound, move):
+        return (score + 2 ** 31) | depth << 32 | bound << 40 | move << 42
+
+    @staticmethod
+    def unpack(data):
+        return (data >> 32 & 0xFF, (data & 0xFFFFFFFF) - 2 ** 31, data >> 40 & 0x3, data >> 42)
+
+    def probe(self, key):
+        """
+        Return (depth, score, bound, move code) stored for key, None if missing
+        """
+        self.probes += 1
+        slot = key & (self.size - 1)
+        data = int(self.data[slot])
+        if data and int(self.keys[slot]) == key:
+            self.hits += 1
+            return self.unpack(data)
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """
+        Store a search result, a deeper result for the same position is kept
+        """
+        slot = key & (self.size - 1)
+        data = int(self.data[slot])
+        if data and int(self.keys[slot]) == key and self.unpack(data)[0] > depth:
+            return
+        self.keys[slot] = key
+        self.data[slot] = self.pack(depth, score, bound, move)
+
+    def clear(self):
+        self.keys[:] = 0
+        self.data[:] = 0
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Transposition table in shared memory, used by all the processes it is handed to
+    (pickling it only sends the shared memory name). Lock free: each entry stores
+    the hash xor the data, so an entry torn by concurrent writes doesn't match its
+    hash and reads as missing. The process creating it must call close() to free it.
+    """
+
+    def __init__(self, megabytes=16):
+        entries = max(1, megabytes * 2 ** 20 // self.ENTRY_BYTES)
+        self.size = 1 << (entries.bit_length() - 1)
+        self._memory = shared_memory.SharedMemory(create=True, size=self.size * self.ENTRY_BYTES)
+        self._owner = True
+        self._attach()
+        self.clear()
+
+    def _attach(self):
+        table = np.ndarray((self.size, 2), dtype=np.uint64, buffer=self._memory.buf)
+        self.keys = table[:, 0]
+        self.data = table[:, 1]
+        self.probes = 0
+        self.hits = 0
+
+    def __getstate__(self):
+        return {"name": self._memory.name, "size": self.size}
+
+    def __setstate__(self, state):
+        self.size = state["size"]
+        self._memory = shared_memory.SharedMemory(name=state["name"])
+        # the creating process owns the memory: don't let this process unlink it on exit
+        resource_tracker.unregister(self._memory._name, "shared_memory")
+        self._owner = False
+        self._attach()
+
+    def probe(self, key):
+        self.probes += 1
+        slot = key & (self.size - 1)
+        data = int(self.data[slot])
+        if data and int(self.keys[slot]) ^ data == key:
+            self.hits += 1
+            return self.unpack(data)
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        slot = key & (self.size - 1)
+        data = int(self.data[slot])
+        if data and int(self.keys[slot]) ^ data == key and self.unpack(data)[0] > depth:
+            return
+        data = self.pack(depth, score, bound, move)
+        self.keys[slot] = key ^ data
+        self.data[slot] = data
+
+    def close(self):
+        self.keys = self.data = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+def evaluate(board, player):
+    """
+    Static evaluation of board for player: material plus king freedom.
+    Works with any board exposing the piece counts, king position and rules tables.
+    """
+    king = board.king_position
+    score = 100 * board.white_count - 50 * board.black_count
+    if king is not None:
+        king_moves = board.piece_legal_moves(king)
+        escape_set = board.TABLES.escape_set
+        escapes = sum(1 for _, end in king_moves if end in escape_set)
+        score += 400 * escapes + 5 * len(king_moves)
+    return score if player is Player.WHITE else -score
+
+
+class AlphaBeta(object):
+    """
+    Iterative deepening alpha-beta (negamax) search on a board supporting
+    legal_moves, make_move/unmake_move and hash.
+    Moves are ordered by transposition table move, killer moves and history heuristic.
+    """
+
+    def __init__(self, tt=None, evaluate=evaluate, max_depth=64, stop=None):
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.evaluate = evaluate
+        self.max_depth = max_depth
+        # when set (e.g. a multiprocessing.Event) the search stops as if out of time
+        self.stop = stop
+        self.history = dict()
+        self.killers = [[None, None] for _ in range(max_depth + 1)]
+
+    def search(self, board, player, time_budget, max_depth=None, start_depth=1):
+        """
+        Search board for player until time_budget seconds are over (or stop is set),
+        deepening from start_depth. Returns the SearchStats of the last completed iteration
+        """
+        max_depth = min(max_depth or self.max_depth, self.max_depth)
+        self.board = board
+        # moves are stored in the table as codes of this board size
+        self.size = board.TABLES.size
+        self.nodes = 0
+        self.deadline = time.perf_counter() + time_budget
+        start = time.perf_counter()
+        probes, hits = self.tt.probes, self.tt.hits
+        self.killers = [[None, None] for _ in range(self.max_depth + 1)]
+        # keep some move ordering knowledge from the previous search
+        self.history = dict((move, value // 2) for move, value in self.history.items() if value > 1)
+
+        best_move, best_score, depth_reached = None, 0, 0
+        moves = board.legal_moves(player)
+        if moves:
+            best_move = moves[0]
+            for depth in range(min(start_depth, max_depth), max_depth + 1):
+                try:
+                    score = self._negamax(depth, -INFINITY, INFINITY, 0, player)
+                except SearchTimeout:
+                    break
+                best_move, best_score, depth_reached = self._root_move, score, depth
+                if abs(score) >= WIN_THRESHOLD:
+                    # forced result found, deeper won't change it
+                    break
+
+        seconds = time.perf_counter() - start
+        probes, hits = self.tt.probes - probes, self.tt.hits - hits
+        return SearchStats(best_move, best_score, depth_reached, self.nodes, seconds,
+                           self.nodes / seconds if seconds else 0.0,
+                           probes, hits, hits / probes if probes else 0.0)
+
+    def _ordered(self, moves, tt_move, ply):
+        killers = self.killers[ply]
+        history = self.history
+
+        def key(move):
+            if move == tt_move:
+                return -3 * INFINITY
+            if move == killers[0]:
+                return -2 * INFINITY
+            if move == killers[1]:
+                return -INFINITY
+            return -history.get(move, 0)
+        moves.sort(key=key)
+        return moves
+
+    def _negamax(self, depth, alpha, beta, ply, player):
+        self.nodes += 1
+        if not self.nodes & 255 and (time.perf_counter() > self.deadline or
+                                     self.stop is not None and self.stop.is_set()):
+            raise SearchTimeout
+
+        board = self.board
+        if ply > 0:
+            if board.winning_condition():
+                return WIN - ply if player is Player.WHITE else ply - WIN
+            if board.lose_condition():
+                return WIN - ply if player is Player.BLACK else ply - WIN
+            if board.draw_condition():
+                return 0
+        if depth == 0:
+            return self.evaluate(board, player)
+
+        key = board.hash
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            entry_depth, score, bound, code = entry
+            tt_move = decode_move(code, self.size)
+            if ply > 0 and entry_depth >= depth:
+                score = self._from_tt(score, ply)
+                if bound == EXACT:
+                    return score
+                elif bound == LOWER and score >= beta:
+                    return score
+                elif bound == UPPER and score <= alpha:
+                    return score
+
+        moves = board.legal_moves(player)
+        if not moves:
+            # a player unable to move loses
+            return ply - WIN
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, None
+        for move in self._ordered(moves, tt_move, ply):
+            undo = board.make_move(player, move[0], move[1], check_legal=False)
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1, player.next())
+            finally:
+                board.unmake_move(undo)
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._cutoff(move, depth, ply)
+                        break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, self._to_tt(best_score, ply), bound,
+                      encode_move(best_move, self.size))
+        if ply == 0:
+            self._root_move = best_move
+        return best_score
+
+    def _cutoff(self, move, depth, ply):
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    @staticmethod
+    def _to_tt(score, ply):
+        # wins are stored as distance from the stored position
+        if score >= WIN_THRESHOLD:
+            return score + ply
+        elif score <= -WIN_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _from_tt(score, ply):
+        if score >= WIN_THRESHOLD:
+            return score - ply
+        elif score <= -WIN_THRESHOLD:
+            return score + ply
+        return score
+
+
+# AlphaBeta of a LazySMP worker process
+_worker_search = None
+
+
+def _smp_worker_init(tt, stop, evaluate, max_depth):
+    global _worker_search
+    _worker_search = AlphaBeta(tt, evaluate, max_depth, stop)
+
+
+def _smp_search_task(task):
+    board, player, time_budget, max_depth, start_depth = task
+    return _worker_search.search(board, player, time_budget, max_depth, start_depth)
+
+
+class LazySMP(object):
+    """
+    Parallel search: processes - 1 worker processes search the same root as the
+    calling process, sharing a SharedTranspositionTable, so that each one finds the
+    results of the others in the table. Half of the workers deepen one ply ahead.
+    When the calling process search ends (time over or result found) stop is set
+    and every worker quits; the move of the deepest completed iteration is played.
+    Call close() to stop the workers and free the table.
+    """
+
+    def __init__(self, processes=2, tt_megabytes=16, evaluate=evaluate, max_depth=64):
+        self.processes = processes
+        self.tt = SharedTranspositionTable(tt_megabytes)
+        self.stop = multiprocessing.Event()
+        self.max_depth = max_depth
+        self.main = AlphaBeta(self.tt, evaluate, max_depth, self.stop)
+        self.pool = multiprocessing.Pool(processes - 1, _smp_worker_init,
+                                         (self.tt, self.stop, evaluate, max_depth))
+
+    def search(self, board, player, time_budget, max_depth=None):
+        """
+        Search board for player for time_budget seconds, returns the SearchStats of
+        the deepest search with nodes and probes summed over all processes
+        """
+        self.stop.clear()
+        tasks = [(board, player, time_budget, max_depth, 1 + i % 2)
+                 for i in range(1, self.processes)]
+        pending = self.pool.map_async(_smp_search_task, tasks)
+        try:
+            main = self.main.search(board, player, time_budget, max_depth)
+        finally:
+            self.stop.set()
+        results = [main] + pending.get()
+
+        best = max(results, key=lambda stats: stats.depth)
+        nodes = sum(stats.nodes for stats in results)
+        probes = sum(stats.tt_probes for stats in results)
+        hits = sum(stats.tt_hits for stats in results)
+        return SearchStats(best.move, best.score, best.depth, nodes, main.seconds,
+                           nodes / main.seconds if main.seconds else 0.0,
+                           probes, hits, hits / probes if probes else 0.0)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+            self.tt.close()
@@ -0,0 +1,149 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+import numpy as np
+from tablut.game import Game, Player
+from tablut.util import load_class
+import tablut.record as record
+import tablut.book
+
+
+def result_of(game):
+    """
+    Return "W" or "B" for the winner, "draw", or "unfinished" if the game was stopped
+    """
+    winner = game.winner
+    if winner is not None:
+        return winner.value
+    elif game.board.draw_condition():
+        return "draw"
+    else:
+        return "unfinished"
+
+
+def play_game(game, white, black, max_plies):
+    """
+    Let the white and black players (anything with a play() method) play on game
+    until it ends, a player is stuck or max_plies moves have been played
+    """
+    while not game.ended and len(game.moves) < max_plies:
+        played = len(game.moves)
+        if game.turn is Player.WHITE:
+            white.play()
+        else:
+            black.play()
+        if len(game.moves) == played:
+            # stuck player
+            break
+    return game
+
+
+def selfplay_game(task):
+    """
+    Pool worker: play a single seeded game and return its record.
+    task is (index, seed, white, black, board, max_plies, book)
+    """
+    index, seed, white_class, black_class, board_class, max_plies, book = task
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+
+    start = time.perf_counter()
+    game = Game(load_class(board_class)(), book)
+    white = load_class(white_class)(game, Player.WHITE)
+    black = load_class(black_class)(game, Player.BLACK)
+    play_game(game, white, black, max_plies)
+    return {
+        "game": index,
+        "seed": seed,
+        "white": white_class,
+        "black": black_class,
+        "result": result_of(game),
+        "plies": len(game.moves),
+        "moves": [[s[0], s[1], e[0], e[1]] for s, e in game.moves],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_selfplay(output, games, processes=None, seed=0,
+                 white="tablut.player:RandomPlayer", black="tablut.player:RandomPlayer",
+                 board="tablut.rules.ashton:Board", max_plies=500, report=None, book=None):
+    """
+    Play games over a process pool and append them to the output file as JSON lines
+    as soon as each one completes. Output files ending with tablut.record.SUFFIX
+    get binary game records instead.
+    Players and board are given as "package.module:Class" strings; game i is seeded
+    with seed + i, so results do not depend on how games are spread over workers.
+    report, if given, is called with the running stats after every game.
+    book is the path of an opening book (see tablut.book) the games are played with.
+    Returns the final stats: games, plies, seconds, games_per_second, plies_per_second
+    """
+    if book is not None:
+        # only the path is pickled, every worker maps the same file
+        book = tablut.book.OpeningBook(book)
+    tasks = [(i, seed + i, white, black, board, max_plies, book) for i in range(games)]
+    stats = {"games": 0, "plies": 0, "results": {}}
+    start = time.perf_counter()
+
+    if output.endswith(record.SUFFIX):
+        variant = load_class(board).TABLES.name
+        if variant not in record.VARIANTS:
+            raise ValueError("No record format for the %s variant" % variant)
+        out = record.RecordWriter(output)
+    else:
+        out = open(output, "a")
+
+    with out, multiprocessing.Pool(processes) as pool:
+        for game in pool.imap_unordered(selfplay_game, tasks):
+            if isinstance(out, record.RecordWriter):
+                out.write([((m[0], m[1]), (m[2], m[3])) for m in game["moves"]], game["result"],
+                          variant)
+            else:
+                out.write(json.dumps(game) + "\n")
+            out.flush()
+
+            stats["games"] += 1
+            stats["plies"] += game["plies"]
+            stats["results"][game["result"]] = stats["results"].get(game["result"], 0) + 1
+            elapsed = time.perf_counter() - start
+            stats["seconds"] = elapsed
+            stats["games_per_second"] = stats["games"] / elapsed
+            stats["plies_per_second"] = stats["plies"] / elapsed
+            if report is not None:
+                report(stats)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play tablut games in parallel")
+    parser.add_argument("output", help="JSON lines file games are appended to "
+                        "(binary game records for %s files)" % record.SUFFIX)
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--white", default="tablut.player:RandomPlayer")
+    parser.add_argument("--black", default="tablut.player:RandomPlayer")
+    parser.add_argument("--board", default="tablut.rules.ashton:Board")
+    parser.add_argument("--max-plies", type=int, default=500)
+    parser.add_argument("--book", default=None, help="opening book the players use")
+    parser.add_argument("--every", type=int, default=100,
+                        help="print progress every this many games")
+    args = parser.parse_args(argv)
+
+    def report(stats):
+        if stats["games"] % args.every == 0:
+            print("%(games)d games, %(games_per_second).1f games/s, "
+                  "%(plies_per_second).0f plies/s" % stats, file=sys.stderr)
+
+    stats = run_selfplay(args.output, args.games, args.processes, args.seed,
+                         args.white, args.black, args.board, args.max_plies, report, args.book)
+    print("%(games)d games, %(plies)d plies in %(seconds).1fs: "
+          "%(games_per_second).1f games/s, %(plies_per_second).0f plies/s" % stats)
+    print("results: %s" % json.dumps(stats["results"]))
+
+
+if __name__ == "__main__":
+    main()
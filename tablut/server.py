@@ -0,0 +1,313 @@
+"""
+asyncio game server hosting many concurrent games, and a load testing client.
+
+    tablut-server serve --port 5800
+    tablut-server loadtest --matches 1000 --concurrency 200
+
+The protocol follows the competition one: every message is a 4 bytes big endian
+length followed by UTF-8 JSON. A client opens with {"name": ..., "player": "WHITE"}
+(or "BLACK"), then receives the state, {"board": [[...]], "turn": "WHITE"}, after
+every move and answers with {"from": "e3", "to": "f3"} when it is its turn
+(columns a-i, rows 1-9). Each white client is matched with the next black one.
+An illegal or late move loses the game. The final state has turn WHITEWIN,
+BLACKWIN or DRAW and is followed by the server closing the connection.
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import random
+import struct
+import time
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_server as ashton_server
+from tablut.game import Game, Player
+
+LENGTH = struct.Struct(">I")
+COLUMNS = "abcdefghi"
+
+
+async def read_message(reader):
+    size = LENGTH.unpack(await reader.readexactly(LENGTH.size))[0]
+    return json.loads((await reader.readexactly(size)).decode())
+
+
+def write_message(writer, message):
+    data = json.dumps(message).encode()
+    writer.write(LENGTH.pack(len(data)) + data)
+
+
+def square_name(position):
+    return "%s%d" % (COLUMNS[position[1]], position[0] + 1)
+
+
+def parse_square(name):
+    """
+    (row, col) of a square name like "e3", ValueError if malformed
+    """
+    column = COLUMNS.find(name[:1].lower())
+    row = int(name[1:]) - 1
+    if column < 0 or not 0 <= row < 9:
+        raise ValueError("Bad square %r" % name)
+    return row, column
+
+
+def play_move(game, start, end):
+    """
+    Worker pool job: validate the move with is_legal and play it.
+    Returns the game (a copy of it with a process pool) and the rejection message,
+    empty if the move was played
+    """
+    legal, message = game.board.is_legal(game.turn, start, end)
+    if legal:
+        if game.turn is Player.WHITE:
+            game.white_move(start, end)
+        else:
+            game.black_move(start, end)
+    return game, message
+
+
+class GameServer(object):
+    """
+    Serve games of board_class boards. Rule evaluation runs on executor
+    (a thread pool of workers threads by default, a pool of processes worker
+    processes when processes is given) so the event loop keeps serving the other
+    games. Pure Python rule evaluation holds the GIL, so with threads a slow move
+    check still delays the other games; a process pool avoids this at the cost of
+    sending the game back and forth.
+    Clients waiting for an opponent are checked every waiting_poll seconds and
+    dropped once they disconnect.
+    """
+
+    def __init__(self, host="127.0.0.1", port=5800, board_class=ashton.Board,
+                 move_timeout=60.0, workers=None, executor=None, waiting_poll=1.0,
+                 processes=None):
+        self.host = host
+        self.port = port
+        self.board_class = board_class
+        self.move_timeout = move_timeout
+        self.waiting_poll = waiting_poll
+        if executor is None:
+            executor = (concurrent.futures.ProcessPoolExecutor(processes) if processes
+                        else concurrent.futures.ThreadPoolExecutor(workers))
+        self.executor = executor
+        self.waiting = {Player.WHITE: collections.deque(), Player.BLACK: collections.deque()}
+        self.stats = {"matches": 0, "finished": 0, "moves": 0, "results": {}}
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._connected, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def _connected(self, reader, writer):
+        try:
+            hello = await asyncio.wait_for(read_message(reader), self.move_timeout)
+            player = ashton_server.TURNS[hello["player"]]
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError,
+                ValueError, KeyError, TypeError):
+            writer.close()
+            return
+
+        done = asyncio.get_running_loop().create_future()
+        client = (reader, writer, hello.get("name", ""), done)
+        opponents = self.waiting[player.next()]
+        if opponents:
+            opponent = opponents.popleft()
+            clients = {player: client, player.next(): opponent}
+            asyncio.ensure_future(self._match(clients))
+        else:
+            self.waiting[player].append(client)
+        try:
+            # nothing reads a queued client, so look for its EOF until it is paired
+            while client in self.waiting[player]:
+                await asyncio.wait([done], timeout=self.waiting_poll)
+                if reader.at_eof():
+                    return
+            await done
+        finally:
+            if client in self.waiting[player]:
+                self.waiting[player].remove(client)
+            writer.close()
+
+    def _send(self, clients, game, turn):
+        message = ashton_server.format_state(game.board.pieces, turn)
+        for _, writer, _, _ in clients.values():
+            write_message(writer, message)
+
+    async def _match(self, clients):
+        self.stats["matches"] += 1
+        loop = asyncio.get_running_loop()
+        game = Game(self.board_class())
+        result = None
+        try:
+            self._send(clients, game, game.turn.name)
+            while result is None:
+                player = game.turn
+                reader = clients[player][0]
+                try:
+                    message = await asyncio.wait_for(read_message(reader), self.move_timeout)
+                    start, end = parse_square(message["from"]), parse_square(message["to"])
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError,
+                        ValueError, KeyError, TypeError):
+                    # late, disconnected or talking nonsense: the player loses
+                    result = player.next().name + "WIN"
+                    break
+
+                game, rejected = await loop.run_in_executor(
+                    self.executor, play_move, game, start, end)
+                if rejected:
+                    result = player.next().name + "WIN"
+                    break
+                self.stats["moves"] += 1
+                if game.board.winning_condition():
+                    result = "WHITEWIN"
+                elif game.board.lose_condition():
+                    result = "BLACKWIN"
+                elif game.board.draw_condition():
+                    result = "DRAW"
+                else:
+                    self._send(clients, game, game.turn.name)
+            self._send(clients, game, result)
+            for _, writer, _, _ in clients.values():
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.stats["finished"] += 1
+            self.stats["results"][result] = self.stats["results"].get(result, 0) + 1
+            for _, _, _, done in clients.values():
+                if not done.done():
+                    done.set_result(result)
+
+
+async def random_client(host, port, player, name="random", rnd=random):
+    """
+    Play random legal moves for player until the game ends.
+    Returns the final turn and the seconds waited for the server after each move
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies = list()
+    try:
+        write_message(writer, {"name": name, "player": player.name})
+        sent = None
+        while True:
+            state = await read_message(reader)
+            if sent is not None:
+                latencies.append(time.perf_counter() - sent)
+                sent = None
+            turn = ashton_server.parse_turn(state)
+            if turn is None:
+                return state["turn"], latencies
+            if turn is player:
+                moves = ashton_server.parse_board(state).legal_moves(player)
+                if not moves:
+                    # stuck, leaving loses the game
+                    return player.next().name + "WIN", latencies
+                start, end = rnd.choice(moves)
+                write_message(writer, {"from": square_name(start), "to": square_name(end),
+                                       "turn": player.name})
+                sent = time.perf_counter()
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, matches, concurrency=100, seed=0):
+    """
+    Play matches random games against the server, concurrency of them at a time.
+    Returns matches per second and the move latency percentiles
+    """
+    rnd = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = list()
+    results = dict()
+
+    async def match(i):
+        async with semaphore:
+            white = random_client(host, port, Player.WHITE, "white-%d" % i, rnd)
+            black = random_client(host, port, Player.BLACK, "black-%d" % i, rnd)
+            for result, waits in await asyncio.gather(white, black):
+                latencies.extend(waits)
+            results[result] = results.get(result, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[match(i) for i in range(matches)])
+    seconds = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+    return {
+        "matches": matches,
+        "seconds": seconds,
+        "matches_per_second": matches / seconds,
+        "moves": len(latencies),
+        "latency_p50_ms": 1000 * percentile(0.5),
+        "latency_p99_ms": 1000 * percentile(0.99),
+        "latency_max_ms": 1000 * (latencies[-1] if latencies else 0.0),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tablut game server")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    serve_parser = commands.add_parser("serve", help="run the game server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=5800)
+    serve_parser.add_argument("--move-timeout", type=float, default=60.0)
+    serve_parser.add_argument("--workers", type=int, default=None, help="rule evaluation threads")
+    serve_parser.add_argument("--processes", type=int, default=None,
+                              help="evaluate the rules on this many processes instead of threads")
+
+    load_parser = commands.add_parser(
+        "loadtest", help="play random matches against a server, a local one if no port is given")
+    load_parser.add_argument("--host", default="127.0.0.1")
+    load_parser.add_argument("--port", type=int, default=None)
+    load_parser.add_argument("-n", "--matches", type=int, default=100)
+    load_parser.add_argument("-c", "--concurrency", type=int, default=100)
+    load_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = await GameServer(args.host, args.port, move_timeout=args.move_timeout,
+                                  workers=args.workers, processes=args.processes).start()
+        print("serving on %s:%d" % (args.host, server.port))
+        await server.serve_forever()
+
+    async def load():
+        server = None
+        port = args.port
+        if port is None:
+            server = await GameServer(args.host, 0).start()
+            port = server.port
+        try:
+            stats = await load_test(args.host, port, args.matches, args.concurrency, args.seed)
+        finally:
+            if server is not None:
+                await server.close()
+        print("%(matches)d matches in %(seconds).1fs: %(matches_per_second).1f matches/s, "
+              "move latency p50 %(latency_p50_ms).2fms p99 %(latency_p99_ms).2fms "
+              "max %(latency_max_ms).2fms" % stats)
+        print("results: %s" % json.dumps(stats["results"]))
+
+    try:
+        asyncio.run(serve() if args.command == "serve" else load())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Tournaments between players: round robin or gauntlet, Elo estimates and SPRT.
+
+    tablut-tournament new:Player old:Player -o match.jsonl -n 1000 --sprt
+
+Players are "package.module:Class" strings of classes with the tablut.player
+interface (built with (game, player), play() makes a move). Every pair plays games
+alternating colours, spread over a process pool; each finished game is appended
+to the output file as a JSON line, as in tablut-selfplay. Games stopped at
+max_plies count as draws.
+
+With sprt, the games of a pair stop as soon as a sequential probability ratio
+test tells whether the first player is elo1 or elo0 Elo stronger than the second,
+with the given error rates.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import queue
+import random
+import sys
+import time
+import tablut.selfplay as selfplay
+
+# score of the first player of a pair for each result, when it plays white or black
+SCORES = {"W": (1.0, 0.0), "B": (0.0, 1.0), "draw": (0.5, 0.5), "unfinished": (0.5, 0.5)}
+
+
+def elo(score):
+    """
+    Elo difference giving the expected score (0 < score < 1)
+    """
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def expected_score(elo_difference):
+    return 1.0 / (1.0 + 10 ** (-elo_difference / 400.0))
+
+
+class PairStats(object):
+    """
+    Results of the first player of a pair against the second one
+    """
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        self.wins = self.draws = self.losses = 0
+        # "H1", "H0" once the SPRT concluded
+        self.sprt = None
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self):
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.5
+
+    def add(self, score):
+        if score == 1.0:
+            self.wins += 1
+        elif score == 0.0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def _variance(self):
+        """
+        Variance of the score of one game, counting one more virtual win and loss
+        so that it is never 0 (all wins, all draws or all losses)
+        """
+        wins, losses = self.wins + 1, self.losses + 1
+        games = wins + self.draws + losses
+        s = (wins + 0.5 * self.draws) / games
+        return (wins * (1 - s) ** 2 + self.draws * (0.5 - s) ** 2 + losses * s ** 2) / games
+
+    def elo(self, z=1.96):
+        """
+        Elo difference and the bounds of its confidence interval (z = 1.96 for 95%)
+        """
+        if not self.games:
+            return 0.0, -math.inf, math.inf
+        margin = z * math.sqrt(self._variance() / self.games)
+        return elo(self.score), elo(self.score - margin), elo(self.score + margin)
+
+    def llr(self, elo0, elo1):
+        """
+        Log likelihood ratio of elo1 against elo0 (normal approximation of the
+        game scores, as in the generalized SPRT)
+        """
+        if not self.games:
+            return 0.0
+        s0, s1 = expected_score(elo0), expected_score(elo1)
+        return self.games * (s1 - s0) * (2 * self.score - s0 - s1) / (2 * self._variance())
+
+
+def game_seed(seed, pair, k):
+    """
+    Seed of game k of the pair-th pair, independent of the other games and pairs
+    """
+    return random.Random("%d:%d:%d" % (seed, pair, k)).getrandbits(63)
+
+
+def pairings(players, gauntlet=False):
+    """
+    (first, second) player pairs: every pair, or the first player against each other one
+    """
+    if gauntlet:
+        return [(players[0], other) for other in players[1:]]
+    return [(a, b) for i, a in enumerate(players) for b in players[i + 1:]]
+
+
+def run_tournament(players, output, games=100, gauntlet=False, processes=None, seed=0,
+                   board="tablut.rules.ashton:Board", max_plies=500, sprt=None, report=None):
+    """
+    Play games games between every pair of players (games/2 with each colour) over a
+    process pool, appending them to output as JSON lines as they complete.
+    sprt is None or (elo0, elo1, alpha, beta): the games of a pair stop once the test
+    accepts H1 (first player elo1 stronger) or H0 (elo0 stronger).
+    report, if given, is called with the PairStats after every game.
+    Game k of the pair-th pair is seeded with game_seed(seed, pair, k), so no two
+    games share their random choices.
+    Returns the list of PairStats
+    """
+    stats = [PairStats(first, second) for first, second in pairings(players, gauntlet)]
+    if sprt is not None:
+        elo0, elo1, alpha, beta = sprt
+        lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+    # (pair, first plays white, selfplay task), colours alternate game by game
+    pending = [(pair, k % 2 == 0,
+                (k * len(stats) + i, game_seed(seed, i, k),
+                 pair.first if k % 2 == 0 else pair.second,
+                 pair.second if k % 2 == 0 else pair.first,
+                 board, max_plies, None))
+               for k in range(games) for i, pair in enumerate(stats)]
+    pending.reverse()
+    done = queue.Queue()
+    processes = processes or multiprocessing.cpu_count()
+
+    with open(output, "a") as out, multiprocessing.Pool(processes) as pool:
+        running = 0
+        while pending or running:
+            # keep every worker busy, but don't queue games a SPRT may make useless
+            while pending and running < 2 * processes:
+                pair, first_white, task = pending.pop()
+                if pair.sprt is not None:
+                    continue
+                pool.apply_async(selfplay.selfplay_game, (task,),
+                                 callback=lambda game, pair=pair, first_white=first_white:
+                                 done.put((pair, first_white, game)),
+                                 error_callback=lambda e: done.put((None, None, e)))
+                running += 1
+            if not running:
+                break
+
+            pair, first_white, game = done.get()
+            running -= 1
+            if pair is None:
+                raise game
+            game.update(first=pair.first, second=pair.second)
+            out.write(json.dumps(game) + "\n")
+            out.flush()
+            if pair.sprt is not None:
+                # game started before the test concluded
+                continue
+            pair.add(SCORES[game["result"]][0 if first_white else 1])
+            if sprt is not None:
+                llr = pair.llr(elo0, elo1)
+                if llr >= upper:
+                    pair.sprt = "H1"
+                elif llr <= lower:
+                    pair.sprt = "H0"
+            if report is not None:
+                report(pair)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a tournament between tablut players")
+    parser.add_argument("players", nargs="+", help="package.module:Class of each player")
+    parser.add_argument("-o", "--output", required=True, help="JSON lines file games are appended to")
+    parser.add_argument("-n", "--games", type=int, default=100, help="games per pair")
+    parser.add_argument("--gauntlet", action="store_true",
+                        help="the first player against each other one, instead of round robin")
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--board", default="tablut.rules.ashton:Board")
+    parser.add_argument("--max-plies", type=int, default=500)
+    parser.add_argument("--sprt", action="store_true", help="stop pairs with a SPRT")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--every", type=int, default=10, help="print progress every this many games")
+    args = parser.parse_args(argv)
+    if len(args.players) < 2:
+        parser.error("at least two players are needed")
+
+    start = time.perf_counter()
+
+    def report(pair):
+        if pair.games % args.every == 0 or pair.sprt:
+            print("%s vs %s: %d games, +%d =%d -%d" % (
+                pair.first, pair.second, pair.games, pair.wins, pair.draws, pair.losses),
+                file=sys.stderr)
+
+    sprt = (args.elo0, args.elo1, args.alpha, args.beta) if args.sprt else None
+    results = run_tournament(args.players, args.output, args.games, args.gauntlet, args.processes,
+                             args.seed, args.board, args.max_plies, sprt, report)
+    for pair in results:
+        estimate, low, high = pair.elo()
+        print("%s vs %s: %d games, +%d =%d -%d, score %.3f, Elo %+.1f [%+.1f, %+.1f]%s" % (
+            pair.first, pair.second, pair.games, pair.wins, pair.draws, pair.losses,
+            pair.score, estimate, low, high,
+            ", SPRT accepted %s" % pair.sprt if pair.sprt else ""))
+    print("%.1fs" % (time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Helpers shared by the tools: loading classes by name, the compact move codec
+used by transposition tables, game records and opening books, and seeded random
+games for tests and benchmarks.
+"""
+from collections import namedtuple
+import importlib
+import random
+from tablut.game import Player
+
+RandomGame = namedtuple("RandomGame", ["moves", "boards", "result"])
+
+
+def load_class(path):
+    """
+    Load a class from a "package.module:Class" string
+    """
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def encode_move(move, size=9):
+    """
+    Pack a ((si, sj), (ei, ej)) move of a size x size board in a positive integer,
+    0 is no move. Codes fit in 16 bits up to 15x15 boards
+    """
+    (si, sj), (ei, ej) = move
+    return (si * size + sj) * size * size + ei * size + ej + 1
+
+
+def decode_move(code, size=9):
+    """
+    Inverse of encode_move, None for 0
+    """
+    if not code:
+        return None
+    start, end = divmod(code - 1, size * size)
+    return (start // size, start % size), (end // size, end % size)
+
+
+def random_game(board_class, seed, plies, avoid_end=False):
+    """
+    Play up to plies random legal moves (seeded with seed) from the opening of a new
+    board_class board, stopping when the game ends or the player to move is stuck.
+    With avoid_end the moves ending the game are skipped instead, so that long games
+    come with a long history.
+    Returns the moves, copies of the boards from the opening to the last move and the
+    result ("W", "B", "draw" or "unfinished")
+    """
+    rnd = random.Random(seed)
+    board = board_class()
+    player = Player.WHITE
+    moves, boards, result = list(), [board.copy()], "unfinished"
+    for _ in range(plies):
+        candidates = board.legal_moves(player)
+        rnd.shuffle(candidates)
+        for move in candidates:
+            undo = board.make_move(player, *move, check_legal=False)
+            if board.winning_condition():
+                result = "W"
+            elif board.lose_condition():
+                result = "B"
+            elif board.draw_condition():
+                result = "draw"
+            if not avoid_end or result == "unfinished":
+                break
+            board.unmake_move(undo)
+            result = "unfinished"
+        else:
+            # stuck, or every move ends the game
+            break
+        moves.append(move)
+        boards.append(board.copy())
+        if result != "unfinished":
+            break
+        player = player.next()
+    return RandomGame(moves, boards, result)
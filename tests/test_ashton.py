@@ -1,5 +1,8 @@
+import random
 import unittest
+import numpy as np
 import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
 from tablut.board import WinException, LoseException, DrawException
 from tablut.game import Player
 
@@ -197,6 +200,27 @@ class AshtonCaptureTest(unittest.TestCase):
         self.assertTrue(board.board[4][3] == 0)
 
 
+class AshtonCaptureTablesTest(unittest.TestCase):
+    def test_neighbour_tables(self):
+        self.assertEqual(ashton.NEIGHBOURS[0], ((1, 2), (9, 18)))
+        self.assertEqual(ashton.NEIGHBOURS[1], ((2, 3), (10, 19), (0, -1)))
+        self.assertEqual(len(ashton.NEIGHBOURS[40]), 4)
+        self.assertEqual(ashton.ADJACENT[80], (71, 79))
+
+    def test_no_capture_across_edges(self):
+        board = ashton.Board()
+        # the black soldier in (3, 0) has no square past the left edge
+        undo = board.make_move(Player.WHITE, (3, 4), (3, 1))
+        self.assertEqual(undo.captured, [])
+        self.assertEqual(board.board[3][0], -2.5)
+
+    def test_neighbourhood_sum(self):
+        board = ashton.Board()
+        self.assertAlmostEqual(board.get_neighbourhood_sum((4, 4)), 8)
+        self.assertAlmostEqual(board.get_neighbourhood_sum((0, 0)), 0)
+        self.assertAlmostEqual(board.get_neighbourhood_sum((4, 1)), -2.5 + 2)
+
+
 class AshtonEndConditionTest(unittest.TestCase):
     def test_white_win(self):
         board = ashton.Board()
@@ -226,6 +250,231 @@ class AshtonEndConditionTest(unittest.TestCase):
             board.step(Player.BLACK, (7, 4), (5, 4))
 
 
+class AshtonMoveGenerationTest(unittest.TestCase):
+    def _brute_force_moves(self, board, player):
+        squares = [(i, j) for i in range(9) for j in range(9)]
+        return set((start, end) for start in squares for end in squares
+                   if board.is_legal(player, start, end)[0])
+
+    def test_opening_moves(self):
+        board = ashton.Board()
+        for player in (Player.WHITE, Player.BLACK):
+            self.assertEqual(set(board.legal_moves(player)),
+                             self._brute_force_moves(board, player))
+
+    def test_moves_match_is_legal_during_game(self):
+        rnd = random.Random(42)
+        board = ashton.Board()
+        player = Player.WHITE
+        for _ in range(40):
+            moves = board.legal_moves(player)
+            self.assertEqual(set(moves), self._brute_force_moves(board, player))
+            try:
+                board.step(player, *rnd.choice(moves))
+            except (WinException, LoseException, DrawException):
+                break
+            player = player.next()
+
+    def test_piece_legal_moves(self):
+        board = ashton.Board()
+        self.assertEqual(sorted(board.piece_legal_moves((0, 3))),
+                         [((0, 3), (0, 0)), ((0, 3), (0, 1)), ((0, 3), (0, 2)),
+                          ((0, 3), (1, 3)), ((0, 3), (2, 3)), ((0, 3), (3, 3))])
+        # the king is surrounded by its soldiers
+        self.assertEqual(board.piece_legal_moves((4, 4)), [])
+
+
+class AshtonHashTest(unittest.TestCase):
+    def test_hash_is_incremental(self):
+        board = ashton.Board()
+        board.step(Player.BLACK, (3, 0), (3, 2))
+        board.step(Player.BLACK, (5, 0), (5, 2))
+        incremental = board.hash
+        board.rehash()
+        self.assertEqual(incremental, board.hash)
+
+    def test_transposition(self):
+        board1 = ashton.Board()
+        board1.step(Player.WHITE, (2, 4), (2, 3))
+        board1.step(Player.BLACK, (0, 5), (1, 5))
+        board1.step(Player.WHITE, (6, 4), (6, 3))
+        board2 = ashton.Board()
+        board2.step(Player.WHITE, (6, 4), (6, 3))
+        board2.step(Player.BLACK, (0, 5), (1, 5))
+        board2.step(Player.WHITE, (2, 4), (2, 3))
+        self.assertEqual(board1.hash, board2.hash)
+
+    def test_side_to_move(self):
+        board = ashton.Board()
+        initial = board.hash
+        board.step(Player.WHITE, (2, 4), (2, 3))
+        board.step(Player.WHITE, (2, 3), (2, 4))
+        # same pieces but black to move
+        self.assertNotEqual(board.hash, initial)
+        self.assertFalse(board.draw_condition())
+
+    def test_draw(self):
+        board = ashton.Board()
+        board.step(Player.WHITE, (2, 4), (2, 3))
+        board.step(Player.BLACK, (0, 5), (1, 5))
+        board.step(Player.WHITE, (2, 3), (2, 2))
+        board.step(Player.BLACK, (1, 5), (1, 6))
+        board.step(Player.WHITE, (2, 2), (2, 3))
+        with self.assertRaises(DrawException):
+            board.step(Player.BLACK, (1, 6), (1, 5))
+        self.assertTrue(board.draw_condition())
+
+    def test_bitboard_same_hash(self):
+        board = ashton.Board()
+        bitboard = ashton_bitboard.Board()
+        for start, end, player in [((3, 0), (3, 2), Player.BLACK),
+                                   ((5, 0), (5, 2), Player.BLACK),
+                                   ((2, 4), (2, 1), Player.WHITE)]:
+            board.step(player, start, end)
+            bitboard.step(player, start, end)
+            self.assertEqual(board.hash, bitboard.hash)
+
+
+class AshtonMakeUnmakeTest(unittest.TestCase):
+    def _state(self, board):
+        return (board.board.tolist(), board.hash, board.turn, board.hash_history,
+                board.history, board.board_history)
+
+    def _check_unmake(self, board_class):
+        rnd = random.Random(3)
+        board = board_class()
+        player = Player.WHITE
+        for _ in range(30):
+            moves = board.legal_moves(player)
+            state = self._state(board)
+            # probe every move and take it back
+            for start, end in moves:
+                undo = board.make_move(player, start, end)
+                board.unmake_move(undo)
+            self.assertEqual(self._state(board), state)
+            try:
+                board.step(player, *rnd.choice(moves))
+            except (WinException, LoseException, DrawException):
+                break
+            player = player.next()
+
+    def test_unmake_restores_state(self):
+        self._check_unmake(ashton.Board)
+
+    def test_bitboard_unmake_restores_state(self):
+        self._check_unmake(ashton_bitboard.Board)
+
+    def test_undo_records_captures(self):
+        board = ashton.Board()
+        board.step(Player.BLACK, (3, 0), (3, 2))
+        undo = board.make_move(Player.BLACK, (5, 0), (5, 2))
+        self.assertEqual(undo.piece, -2)
+        self.assertEqual(undo.captured, [((4, 2), 2)])
+        self.assertEqual(board.board[4][2], 0)
+        board.unmake_move(undo)
+        self.assertEqual(board.board[4][2], 2)
+        self.assertEqual(board.board[5][0], -2.5)
+
+    def test_make_move_does_not_raise_on_end(self):
+        board = ashton.Board()
+        board.board[3][4] = board.board[3][4] - int(board.board[3][4])
+        board.board[2][4] = board.board[2][4] - int(board.board[2][4])
+        board.rehash()
+        board.step(Player.WHITE, (4, 4), (2, 4))
+        undo = board.make_move(Player.WHITE, (2, 4), (2, 8))
+        self.assertTrue(board.winning_condition())
+        board.unmake_move(undo)
+        self.assertFalse(board.winning_condition())
+
+
+class AshtonPieceTrackingTest(unittest.TestCase):
+    def _counts(self, board):
+        pieces = board.board.astype(int)
+        king = list(zip(*np.where(pieces == 1)))
+        return (king[0] if king else None,
+                int((pieces == 2).sum()), int((pieces == -2).sum()))
+
+    def test_opening(self):
+        for board in (ashton.Board(), ashton_bitboard.Board()):
+            self.assertEqual(board.king_position, (4, 4))
+            self.assertEqual(board.white_count, 8)
+            self.assertEqual(board.black_count, 16)
+
+    def test_tracking_during_game(self):
+        rnd = random.Random(11)
+        board = ashton.Board()
+        player = Player.WHITE
+        for _ in range(80):
+            moves = board.legal_moves(player)
+            undo = board.make_move(player, *rnd.choice(moves))
+            board.unmake_move(undo)
+            self.assertEqual((board.king_position, board.white_count, board.black_count),
+                             self._counts(board))
+            try:
+                board.step(player, *rnd.choice(moves))
+            except (WinException, LoseException, DrawException):
+                break
+            self.assertEqual((board.king_position, board.white_count, board.black_count),
+                             self._counts(board))
+            player = player.next()
+
+    def test_king_captured(self):
+        board = ashton.Board()
+        for i, j in [(4, 2), (4, 3), (4, 5), (4, 6), (2, 4), (3, 4), (5, 4), (6, 4)]:
+            board.board[i][j] = board.board[i][j] - int(board.board[i][j])
+        board.rehash()
+        self.assertEqual(board.white_count, 0)
+        board.step(Player.BLACK, (4, 1), (4, 3))
+        board.step(Player.BLACK, (4, 7), (4, 5))
+        board.step(Player.BLACK, (1, 4), (3, 4))
+        with self.assertRaises(LoseException):
+            board.step(Player.BLACK, (7, 4), (5, 4))
+        self.assertIsNone(board.king_position)
+        self.assertTrue(board.lose_condition())
+
+
+class AshtonEncodingTest(unittest.TestCase):
+    def test_float_view(self):
+        board = ashton.Board()
+        self.assertEqual(board.pieces.dtype, np.int8)
+        self.assertEqual(board.pack(board.board), board.BOARD_TEMPLATE)
+        self.assertEqual(board.board[4][4], 1.7)
+        self.assertEqual(board.board[0][4], -2.5)
+        self.assertEqual(board.pieces[0][4], -2)
+
+    def test_writes_update_board(self):
+        board = ashton.Board()
+        board.board[2][4] = board.board[2][4] - int(board.board[2][4])
+        self.assertEqual(board.pieces[2][4], 0)
+        self.assertEqual(board.white_count, 7)
+        fresh = ashton.Board()
+        fresh.pieces[2][4] = 0
+        fresh.rehash()
+        self.assertEqual(board.hash, fresh.hash)
+
+        # copies are detached from the board
+        grid = board.board.copy()
+        grid[3][4] = 0
+        self.assertEqual(board.pieces[3][4], 2)
+
+    def test_stale_grid_writes_are_refused(self):
+        board = ashton.Board()
+        grid = board.board
+        board.step(Player.WHITE, (2, 4), (2, 3))
+        with self.assertRaises(ValueError):
+            grid[8][8] = grid[8][8]
+        self.assertEqual(board.pieces[2][3], 2)
+        self.assertEqual(board.pieces[2][4], 0)
+
+    def test_rounding(self):
+        board = ashton.Board()
+        grid = board.board
+        # values off by float rounding still decode to the right pieces
+        board.board = grid * (1 + 1e-12)
+        self.assertEqual(board.pieces.tolist(), ashton.Board().pieces.tolist())
+        self.assertEqual(board.king_position, (4, 4))
+
+
 class AshtonUtils(unittest.TestCase):
     def test_infer_move(self):
         board1 = ashton.Board()
@@ -0,0 +1,72 @@
+import random
+import unittest
+import numpy as np
+import tablut.rules.ashton_batch as ashton_batch
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.game import Player
+from tablut.util import random_game
+
+
+def random_positions(count, seed=5):
+    """
+    Play random games on the bitboard backend and collect (board, player) pairs
+    """
+    rnd = random.Random(seed)
+    positions = list()
+    for _ in range(count):
+        board = random_game(ashton_bitboard.Board, rnd.getrandbits(32), rnd.randint(0, 60)).boards[-1]
+        positions.append((board, board.turn))
+    return positions
+
+
+class AshtonBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.positions = random_positions(40)
+        self.boards = np.stack([board.board for board, _ in self.positions])
+
+    def test_legal_destinations(self):
+        for player in (Player.WHITE, Player.BLACK):
+            destinations = ashton_batch.legal_destinations(self.boards, player)
+            for n, (board, _) in enumerate(self.positions):
+                moves = set(zip(*[tuple(x) for x in np.argwhere(destinations[n]).T]))
+                expected = set((s[0], s[1], e[0], e[1]) for s, e in board.legal_moves(player))
+                self.assertEqual(moves, expected)
+
+    def test_apply_moves(self):
+        rnd = random.Random(1)
+        moves = list()
+        expected = list()
+        expected_captures = list()
+        for board, player in self.positions:
+            start, end = rnd.choice(board.legal_moves(player) or [((4, 4), (4, 4))])
+            moves.append((start[0], start[1], end[0], end[1]))
+            pieces = board.white_count + board.black_count + (board.king_position is not None)
+            if start != end:
+                board.make_move(player, start, end, check_legal=False)
+            expected.append(board.board)
+            expected_captures.append(
+                pieces - board.white_count - board.black_count - (board.king_position is not None))
+        boards, captures = ashton_batch.apply_moves(self.boards, moves)
+        self.assertTrue(np.array_equal(boards, np.stack(expected)))
+        self.assertEqual(captures.tolist(), expected_captures)
+
+    def test_end_conditions(self):
+        history = set()
+        for board, _ in self.positions[:10]:
+            history.update(board.hash_history)
+        black_to_move = [board.turn is Player.BLACK for board, _ in self.positions]
+        win, lose, draw = ashton_batch.end_conditions(self.boards, black_to_move, history)
+        for n, (board, _) in enumerate(self.positions):
+            self.assertEqual(win[n], board.winning_condition())
+            self.assertEqual(lose[n], board.lose_condition())
+            self.assertEqual(draw[n], board.hash in history)
+        self.assertTrue(draw[:10].all())
+
+    def test_hashes(self):
+        black_to_move = [board.turn is Player.BLACK for board, _ in self.positions]
+        self.assertEqual(ashton_batch.hashes(self.boards, black_to_move).tolist(),
+                         [board.hash for board, _ in self.positions])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import random
+import unittest
+import numpy as np
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.board import WinException, LoseException, DrawException
+from tablut.game import Player
+
+
+def clear(board, *positions):
+    """
+    Remove the pieces in positions going through the float grid view
+    """
+    grid = board.board
+    for i, j in positions:
+        grid[i][j] = grid[i][j] - int(grid[i][j])
+    board.board = grid
+
+
+CASTLE_GUARDS = [(4, 2), (4, 3), (4, 5), (4, 6), (2, 4), (3, 4), (5, 4), (6, 4)]
+
+
+class BitboardApiTest(unittest.TestCase):
+    def test_same_opening_as_ashton(self):
+        self.assertTrue(np.array_equal(
+            ashton_bitboard.Board().board, ashton.Board().board))
+        self.assertEqual(ashton_bitboard.Board().pack(ashton_bitboard.Board().board),
+                         ashton.Board().BOARD_TEMPLATE)
+
+    def test_same_moves_as_ashton(self):
+        board = ashton.Board()
+        bitboard = ashton_bitboard.Board()
+        for start, end, player in [((0, 3), (1, 3), Player.BLACK),
+                                   ((2, 4), (2, 1), Player.WHITE),
+                                   ((3, 0), (3, 2), Player.BLACK)]:
+            board.step(player, start, end)
+            bitboard.step(player, start, end)
+            self.assertTrue(np.array_equal(board.board, bitboard.board))
+            for p in (Player.WHITE, Player.BLACK):
+                self.assertEqual(set(board.legal_moves(p)), set(bitboard.legal_moves(p)))
+
+    def test_same_games_as_ashton(self):
+        for seed in range(20):
+            rnd = random.Random(seed)
+            board = ashton.Board()
+            bitboard = ashton_bitboard.Board()
+            player = Player.WHITE
+            for _ in range(100):
+                moves = board.legal_moves(player)
+                self.assertEqual(set(moves), set(bitboard.legal_moves(player)))
+                if not moves:
+                    break
+                start, end = rnd.choice(moves)
+                undo = board.make_move(player, start, end, check_legal=False)
+                self.assertEqual(undo.captured,
+                                 bitboard.make_move(player, start, end, check_legal=False).captured)
+                self.assertTrue(np.array_equal(board.board, bitboard.board))
+                self.assertEqual(board.hash, bitboard.hash)
+                if board.winning_condition() or board.lose_condition() or board.draw_condition():
+                    break
+                player = player.next()
+
+    def test_moves_match_is_legal_during_game(self):
+        rnd = random.Random(7)
+        board = ashton_bitboard.Board()
+        squares = [(i, j) for i in range(9) for j in range(9)]
+        player = Player.WHITE
+        for _ in range(40):
+            moves = board.legal_moves(player)
+            self.assertEqual(set(moves), set(
+                (s, e) for s in squares for e in squares if board.is_legal(player, s, e)[0]))
+            try:
+                board.step(player, *rnd.choice(moves))
+            except (WinException, LoseException, DrawException):
+                break
+            player = player.next()
+
+    def test_illegal_step(self):
+        board = ashton_bitboard.Board()
+        with self.assertRaises(ValueError):
+            board.step(Player.WHITE, (1, 4), (1, 0))
+        legal, _ = board.is_legal(Player.BLACK, (3, 0), (5, 0))
+        self.assertFalse(legal)
+
+    def test_board_history(self):
+        board = ashton_bitboard.Board()
+        board.step(Player.BLACK, (0, 3), (1, 3))
+        self.assertEqual(len(board.board_history), 2)
+        self.assertEqual(board.board_history[-1][1][3], "TB")
+
+    def test_grid_writes_reach_the_board(self):
+        board = ashton_bitboard.Board()
+        grid = board.board
+        grid[2][4] = 0
+        self.assertEqual(board.white_count, 7)
+        self.assertEqual(board.board[2][4], 0)
+        reference = ashton.Board()
+        reference.board = board.board
+        self.assertEqual(board.hash, reference.hash)
+        board.step(Player.BLACK, (0, 3), (1, 3))
+        with self.assertRaises(ValueError):
+            grid[3][4] = 0
+
+
+class BitboardCaptureTest(unittest.TestCase):
+    def test_simple_active_capture(self):
+        board = ashton_bitboard.Board()
+        board.step(Player.BLACK, (3, 0), (3, 2))
+        board.step(Player.BLACK, (5, 0), (5, 2))
+        self.assertEqual(board.board[4][2], 0)
+
+    def test_simple_non_active_capture(self):
+        board = ashton_bitboard.Board()
+        board.step(Player.BLACK, (1, 4), (1, 1))
+        board.step(Player.BLACK, (4, 1), (3, 1))
+        board.step(Player.WHITE, (2, 4), (2, 1))
+        self.assertNotEqual(board.board[2][1], 0)
+
+    def test_camp_side_capture(self):
+        board = ashton_bitboard.Board()
+        clear(board, (3, 0))
+        board.step(Player.BLACK, (4, 1), (3, 1))
+        captures = board.step(Player.WHITE, (4, 2), (3, 2))
+        self.assertEqual(board.board[3][1], 0)
+        self.assertEqual(captures, 1)
+
+    def test_incamp_capture(self):
+        board = ashton_bitboard.Board()
+        board.step(Player.WHITE, (3, 4), (3, 1))
+        self.assertEqual(board.board[3][0], -2.5)
+
+    def test_castle_side_capture(self):
+        board = ashton_bitboard.Board()
+        clear(board, (4, 2))
+        board.step(Player.BLACK, (4, 1), (4, 2))
+        self.assertEqual(board.board[4][3], 0)
+
+    def test_king_in_castle_capture(self):
+        board = ashton_bitboard.Board()
+        clear(board, *CASTLE_GUARDS)
+        board.step(Player.BLACK, (4, 1), (4, 3))
+        board.step(Player.BLACK, (4, 7), (4, 5))
+        board.step(Player.BLACK, (1, 4), (3, 4))
+        with self.assertRaises(LoseException):
+            board.step(Player.BLACK, (7, 4), (5, 4))
+
+    def test_king_adjacent_castle_capture(self):
+        board = ashton_bitboard.Board()
+        clear(board, *CASTLE_GUARDS)
+        board.step(Player.WHITE, (4, 4), (3, 4))
+        board.step(Player.BLACK, (1, 4), (2, 4))
+        board.step(Player.BLACK, (3, 0), (3, 3))
+        with self.assertRaises(LoseException):
+            board.step(Player.BLACK, (3, 8), (3, 5))
+
+    def test_king_adjacent_castle_needs_three_sides(self):
+        board = ashton_bitboard.Board()
+        clear(board, *CASTLE_GUARDS)
+        board.step(Player.WHITE, (4, 4), (3, 4))
+        board.step(Player.BLACK, (3, 0), (3, 3))
+        board.step(Player.BLACK, (3, 8), (3, 5))
+        self.assertEqual(board.board[3][4], 1)
+
+    def test_white_win(self):
+        board = ashton_bitboard.Board()
+        clear(board, (3, 4), (2, 4))
+        board.step(Player.WHITE, (4, 4), (2, 4))
+        with self.assertRaises(WinException):
+            board.step(Player.WHITE, (2, 4), (2, 8))
+
+    def test_draw(self):
+        board = ashton_bitboard.Board()
+        board.step(Player.BLACK, (0, 3), (1, 3))
+        board.step(Player.BLACK, (1, 3), (1, 2))
+        with self.assertRaises(DrawException):
+            board.step(Player.BLACK, (1, 2), (1, 3))
+        self.assertTrue(board.draw_condition())
+
+
+if __name__ == '__main__':
+    unittest.main()
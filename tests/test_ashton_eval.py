@@ -0,0 +1,69 @@
+import random
+import unittest
+import tablut.rules.ashton_eval as ashton_eval
+from tablut.game import Game, Player
+from tablut.player import SearchPlayer
+
+
+def terms(board):
+    return (board.piece_square_score, board.mobility, board.hanging, board.king_escapes,
+            board.king_mobility, board.king_attackers)
+
+
+def rescanned(board):
+    fresh = ashton_eval.Board()
+    fresh.turn = board.turn
+    fresh.board = board.board
+    return fresh
+
+
+class AshtonEvalTest(unittest.TestCase):
+    def test_terms_match_rescan(self):
+        rnd = random.Random(4)
+        for _ in range(10):
+            board = ashton_eval.Board()
+            player = Player.WHITE
+            for _ in range(60):
+                moves = board.legal_moves(player)
+                self.assertEqual(board.mobility, (len(board.legal_moves(Player.WHITE)),
+                                                  len(board.legal_moves(Player.BLACK))))
+                self.assertEqual(terms(board), terms(rescanned(board)))
+                board.make_move(player, *rnd.choice(moves))
+                if board.winning_condition() or board.lose_condition() or board.draw_condition():
+                    break
+                player = player.next()
+
+    def test_unmake_reverts_terms(self):
+        rnd = random.Random(8)
+        board = ashton_eval.Board()
+        player = Player.WHITE
+        for _ in range(20):
+            board.make_move(player, *rnd.choice(board.legal_moves(player)))
+            player = player.next()
+        before = terms(board)
+        undos = list()
+        for _ in range(6):
+            undos.append(board.make_move(player, *rnd.choice(board.legal_moves(player))))
+            player = player.next()
+            # reading the terms halfway must not matter
+            terms(board)
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+        self.assertEqual(terms(board), before)
+
+    def test_copy(self):
+        board = ashton_eval.Board()
+        clone = board.copy()
+        clone.step(Player.WHITE, (2, 4), (2, 3))
+        self.assertEqual(terms(board), terms(ashton_eval.Board()))
+        self.assertEqual(terms(clone), terms(rescanned(clone)))
+
+    def test_search_with_evaluate(self):
+        game = Game(ashton_eval.Board())
+        player = SearchPlayer(game, Player.WHITE, time_budget=0.05, evaluate=ashton_eval.evaluate)
+        player.play()
+        self.assertEqual(len(game.moves), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import unittest
+import numpy as np
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+import tablut.rules.ashton_server as ashton_server
+from tablut.game import Player
+from tablut.util import random_game
+
+NAMES = {0: "EMPTY", 2: "WHITE", -2: "BLACK", 1: "KING"}
+LETTERS = {0: "O", 2: "W", -2: "B", 1: "K"}
+
+
+def json_state(board):
+    cells = [[NAMES[p] for p in row] for row in board.pieces.tolist()]
+    if board.pieces[4][4] == 0:
+        cells[4][4] = "THRONE"
+    return json.dumps({"board": cells, "turn": "WHITE" if board.turn is Player.WHITE else "BLACK"})
+
+
+def text_state(board):
+    rows = ["".join(LETTERS[p] for p in row) for row in board.pieces.tolist()]
+    return "\n".join(rows + ["-", board.turn.value]) + "\n"
+
+
+class ServerStateTest(unittest.TestCase):
+    def test_parse_opening(self):
+        board = ashton.Board()
+        indented = json.dumps(json.loads(json_state(board)), indent=2)
+        for state in (json_state(board), text_state(board), json.loads(json_state(board)), indented):
+            self.assertEqual(ashton_server.parse_pieces(state).tolist(), board.pieces.tolist())
+            self.assertIs(ashton_server.parse_turn(state), Player.WHITE)
+
+    def test_parse_board(self):
+        board = ashton.Board()
+        board.step(Player.WHITE, (2, 4), (2, 1))
+        for board_class in (ashton.Board, ashton_bitboard.Board):
+            parsed = ashton_server.parse_board(text_state(board), board_class)
+            self.assertTrue(np.array_equal(parsed.board, board.board))
+            self.assertIs(parsed.turn, Player.BLACK)
+            self.assertEqual(parsed.hash, board.hash)
+            self.assertEqual(len(parsed.hash_history), 1)
+
+    def test_bad_state(self):
+        with self.assertRaises(ValueError):
+            ashton_server.parse_pieces("OOO\n" * 9)
+        with self.assertRaises(ValueError):
+            ashton_server.parse_pieces("OOOOXOOOO\n" * 9)
+
+    def test_bulk_infer_moves(self):
+        for seed in range(5):
+            game = random_game(ashton.Board, seed, 60)
+            states = [json_state(board) for board in game.boards]
+            self.assertEqual(ashton_server.infer_moves(states), game.moves)
+        with self.assertRaises(ValueError):
+            ashton_server.infer_moves([states[0], states[2]])
+
+
+class InferMoveTest(unittest.TestCase):
+    def test_infer_move_with_capture(self):
+        for board_class in (ashton.Board, ashton_bitboard.Board):
+            board = board_class()
+            board.step(Player.BLACK, (3, 0), (3, 2))
+            before = board_class()
+            before.board = board.board
+            undo = board.make_move(Player.BLACK, (5, 0), (5, 2))
+            self.assertEqual(len(undo.captured), 1)
+            self.assertEqual(before.infer_move(board.board), ((5, 0), (5, 2)))
+
+    def test_not_a_move(self):
+        board = ashton.Board()
+        other = ashton.Board()
+        other.step(Player.WHITE, (2, 4), (2, 1))
+        other.step(Player.WHITE, (3, 4), (3, 1))
+        with self.assertRaises(ValueError):
+            board.infer_move(other.board)
+
+
+if __name__ == '__main__':
+    unittest.main()
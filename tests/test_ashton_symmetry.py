@@ -0,0 +1,69 @@
+import random
+import unittest
+import numpy as np
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_symmetry as symmetry
+from tablut.game import Player
+from tablut.util import random_game
+
+
+def random_board(seed):
+    """
+    A position of a seeded random game, with either side to move
+    """
+    boards = random_game(ashton.Board, seed, 40).boards
+    return boards[random.Random(seed).randrange(1, len(boards))]
+
+
+def transformed_board(board, t):
+    copy = ashton.Board()
+    copy.turn = board.turn
+    copy.board = ashton.TILE_VALUES[ashton.TILES] + symmetry.transform(board.pieces, t)
+    return copy
+
+
+class AshtonSymmetryTest(unittest.TestCase):
+    def test_tiles_are_symmetric(self):
+        escapes = np.zeros((9, 9), dtype=bool)
+        escapes[tuple(np.array(ashton.ESCAPE_TILES).T)] = True
+        for t in range(symmetry.TRANSFORMS):
+            np.testing.assert_array_equal(symmetry.transform(ashton.TILES, t), ashton.TILES)
+            np.testing.assert_array_equal(symmetry.transform(escapes, t), escapes)
+
+    def test_inverse(self):
+        board = random_board(1)
+        for t in range(symmetry.TRANSFORMS):
+            back = symmetry.transform(symmetry.transform(board.pieces, t), symmetry.inverse(t))
+            np.testing.assert_array_equal(back, board.pieces)
+            for move in board.legal_moves(board.turn)[:5]:
+                moved = symmetry.transform_move(move, t)
+                self.assertEqual(symmetry.transform_move(moved, symmetry.inverse(t)), move)
+
+    def test_hashes_and_moves(self):
+        for seed in range(5):
+            board = random_board(seed)
+            h = symmetry.hashes(board)
+            for t in range(symmetry.TRANSFORMS):
+                other = transformed_board(board, t)
+                self.assertEqual(other.hash, h[t])
+                self.assertEqual(symmetry.symmetric_hash(other), symmetry.symmetric_hash(board))
+                expected = sorted(symmetry.transform_move(m, t) for m in board.legal_moves(board.turn))
+                self.assertEqual(sorted(other.legal_moves(other.turn)), expected)
+
+    def test_canonical_batch(self):
+        boards = [random_board(seed) for seed in range(6)]
+        pieces = np.stack([b.pieces for b in boards])
+        black = np.array([b.turn is Player.BLACK for b in boards])
+        canonical, transforms, hashes = symmetry.canonical(pieces, black)
+        for board, position, t, h in zip(boards, canonical, transforms, hashes):
+            self.assertEqual(symmetry.canonical_transform(board), (t, h))
+            np.testing.assert_array_equal(position, symmetry.transform(board.pieces, t))
+            # every orientation has the same canonical form
+            rotated = transformed_board(board, 5)
+            t2, h2 = symmetry.canonical_transform(rotated)
+            self.assertEqual(h2, h)
+            np.testing.assert_array_equal(symmetry.transform(rotated.pieces, t2), position)
+
+
+if __name__ == '__main__':
+    unittest.main()
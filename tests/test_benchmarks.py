@@ -0,0 +1,39 @@
+import unittest
+from benchmarks import bench
+
+
+class BenchmarkSmokeTest(unittest.TestCase):
+    def test_run_and_compare(self):
+        results = bench.run("tablut.rules.ashton:Board", number=2, repeat=1)
+        self.assertIn("step/lategame", results["results"])
+        self.assertIn("random_game", results["results"])
+
+        slower = {"results": dict(
+            (name, {"seconds_per_call": result["seconds_per_call"] * 2, "calls": 1})
+            for name, result in results["results"].items())}
+        self.assertEqual(bench.compare(results, results, 0.1), [])
+        self.assertEqual(sorted(bench.compare(results, slower, 0.1)),
+                         sorted(results["results"]))
+
+    def test_other_variants(self):
+        for board in ("tablut.rules.brandubh:Board", "tablut.rules.hnefatafl:Board"):
+            results = bench.run(board, number=1, repeat=1)
+            self.assertIn("is_legal/midgame", results["results"], board)
+
+    def test_late_game_has_long_history(self):
+        board, _ = bench.positions(bench.load_class("tablut.rules.ashton:Board"))["lategame"]
+        self.assertGreater(len(board.hash_history), 100)
+
+    def test_apply_captures_positions(self):
+        counts = dict()
+        for label, (board, player) in bench.positions(
+                bench.load_class("tablut.rules.ashton:Board")).items():
+            start, end, counts[label] = bench._first_capture(board, player)
+            # the timed calls start from the moved piece, as in the benchmark
+            board._move_piece(start, end)
+            self.assertEqual(board.apply_captures(end), counts[label], label)
+        self.assertEqual((counts["opening"], counts["midgame"]), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import pickle
+import tempfile
+import unittest
+import tablut.rules.ashton as ashton
+import tablut.rules.hnefatafl as hnefatafl
+from tablut.book import OpeningBook, build_book, read_games
+from tablut.game import Game, Player
+from tablut.player import SearchPlayer
+from tablut.record import RecordWriter
+
+OPENING = ((2, 4), (2, 7))
+OTHER = ((4, 2), (7, 2))
+REPLY = ((0, 3), (2, 3))
+
+
+class OpeningBookTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "book.bin")
+        games = [([OPENING, REPLY], "W"), ([OPENING, REPLY], "B"), ([OPENING], "W"),
+                 ([OTHER], "B"), ([OTHER], "draw")]
+        self.entries = build_book(games, self.path)
+        self.book = OpeningBook(self.path)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_lookup(self):
+        self.assertEqual(self.entries, 3)
+        self.assertEqual(len(self.book), 3)
+        entries = dict((e.move, e) for e in self.book.lookup(ashton.Board().hash))
+        self.assertEqual(set(entries), {OPENING, OTHER})
+        self.assertEqual(entries[OPENING][1:], (3, 2, 0))
+        self.assertEqual(entries[OTHER][1:], (2, 0, 1))
+        self.assertEqual(self.book.lookup(12345), [])
+
+        board = ashton.Board()
+        board.step(Player.WHITE, *OPENING)
+        replies = self.book.lookup(board.hash)
+        # black won one of the two games
+        self.assertEqual([(e.move, e.games, e.wins) for e in replies], [(REPLY, 2, 1)])
+
+    def test_move(self):
+        board = ashton.Board()
+        self.assertEqual(self.book.move(board, Player.WHITE), OPENING)
+        self.assertEqual(self.book.move(board, Player.WHITE, min_games=4), None)
+        picked = set(self.book.move(board, Player.WHITE, weighted=True) for _ in range(50))
+        self.assertEqual(picked, {OPENING, OTHER})
+
+    def test_pickled_book_is_remapped(self):
+        data = pickle.dumps(self.book)
+        self.assertLess(len(data), 200)
+        book = pickle.loads(data)
+        self.assertEqual(book.lookup(ashton.Board().hash), self.book.lookup(ashton.Board().hash))
+
+    def test_game_hook(self):
+        game = Game(ashton.Board(), book=self.book)
+        self.assertEqual(game.book_move(), OPENING)
+        player = SearchPlayer(game, Player.WHITE, time_budget=0.01)
+        player.play()
+        self.assertEqual(game.moves, [OPENING])
+        self.assertIsNone(player.last_stats)
+        self.assertEqual(game.book_move(), REPLY)
+        self.assertIsNone(Game(ashton.Board()).book_move())
+
+    def test_read_games(self):
+        path = os.path.join(self.dir.name, "games.tbr")
+        with RecordWriter(path) as writer:
+            writer.write([OPENING, REPLY], "W")
+            writer.write([OTHER], "draw")
+        self.assertEqual(list(read_games(path)), [([OPENING, REPLY], "W"), ([OTHER], "draw")])
+        build_book(read_games(path), self.path, plies=1)
+        self.assertEqual(len(OpeningBook(self.path)), 2)
+
+    def test_other_board_size(self):
+        # a move along the last column of the 11x11 board
+        move = ((7, 10), (9, 10))
+        self.assertIn(move, hnefatafl.Board().legal_moves(Player.BLACK))
+        build_book([([((5, 3), (2, 3)), move], "B")], self.path,
+                   board_class="tablut.rules.hnefatafl:Board")
+        board = hnefatafl.Board()
+        board.step(Player.WHITE, (5, 3), (2, 3))
+        self.assertEqual(OpeningBook(self.path).move(board, Player.BLACK), move)
+
+
+if __name__ == '__main__':
+    unittest.main()
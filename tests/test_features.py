@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import tablut.features as features
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.game import Player
+from tablut.record import RecordReader, RecordWriter
+from tablut.util import random_game
+
+
+def reference_planes(board):
+    """
+    Planes built square by square from the float grid
+    """
+    grid = board.board
+    out = np.zeros((features.NUM_PLANES, 9, 9))
+    for i in range(9):
+        for j in range(9):
+            piece = int(round(grid[i][j] - ashton.TILE_VALUES[ashton.TILES[i, j]]))
+            out[0, i, j] = piece == 2
+            out[1, i, j] = piece == -2
+            out[2, i, j] = piece == 1
+            out[3, i, j] = ashton.TILES[i, j] == ashton.CAMP
+            out[4, i, j] = (i, j) == ashton.CASTLE_TILE
+            out[5, i, j] = (i, j) in ashton.ESCAPE_SET
+            out[6, i, j] = board.turn is Player.BLACK
+    return out
+
+
+class FeaturesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "games.tbr")
+        self.games = [random_game(ashton.Board, seed, 30).moves for seed in range(3)]
+        with RecordWriter(self.path) as writer:
+            for moves, result in zip(self.games, ("W", "B", "draw")):
+                writer.write(moves, result)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def positions(self, moves):
+        board = ashton.Board()
+        boards = [ashton.Board()]
+        player = Player.WHITE
+        for move in moves:
+            board.make_move(player, *move)
+            copy = ashton.Board()
+            copy.board = board.board
+            copy.turn = board.turn
+            boards.append(copy)
+            player = player.next()
+        return boards
+
+    def test_board_planes(self):
+        boards = self.positions(self.games[0])
+        out = np.full((len(boards), features.NUM_PLANES, 9, 9), 7, dtype=np.uint8)
+        self.assertIs(features.board_planes(boards, out), out)
+        for board, plane in zip(boards, out):
+            np.testing.assert_array_equal(plane, reference_planes(board))
+
+        bitboard = ashton_bitboard.Board()
+        np.testing.assert_array_equal(features.board_planes([bitboard])[0],
+                                      reference_planes(ashton.Board()))
+
+    def test_record_planes(self):
+        with RecordReader(self.path) as reader:
+            game = reader[1]
+        out = features.empty(100)
+        filled = features.record_planes(game, out)
+        self.assertEqual(len(filled), len(game) + 1)
+        self.assertTrue(np.shares_memory(filled, out))
+        np.testing.assert_array_equal(filled, features.board_planes(self.positions(self.games[1])))
+
+        path = os.path.join(self.dir.name, "hnefatafl.tbr")
+        with RecordWriter(path) as writer:
+            writer.write([((5, 3), (2, 3))], variant="hnefatafl")
+        with RecordReader(path) as reader:
+            with self.assertRaises(ValueError):
+                features.record_planes(reader[0])
+
+    def test_iter_batches(self):
+        total = sum(len(moves) + 1 for moves in self.games)
+        out = features.empty(16, dtype=np.float16)
+        batches = list()
+        for batch, values in features.iter_batches(self.path, 16, out):
+            self.assertTrue(np.shares_memory(batch, out))
+            batches.append((batch.copy(), values.copy()))
+        self.assertEqual([len(b) for b, _ in batches], [16] * (total // 16) + [total % 16])
+
+        expected = np.concatenate([features.board_planes(self.positions(moves))
+                                   for moves in self.games])
+        np.testing.assert_array_equal(np.concatenate([b for b, _ in batches]), expected)
+        values = np.concatenate([v for _, v in batches])
+        lengths = [len(moves) + 1 for moves in self.games]
+        np.testing.assert_array_equal(values, np.repeat([1.0, -1.0, 0.0], lengths))
+
+
+if __name__ == '__main__':
+    unittest.main()
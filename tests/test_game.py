@@ -0,0 +1,36 @@
+import unittest
+import tablut.rules.ashton as ashton
+from tablut.game import Game, Player
+
+
+class GameWhatIfTest(unittest.TestCase):
+    def test_what_if_takes_move_back(self):
+        game = Game(ashton.Board())
+        board = game.board.board.copy()
+        with game.what_if((2, 4), (2, 3)) as g:
+            self.assertIs(g, game)
+            self.assertEqual(g.turn, Player.BLACK)
+            self.assertEqual(g.board.board[2][3], 2)
+        self.assertEqual(game.turn, Player.WHITE)
+        self.assertEqual(game.board.board.tolist(), board.tolist())
+        self.assertEqual(len(game.board.board_history), 1)
+
+    def test_nested_what_if(self):
+        game = Game(ashton.Board())
+        initial = game.board.hash
+        with game.what_if((2, 4), (2, 3)):
+            with game.what_if((0, 3), (1, 3)) as g:
+                self.assertEqual(g.turn, Player.WHITE)
+                self.assertEqual(len(g.board.board_history), 3)
+        self.assertEqual(game.board.hash, initial)
+
+    def test_what_if_illegal(self):
+        game = Game(ashton.Board())
+        with self.assertRaises(ValueError):
+            with game.what_if((2, 4), (1, 4)):
+                pass
+        self.assertEqual(game.turn, Player.WHITE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import copy
+import pickle
+import random
+import unittest
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.board import DrawException
+from tablut.game import Game, Player
+from tablut.history import History
+
+
+class HistoryTest(unittest.TestCase):
+    def test_entries(self):
+        history = History("a", 1, 10).push("b", 2, 10).push("c", 3, 9)
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.snapshots(), ["a", "b", "c"])
+        self.assertEqual(history.hashes(), [1, 2, 3])
+        # a capture happened before "c"
+        self.assertFalse(history.contains("a", 1, 9))
+        self.assertTrue(history.parent.contains("a", 1, 10))
+
+    def test_hash_collision_is_not_a_repetition(self):
+        history = History("a", 7, 10).push("b", 8, 10)
+        self.assertFalse(history.contains("c", 7, 10))
+        self.assertTrue(history.contains("a", 7, 10))
+
+    def test_copies_share_entries(self):
+        history = History("a", 1, 10)
+        for k in range(5000):
+            history = history.push(str(k), k, 10)
+        self.assertIs(copy.deepcopy(history), history)
+        restored = pickle.loads(pickle.dumps(history))
+        self.assertEqual(restored.snapshots(), history.snapshots())
+        self.assertTrue(restored.contains("a", 1, 10))
+
+
+class BoardHistoryTest(unittest.TestCase):
+    def _check_clone(self, board_class):
+        board = board_class()
+        board.step(Player.WHITE, (2, 4), (2, 3))
+        clone = board.copy()
+        self.assertIs(clone.history, board.history)
+
+        clone.step(Player.BLACK, (0, 5), (1, 5))
+        # the clone only added its own entry
+        self.assertIs(clone.history.parent, board.history)
+        self.assertEqual(len(board.history), 2)
+        self.assertNotEqual(clone.hash, board.hash)
+        self.assertEqual(board.board_history, clone.board_history[:2])
+
+        board.step(Player.BLACK, (0, 3), (1, 3))
+        clone.step(Player.WHITE, (2, 3), (2, 2))
+        clone.step(Player.BLACK, (1, 5), (1, 6))
+        clone.step(Player.WHITE, (2, 2), (2, 3))
+        with self.assertRaises(DrawException):
+            clone.step(Player.BLACK, (1, 6), (1, 5))
+        self.assertFalse(board.draw_condition())
+
+    def test_clone(self):
+        self._check_clone(ashton.Board)
+
+    def test_bitboard_clone(self):
+        self._check_clone(ashton_bitboard.Board)
+
+    def test_draws_match_hash_counting(self):
+        rnd = random.Random(11)
+        for _ in range(20):
+            board = ashton.Board()
+            seen = {board.hash}
+            player = Player.WHITE
+            for _ in range(120):
+                board.make_move(player, *rnd.choice(board.legal_moves(player)))
+                self.assertEqual(board.draw_condition(), board.hash in seen)
+                if board.winning_condition() or board.lose_condition() or board.draw_condition():
+                    break
+                seen.add(board.hash)
+                player = player.next()
+
+    def test_game_copy(self):
+        game = Game(ashton.Board())
+        game.white_move((2, 4), (2, 3))
+        branch = game.copy()
+        branch.black_move((0, 5), (1, 5))
+        self.assertEqual(len(game.moves), 1)
+        self.assertIs(game.turn, Player.BLACK)
+        self.assertIs(branch.board.history.parent, game.board.history)
+
+
+if __name__ == '__main__':
+    unittest.main()
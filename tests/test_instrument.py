@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+import tablut.instrument as instrument
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.board import WinException
+from tablut.game import Game, Player
+
+
+class InstrumentTest(unittest.TestCase):
+    def setUp(self):
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_disabled_leaves_methods_alone(self):
+        is_legal = ashton.Board.is_legal
+        instrument.enable()
+        self.assertIsNot(ashton.Board.is_legal, is_legal)
+        instrument.disable()
+        self.assertIs(ashton.Board.is_legal, is_legal)
+        # step is inherited from BaseBoard and must be inherited again
+        self.assertNotIn("step", ashton.Board.__dict__)
+        self.assertFalse(instrument.enabled())
+
+    def test_counts(self):
+        instrument.enable()
+        board = ashton.Board()
+        board.is_legal(Player.WHITE, (0, 0), (0, 1))
+        board.is_legal(Player.WHITE, (0, 3), (1, 3))
+        board.is_legal(Player.WHITE, (2, 4), (2, 0))
+        for i, j in [(3, 4), (2, 4)]:
+            board.board[i][j] = 0
+        board.step(Player.WHITE, (4, 4), (2, 4))
+        with self.assertRaises(WinException):
+            board.step(Player.WHITE, (2, 4), (2, 8))
+        ashton_bitboard.Board().is_legal(Player.WHITE, (0, 0), (0, 1))
+
+        stats = instrument.stats()
+        methods = stats["methods"]
+        self.assertEqual(methods["tablut.rules.ashton.Board.is_legal"]["calls"], 5)
+        self.assertEqual(methods["tablut.rules.ashton_bitboard.Board.is_legal"]["calls"], 1)
+        step = methods["tablut.rules.ashton.Board.step"]
+        self.assertEqual(step["calls"], 2)
+        self.assertEqual(step["exceptions"], {"WinException": 1})
+        self.assertEqual(sum(step["histogram"].values()), 2)
+        self.assertGreater(step["p99_us"], 0)
+        self.assertEqual(stats["rejections"], {"Start tile is empty": 2,
+                                               "Cant move other player pieces": 1})
+
+    def test_game_moves(self):
+        instrument.enable(targets=[(Game, "white_move"), (Game, "black_move")])
+        game = Game(ashton.Board())
+        game.white_move((2, 4), (2, 1))
+        game.black_move((0, 3), (1, 3))
+        methods = instrument.stats()["methods"]
+        self.assertEqual(list(methods), ["tablut.game.Game.white_move", "tablut.game.Game.black_move"])
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.json")
+            instrument.enable(snapshot=path, interval=0.01)
+            ashton.Board().is_legal(Player.WHITE, (0, 0), (0, 1))
+            instrument.disable()
+            with open(path) as f:
+                snapshot = json.load(f)
+        self.assertEqual(snapshot["methods"]["tablut.rules.ashton.Board.is_legal"]["calls"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import random
+import unittest
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.game import Game, Player
+from tablut.mcts import MCTS, rollout
+from tablut.player import MCTSPlayer
+from tests.test_search import king_can_escape
+
+
+class MCTSTest(unittest.TestCase):
+    def test_rollout_restores_board(self):
+        random.seed(0)
+        for board_class in (ashton.Board, ashton_bitboard.Board):
+            board = board_class()
+            grid, hash_before = board.board.copy(), board.hash
+            result = rollout(board, Player.WHITE, max_plies=50)
+            self.assertIn(result, (0.0, 0.5, 1.0))
+            self.assertTrue((board.board == grid).all())
+            self.assertEqual(board.hash, hash_before)
+
+    def test_finds_escape(self):
+        random.seed(0)
+        board = king_can_escape(ashton_bitboard.Board)
+        root, simulations = MCTS().search(board, Player.WHITE, 1.0)
+        best = max(root.children, key=lambda child: child.visits)
+        self.assertEqual(best.move[0], (2, 4))
+        self.assertIn(best.move[1], ashton.ESCAPE_SET)
+        self.assertEqual(best.result, 1.0)
+        self.assertEqual(root.visits, simulations)
+
+    def test_node_budget(self):
+        random.seed(0)
+        mcts = MCTS(max_nodes=10, max_rollout=20)
+        root, simulations = mcts.search(ashton_bitboard.Board(), Player.WHITE, 0.3)
+        self.assertEqual(root.size(), 10)
+        self.assertGreater(simulations, 10)
+
+
+class MCTSPlayerTest(unittest.TestCase):
+    def test_tree_reuse(self):
+        random.seed(0)
+        game = Game(ashton_bitboard.Board())
+        white = MCTSPlayer(game, Player.WHITE, time_budget=0.5, max_rollout=20)
+        white.play()
+        self.assertEqual(len(game.moves), 1)
+        node = next(child for child in white.root.children if child.move == game.moves[0])
+        reply = max(node.children, key=lambda child: child.visits)
+        game.black_move(*reply.move)
+        self.assertIs(white._reused_root(), reply)
+        self.assertIsNone(reply.parent)
+
+    def test_parallel(self):
+        for parallel in ("root", "leaf"):
+            game = Game(ashton_bitboard.Board())
+            white = MCTSPlayer(game, Player.WHITE, time_budget=0.3, processes=2,
+                               parallel=parallel, max_rollout=20)
+            try:
+                white.play()
+            finally:
+                white.close()
+            self.assertEqual(len(game.moves), 1)
+            self.assertIn(game.moves[0], ashton_bitboard.Board().legal_moves(Player.WHITE))
+            self.assertGreater(white.last_stats.simulations, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+from tablut.game import Player
+import tablut.perft as perft_module
+from tablut.perft import perft, run_perft
+
+# opening position counts, the same on both backends
+OPENING = [1, 56, 4392, 247616]
+
+
+class PerftTest(unittest.TestCase):
+    def test_opening(self):
+        for board_class in (ashton.Board, ashton_bitboard.Board):
+            board = board_class()
+            for depth, nodes in enumerate(OPENING[:3]):
+                self.assertEqual(perft(board, Player.WHITE, depth), nodes)
+                self.assertEqual(perft(board, Player.WHITE, depth, cache=dict()), nodes)
+        self.assertEqual(perft(ashton.Board(), Player.WHITE, 3, cache=dict()), OPENING[3])
+
+    def test_board_is_restored(self):
+        board = ashton.Board()
+        before = (board.board.tolist(), board.hash, board.history)
+        perft(board, Player.WHITE, 3)
+        self.assertEqual((board.board.tolist(), board.hash, board.history), before)
+
+    def test_divide(self):
+        board = ashton.Board()
+        serial = run_perft(board, Player.WHITE, 2)
+        self.assertEqual(serial.nodes, OPENING[2])
+        self.assertEqual(len(serial.divide), OPENING[1])
+        self.assertEqual(sum(serial.divide.values()), serial.nodes)
+        parallel = run_perft(board, Player.WHITE, 2, processes=2, cache=False)
+        self.assertEqual(parallel.divide, serial.divide)
+        cached = run_perft(board, Player.WHITE, 3, processes=2)
+        self.assertEqual(cached.nodes, OPENING[3])
+
+    def test_worker_cache_is_reused(self):
+        board = ashton.Board()
+        perft_module._divide_worker_init(True)
+        try:
+            cache = perft_module._worker_cache
+            for move in board.legal_moves(Player.WHITE)[:2]:
+                perft_module._divide_task((ashton.Board(), Player.WHITE, move, 3))
+            self.assertIs(perft_module._worker_cache, cache)
+            # the positions counted below both root moves
+            self.assertGreater(len(cache), 2)
+        finally:
+            perft_module._divide_worker_init(False)
+
+    def test_nothing_below_game_end(self):
+        board = ashton.Board()
+        board.board = ashton.TILE_VALUES[ashton.TILES] + 0 * board.pieces
+        board.board[2][2] = 1
+        board.board[6][6] = -2
+        # the king reaches an escape tile with 4 of its 16 moves
+        self.assertEqual(perft(board, Player.WHITE, 1), 16)
+        expected = 0
+        for move in board.legal_moves(Player.WHITE):
+            undo = board.make_move(Player.WHITE, *move)
+            if not board.winning_condition():
+                expected += len(board.legal_moves(Player.BLACK))
+            board.unmake_move(undo)
+        self.assertEqual(perft(board, Player.WHITE, 2), expected)
+        self.assertLess(expected, 16 * len(board.legal_moves(Player.BLACK)))
+
+if __name__ == '__main__':
+    unittest.main()
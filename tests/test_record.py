@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+import tablut.rules.ashton as ashton
+from tablut.record import RecordReader, RecordWriter, build_index, replay, INDEX_SUFFIX
+from tablut.selfplay import run_selfplay
+from tablut.util import random_game
+
+
+class RecordTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "games.tbr")
+        self.games = [random_game(ashton.Board, seed, 60) for seed in range(5)]
+        with RecordWriter(self.path) as writer:
+            for moves, _, result in self.games[:3]:
+                writer.write(moves, result)
+        # appending to an existing file
+        with RecordWriter(self.path) as writer:
+            for moves, _, result in self.games[3:]:
+                writer.write(moves, result)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        with RecordReader(self.path) as reader:
+            records = list(reader)
+        self.assertEqual([(r.variant, r.result, r.moves) for r in records],
+                         [("ashton", game.result, game.moves) for game in self.games])
+        self.assertEqual(os.path.getsize(self.path),
+                         4 + sum(4 + 2 * len(game.moves) for game in self.games))
+
+    def test_random_access(self):
+        with RecordReader(self.path) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader[3].moves, self.games[3].moves)
+            self.assertEqual(reader[-1].result, self.games[-1].result)
+
+        os.remove(self.path + INDEX_SUFFIX)
+        with RecordReader(self.path) as reader:
+            self.assertEqual(reader[2].moves, self.games[2].moves)
+        self.assertEqual(build_index(self.path), 5)
+        self.assertEqual(os.path.getsize(self.path + INDEX_SUFFIX), 5 * 8)
+
+    def test_partial_index(self):
+        path = os.path.join(self.dir.name, "partial.tbr")
+        with RecordWriter(path, index=False) as writer:
+            for game in self.games[:2]:
+                writer.write(game.moves, game.result)
+        with RecordWriter(path) as writer:
+            for game in self.games[2:]:
+                writer.write(game.moves, game.result)
+        self.assertEqual(os.path.getsize(path + INDEX_SUFFIX), 3 * 8)
+        with RecordReader(path) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader[1].moves, self.games[1].moves)
+        self.assertEqual(os.path.getsize(path + INDEX_SUFFIX), 5 * 8)
+
+        # records appended without the index
+        with RecordWriter(path, index=False) as writer:
+            writer.write(self.games[0].moves, self.games[0].result)
+        with RecordReader(path) as reader:
+            self.assertEqual(len(reader), 6)
+            self.assertEqual(reader[-1].moves, self.games[0].moves)
+
+    def test_replay(self):
+        with RecordReader(self.path) as reader:
+            for record, game in zip(reader, self.games):
+                self.assertEqual([board.board.tolist() for board in replay(record)],
+                                 [board.board.tolist() for board in game.boards[1:]])
+
+    def test_not_a_record_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"nope")
+        with self.assertRaises(ValueError):
+            RecordReader(self.path)
+
+    def test_variant_records(self):
+        for board, variant in [("tablut.rules.brandubh:Board", "brandubh"),
+                               ("tablut.rules.hnefatafl:Board", "hnefatafl")]:
+            path = os.path.join(self.dir.name, variant + ".tbr")
+            jsonl = os.path.join(self.dir.name, variant + ".jsonl")
+            run_selfplay(path, 2, processes=1, seed=5, board=board, max_plies=40)
+            run_selfplay(jsonl, 2, processes=1, seed=5, board=board, max_plies=40)
+            with open(jsonl) as f:
+                games = sorted(json.loads(line)["moves"] for line in f)
+            with RecordReader(path) as reader:
+                self.assertEqual([record.variant for record in reader], [variant] * 2)
+                self.assertEqual(sorted([[s[0], s[1], e[0], e[1]] for s, e in record.moves]
+                                        for record in reader), games)
+                self.assertEqual(len(list(replay(reader[0]))), len(reader[0]))
+        with RecordWriter(self.path) as writer:
+            with self.assertRaises(ValueError):
+                writer.write([], variant="chess")
+
+    def test_selfplay_records(self):
+        path = os.path.join(self.dir.name, "selfplay.tbr")
+        stats = run_selfplay(path, 4, processes=2, seed=3, max_plies=40)
+        with RecordReader(path) as reader:
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(sum(len(record) for record in reader), stats["plies"])
+
+
+if __name__ == '__main__':
+    unittest.main()
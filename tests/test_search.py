@@ -0,0 +1,158 @@
+import multiprocessing
+import unittest
+import tablut.rules.ashton as ashton
+import tablut.rules.ashton_bitboard as ashton_bitboard
+import tablut.rules.brandubh as brandubh
+import tablut.rules.hnefatafl as hnefatafl
+from tablut.game import Game, Player
+from tablut.player import SearchPlayer
+from tablut.search import (AlphaBeta, TranspositionTable, SharedTranspositionTable, LazySMP,
+                           EXACT, LOWER, WIN_THRESHOLD, encode_move, decode_move, evaluate)
+from tests.test_variant import position
+
+
+def king_can_escape(board_class):
+    board = board_class()
+    grid = board.board
+    for i, j in [(3, 4), (2, 4)]:
+        grid[i][j] = grid[i][j] - int(grid[i][j])
+    board.board = grid
+    board.rehash()
+    board.step(Player.WHITE, (4, 4), (2, 4))
+    board.step(Player.BLACK, (0, 3), (1, 3))
+    return board
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_store_and_probe(self):
+        tt = TranspositionTable(megabytes=1)
+        self.assertEqual(tt.size, 2 ** 16)
+        move = encode_move(((2, 4), (2, 8)))
+        tt.store(12345, 3, -250, EXACT, move)
+        self.assertEqual(tt.probe(12345), (3, -250, EXACT, move))
+        self.assertIsNone(tt.probe(12345 + tt.size))
+        # shallower results do not replace deeper ones for the same position
+        tt.store(12345, 1, 10, LOWER, 0)
+        self.assertEqual(tt.probe(12345)[0], 3)
+        self.assertEqual(tt.hits, 2)
+        self.assertEqual(tt.probes, 3)
+
+    def test_move_encoding(self):
+        for move in [((0, 0), (0, 1)), ((8, 8), (0, 8)), ((4, 3), (4, 0))]:
+            self.assertEqual(decode_move(encode_move(move)), move)
+        self.assertIsNone(decode_move(0))
+        for size in (7, 11):
+            corner = ((size - 1, size - 1), (size - 1, 0))
+            self.assertEqual(decode_move(encode_move(corner, size), size), corner)
+            self.assertLess(encode_move(corner, size), 2 ** 16)
+
+
+def _store_in_child(tt):
+    tt.store(777, 5, 42, LOWER, encode_move(((0, 3), (1, 3))))
+
+
+class SharedTranspositionTableTest(unittest.TestCase):
+    def setUp(self):
+        self.tt = SharedTranspositionTable(megabytes=1)
+
+    def tearDown(self):
+        self.tt.close()
+
+    def test_shared_between_processes(self):
+        process = multiprocessing.get_context("spawn").Process(target=_store_in_child, args=(self.tt,))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self.tt.probe(777), (5, 42, LOWER, encode_move(((0, 3), (1, 3)))))
+
+    def test_torn_entry_is_missing(self):
+        self.tt.store(12345, 3, -250, EXACT, 7)
+        self.assertIsNotNone(self.tt.probe(12345))
+        # data of another write landed without its key
+        self.tt.data[12345 & (self.tt.size - 1)] = self.tt.pack(9, 0, EXACT, 1)
+        self.assertIsNone(self.tt.probe(12345))
+
+
+class AlphaBetaTest(unittest.TestCase):
+    def test_finds_escape(self):
+        for board_class in (ashton.Board, ashton_bitboard.Board):
+            board = king_can_escape(board_class)
+            hash_before = board.hash
+            stats = AlphaBeta(TranspositionTable(1)).search(board, Player.WHITE, 5.0, max_depth=3)
+            self.assertEqual(stats.move[0], (2, 4))
+            self.assertIn(stats.move[1], ashton.ESCAPE_SET)
+            self.assertGreaterEqual(stats.score, WIN_THRESHOLD)
+            self.assertEqual(board.hash, hash_before)
+
+    def test_black_captures_king(self):
+        board = king_can_escape(ashton_bitboard.Board)
+        board.step(Player.WHITE, (4, 5), (3, 5))
+        stats = AlphaBeta(TranspositionTable(1)).search(board, Player.BLACK, 5.0, max_depth=2)
+        # the king is caught between the camp soldier in (1, 4) and (3, 4)
+        self.assertEqual(stats.move, ((3, 0), (3, 4)))
+        self.assertGreaterEqual(stats.score, WIN_THRESHOLD)
+
+
+    def test_other_board_size(self):
+        board = hnefatafl.Board()
+        tt = TranspositionTable(1)
+        stats = AlphaBeta(tt).search(board, Player.WHITE, 5.0, max_depth=2)
+        self.assertIn(stats.move, board.legal_moves(Player.WHITE))
+        # the table move of the root is the 11x11 move played
+        self.assertEqual(decode_move(tt.probe(board.hash)[3], 11), stats.move)
+
+    def test_evaluate_escapes_of_the_variant(self):
+        board = position(brandubh.Board, [
+            "...K...",
+            ".......",
+            ".......",
+            "...W...",
+            ".......",
+            ".......",
+            "...B...",
+        ])
+        # the king reaches both 7x7 corners, only (0, 6) is an Ashton escape tile
+        material = 100 * board.white_count - 50 * board.black_count
+        king_moves = len(board.piece_legal_moves((0, 3)))
+        self.assertEqual(evaluate(board, Player.WHITE), material + 400 * 2 + 5 * king_moves)
+
+    def test_stop(self):
+        stop = multiprocessing.Event()
+        stop.set()
+        stats = AlphaBeta(TranspositionTable(1), stop=stop).search(
+            ashton.Board(), Player.WHITE, 30.0)
+        self.assertLessEqual(stats.depth, 1)
+        self.assertLess(stats.seconds, 5.0)
+
+
+class LazySMPTest(unittest.TestCase):
+    def test_finds_escape(self):
+        search = LazySMP(processes=3, tt_megabytes=1)
+        try:
+            board = king_can_escape(ashton.Board)
+            stats = search.search(board, Player.WHITE, 5.0, max_depth=3)
+            self.assertEqual(stats.move[0], (2, 4))
+            self.assertIn(stats.move[1], ashton.ESCAPE_SET)
+            # the workers did search and stopped with the main process
+            self.assertGreater(stats.nodes, 0)
+            stats = search.search(ashton.Board(), Player.WHITE, 0.3)
+            self.assertIsNotNone(stats.move)
+            self.assertLess(stats.seconds, 3.0)
+        finally:
+            search.close()
+
+
+class SearchPlayerTest(unittest.TestCase):
+    def test_play_reports_stats(self):
+        game = Game(ashton_bitboard.Board())
+        player = SearchPlayer(game, Player.WHITE, time_budget=0.2, tt_megabytes=1)
+        player.play()
+        self.assertEqual(len(game.moves), 1)
+        self.assertEqual(game.turn, Player.BLACK)
+        self.assertGreaterEqual(player.last_stats.depth, 1)
+        self.assertGreater(player.last_stats.nodes, 0)
+        self.assertLessEqual(player.last_stats.seconds, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+import unittest
+from tablut.selfplay import run_selfplay
+
+
+class SelfPlayTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _run(self, name, **kwargs):
+        path = os.path.join(self.dir.name, name)
+        stats = run_selfplay(path, 4, processes=2, seed=3, max_plies=40, **kwargs)
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        return stats, sorted(records, key=lambda r: r["game"])
+
+    def test_games_are_streamed(self):
+        stats, records = self._run("games.jsonl")
+        self.assertEqual(stats["games"], 4)
+        self.assertEqual([r["game"] for r in records], [0, 1, 2, 3])
+        self.assertEqual(stats["plies"], sum(r["plies"] for r in records))
+        for record in records:
+            self.assertEqual(len(record["moves"]), record["plies"])
+            self.assertIn(record["result"], ("W", "B", "draw", "unfinished"))
+
+    def test_seeded_games_are_reproducible(self):
+        _, first = self._run("first.jsonl")
+        _, second = self._run("second.jsonl")
+        self.assertEqual([r["moves"] for r in first], [r["moves"] for r in second])
+
+
+if __name__ == '__main__':
+    unittest.main()
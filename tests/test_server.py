@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+import tablut.rules.ashton_server as ashton_server
+from tablut.game import Player
+from tablut.server import (GameServer, load_test, parse_square, square_name,
+                           read_message, write_message)
+
+
+class ServerTest(unittest.TestCase):
+
+    def run_server(self, coroutine, **kwargs):
+        async def run():
+            server = await GameServer(port=0, **kwargs).start()
+            try:
+                return server, await asyncio.wait_for(coroutine(server), 60)
+            finally:
+                await server.close()
+        return asyncio.run(run())
+
+    def test_squares(self):
+        self.assertEqual(parse_square("e4"), (3, 4))
+        self.assertEqual(parse_square("A9"), (8, 0))
+        self.assertEqual(square_name((3, 4)), "e4")
+        for name in ("j1", "a0", "a10", ""):
+            with self.assertRaises(ValueError):
+                parse_square(name)
+
+    def test_load_test(self):
+        server, stats = self.run_server(lambda s: load_test(s.host, s.port, 6, concurrency=3))
+        self.assertEqual(stats["matches"], 6)
+        self.assertEqual(sum(stats["results"].values()), 6)
+        self.assertEqual(server.stats["finished"], 6)
+        self.assertGreater(stats["moves"], 0)
+        self.assertGreaterEqual(stats["latency_p99_ms"], stats["latency_p50_ms"])
+
+    def test_process_pool(self):
+        server, stats = self.run_server(lambda s: load_test(s.host, s.port, 2, concurrency=2),
+                                        processes=1)
+        self.assertEqual(stats["matches"], 2)
+        self.assertEqual(server.stats["finished"], 2)
+        self.assertGreater(server.stats["moves"], 0)
+
+    def open_match(self, server):
+        async def connect(player):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            write_message(writer, {"name": player.name, "player": player.name})
+            return reader, writer
+        return asyncio.gather(connect(Player.WHITE), connect(Player.BLACK))
+
+    def test_illegal_move_loses(self):
+        async def match(server):
+            (white, w), (black, b) = await self.open_match(server)
+            state = await read_message(white)
+            self.assertEqual(ashton_server.parse_turn(state), Player.WHITE)
+            self.assertEqual(state["board"][4][4], "KING")
+            # the king can't jump over its own soldiers
+            write_message(w, {"from": "e5", "to": "e9"})
+            await read_message(black)
+            final = await read_message(black)
+            w.close()
+            b.close()
+            return final["turn"]
+        server, result = self.run_server(match)
+        self.assertEqual(result, "BLACKWIN")
+
+    def test_timeout_loses(self):
+        async def match(server):
+            (white, w), (black, b) = await self.open_match(server)
+            await read_message(white)
+            write_message(w, {"from": "e3", "to": "h3"})
+            state = await read_message(white)
+            self.assertEqual(ashton_server.parse_turn(state), Player.BLACK)
+            self.assertEqual(ashton_server.parse_pieces(state)[2][7], 2)
+            # black never answers
+            final = await read_message(white)
+            w.close()
+            b.close()
+            return final["turn"]
+        server, result = self.run_server(match, move_timeout=0.2)
+        self.assertEqual(result, "WHITEWIN")
+        self.assertEqual(server.stats["moves"], 1)
+
+    def test_disconnected_waiting_client_is_dropped(self):
+        async def match(server):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            write_message(writer, {"name": "gone", "player": "WHITE"})
+            await writer.drain()
+            while not server.waiting[Player.WHITE]:
+                await asyncio.sleep(0.01)
+            writer.close()
+            while server.waiting[Player.WHITE]:
+                await asyncio.sleep(0.01)
+            # the next white client waits for a black one instead of meeting the dead one
+            (white, w), (black, b) = await self.open_match(server)
+            state = await read_message(white)
+            w.close()
+            b.close()
+            return ashton_server.parse_turn(state)
+        server, turn = self.run_server(match, waiting_poll=0.05)
+        self.assertEqual(turn, Player.WHITE)
+        self.assertEqual(server.stats["matches"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
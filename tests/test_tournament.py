@@ -0,0 +1,90 @@
+import json
+import math
+import os
+import tempfile
+import unittest
+import tablut.tournament as tournament
+from tablut.player import SearchPlayer
+from tablut.tournament import PairStats, run_tournament
+
+RANDOM = "tablut.player:RandomPlayer"
+SEARCH = "tests.test_tournament:ShallowSearchPlayer"
+
+
+class ShallowSearchPlayer(SearchPlayer):
+    def __init__(self, game, player):
+        super().__init__(game, player, time_budget=0.05, tt_megabytes=1, max_depth=1)
+
+
+def stats(wins, draws, losses):
+    pair = PairStats("a", "b")
+    pair.wins, pair.draws, pair.losses = wins, draws, losses
+    return pair
+
+
+class TournamentTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_elo(self):
+        self.assertAlmostEqual(tournament.elo(0.5), 0.0)
+        self.assertAlmostEqual(tournament.elo(tournament.expected_score(120.0)), 120.0)
+        estimate, low, high = stats(60, 20, 20).elo()
+        self.assertAlmostEqual(estimate, tournament.elo(0.7))
+        self.assertLess(low, estimate)
+        self.assertLess(estimate, high)
+        # more games, narrower interval
+        _, low2, high2 = stats(600, 200, 200).elo()
+        self.assertLess(high2 - low2, high - low)
+        # a sweep still has an interval
+        estimate, low, high = stats(1000, 0, 0).elo()
+        self.assertLess(low, estimate)
+
+    def test_llr(self):
+        self.assertEqual(stats(0, 0, 0).llr(0, 10), 0.0)
+        # all draws: a 0.5 score is nearer elo0
+        self.assertLess(stats(0, 10, 0).llr(0, 10), 0)
+        # all wins or all losses: no variance in the results, the test still concludes
+        self.assertGreater(stats(1000, 0, 0).llr(0, 10), math.log(19))
+        self.assertLess(stats(0, 0, 1000).llr(0, 10), -math.log(19))
+        self.assertGreater(stats(60, 20, 20).llr(0, 10), 0)
+        self.assertLess(stats(20, 20, 60).llr(0, 10), 0)
+        self.assertGreater(stats(600, 200, 200).llr(0, 10), stats(60, 20, 20).llr(0, 10))
+
+    def test_pairings(self):
+        players = ["a", "b", "c"]
+        self.assertEqual(tournament.pairings(players), [("a", "b"), ("a", "c"), ("b", "c")])
+        self.assertEqual(tournament.pairings(players, gauntlet=True), [("a", "b"), ("a", "c")])
+
+    def test_game_seeds(self):
+        seeds = set(tournament.game_seed(0, pair, k) for pair in range(3) for k in range(20))
+        self.assertEqual(len(seeds), 60)
+        self.assertEqual(tournament.game_seed(0, 1, 2), tournament.game_seed(0, 1, 2))
+        self.assertNotEqual(tournament.game_seed(0, 1, 2), tournament.game_seed(1, 1, 2))
+
+    def test_games_are_streamed_alternating_colours(self):
+        path = os.path.join(self.dir.name, "match.jsonl")
+        results = run_tournament([RANDOM, SEARCH], path, games=4,
+                                 processes=2, max_plies=20)
+        self.assertEqual([p.games for p in results], [4])
+        with open(path) as f:
+            games = sorted((json.loads(line) for line in f), key=lambda g: g["game"])
+        self.assertEqual(len(games), 4)
+        self.assertEqual([g["white"] == RANDOM for g in games], [True, False, True, False])
+        self.assertEqual([g["seed"] for g in games],
+                         [tournament.game_seed(0, 0, k) for k in range(4)])
+
+    def test_sprt_stops_early(self):
+        path = os.path.join(self.dir.name, "sprt.jsonl")
+        # wide hypotheses and error rates: a clearly stronger player decides it quickly
+        results = run_tournament([SEARCH, RANDOM], path, games=200,
+                                 processes=2, max_plies=60, sprt=(0, 400, 0.2, 0.2))
+        self.assertEqual(results[0].sprt, "H1")
+        self.assertLess(results[0].games, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
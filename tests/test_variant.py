@@ -0,0 +1,159 @@
+import random
+import unittest
+import numpy as np
+import tablut.rules.ashton as ashton
+import tablut.rules.brandubh as brandubh
+import tablut.rules.hnefatafl as hnefatafl
+import tablut.rules.variant as variant
+from tablut.board import WinException
+from tablut.game import Player
+
+
+def position(board_class, rows):
+    board = board_class()
+    pieces = np.array([[variant.PIECE_CHARS[c] for c in row] for row in rows], dtype=np.int8)
+    board.board = variant.TILE_VALUES[board.TILES] + pieces
+    board._reset_history()
+    return board
+
+
+class VariantTest(unittest.TestCase):
+    def test_ashton_tables(self):
+        self.assertEqual(ashton.CASTLE_TILE, (4, 4))
+        self.assertEqual(len(ashton.CAMP_TILES), 16)
+        self.assertEqual(len(ashton.ESCAPE_TILES), 16)
+        self.assertEqual(len(ashton.CASTLE_ZONE), 5)
+
+    def test_other_sizes(self):
+        for board_class, size, white, black in ((brandubh.Board, 7, 4, 8), (hnefatafl.Board, 11, 12, 24)):
+            board = board_class()
+            self.assertEqual(board.pieces.shape, (size, size))
+            self.assertEqual((board.white_count, board.black_count), (white, black))
+            self.assertEqual(board.pack(board.board), board.BOARD_TEMPLATE)
+
+    def test_moves_match_is_legal(self):
+        for board_class in (brandubh.Board, hnefatafl.Board):
+            rnd = random.Random(1)
+            board = board_class()
+            size = board.TABLES.size
+            squares = [(i, j) for i in range(size) for j in range(size)]
+            player = Player.WHITE
+            for _ in range(30):
+                moves = board.legal_moves(player)
+                self.assertEqual(sorted(moves), sorted(
+                    (s, e) for s in squares for e in squares if board.is_legal(player, s, e)[0]))
+                board.make_move(player, *rnd.choice(moves))
+                if board.winning_condition() or board.lose_condition():
+                    break
+                player = player.next()
+
+    def test_make_unmake(self):
+        board = hnefatafl.Board()
+        rnd = random.Random(2)
+        player, undos, states = Player.WHITE, list(), list()
+        for _ in range(40):
+            states.append((board.pieces.copy(), board.hash))
+            undos.append(board.make_move(player, *rnd.choice(board.legal_moves(player))))
+            if board.winning_condition() or board.lose_condition():
+                break
+            player = player.next()
+        for undo, (pieces, h) in zip(reversed(undos), reversed(states)):
+            board.unmake_move(undo)
+            np.testing.assert_array_equal(board.pieces, pieces)
+            self.assertEqual(board.hash, h)
+
+    def test_castle_and_corners(self):
+        board = position(brandubh.Board, [
+            ".......",
+            ".......",
+            ".......",
+            "W......",
+            ".......",
+            ".......",
+            "...K...",
+        ])
+        ends = [e for _, e in board.piece_legal_moves((3, 0))]
+        # soldiers pass over the empty castle, only the king stops there or on corners
+        self.assertIn((3, 6), ends)
+        self.assertNotIn((3, 3), ends)
+        self.assertNotIn((6, 0), ends)
+        self.assertEqual(board.is_legal(Player.WHITE, (3, 0), (3, 3)), (False, "Cannot end in the castle"))
+        self.assertEqual(board.is_legal(Player.WHITE, (3, 0), (6, 0)), (False, "Cannot end in a corner"))
+        with self.assertRaises(WinException):
+            board.step(Player.WHITE, (6, 3), (6, 0))
+
+    def test_corner_is_hostile(self):
+        board = position(brandubh.Board, [
+            ".W.....",
+            ".......",
+            "..B....",
+            "...K...",
+            ".......",
+            ".......",
+            ".......",
+        ])
+        board.step(Player.BLACK, (2, 2), (0, 2))
+        self.assertEqual(board.white_count, 0)
+
+    def test_brandubh_king_capture(self):
+        # away from the castle two attackers are enough
+        board = position(brandubh.Board, [
+            ".......",
+            "..BK...",
+            "....B..",
+            ".......",
+            ".......",
+            ".......",
+            ".......",
+        ])
+        board.make_move(Player.BLACK, (2, 4), (1, 4))
+        self.assertTrue(board.lose_condition())
+        # next to the castle it takes three attackers and the empty castle
+        rows = [
+            ".......",
+            "...B...",
+            "..BK...",
+            ".......",
+            ".......",
+            "....B..",
+            ".......",
+        ]
+        board = position(brandubh.Board, rows)
+        board.make_move(Player.BLACK, (5, 4), (2, 4))
+        self.assertTrue(board.lose_condition())
+        board = position(brandubh.Board, [rows[0], "......."] + rows[2:])
+        board.make_move(Player.BLACK, (5, 4), (2, 4))
+        self.assertFalse(board.lose_condition())
+
+    def test_hnefatafl_king_capture(self):
+        rows = [
+            "...........",
+            "...........",
+            "...B.......",
+            "..BK..B....",
+            "...B.......",
+            "...........",
+            "...........",
+            "...........",
+            "...........",
+            "...........",
+            "...........",
+        ]
+        board = position(hnefatafl.Board, rows)
+        board.make_move(Player.BLACK, (3, 6), (3, 4))
+        self.assertTrue(board.lose_condition())
+        # custodial captures don't take the king
+        board = position(hnefatafl.Board, [rows[0], rows[1], "...........", rows[3], "..........."] + rows[5:])
+        board.make_move(Player.BLACK, (3, 6), (3, 4))
+        self.assertFalse(board.lose_condition())
+        # nor does surrounding it on the edge
+        board = position(hnefatafl.Board, [
+            "..BK..B....",
+            "...B.......",
+        ] + rows[2:3] + ["..........."] * 8)
+        board.make_move(Player.BLACK, (0, 6), (0, 4))
+        self.assertFalse(board.lose_condition())
+
+
+if __name__ == '__main__':
+    unittest.main()